@@ -0,0 +1,71 @@
+"""
+xlsx 写出引擎性能对比：各引擎的写出速度（行/秒）与峰值内存。
+每个引擎在独立的子进程中运行，峰值内存互不影响。
+用法（在项目根目录执行）：python benchmarks/bench_export.py --rows 200000 --cols 10
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from logic.utils import export_dataframe_to_file, get_xlsx_engine  # noqa: E402
+from logic.instrumentation import peak_rss_mb  # noqa: E402
+
+
+def _make_dataframe(rows, cols, seed):
+    rng = np.random.default_rng(seed)
+    data = {}
+    for i in range(cols):
+        if i % 3 == 0:
+            data[f"数值{i}"] = rng.integers(0, 1_000_000, rows)
+        elif i % 3 == 1:
+            data[f"小数{i}"] = rng.random(rows)
+        else:
+            data[f"文本{i}"] = pd.Series(rng.integers(0, 50_000, rows)).map(lambda v: f"资源组/{v:05d}")
+    return pd.DataFrame(data)
+
+
+def _run_engine(engine, rows, cols, seed, output_dir, queue):
+    df = _make_dataframe(rows, cols, seed)
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    export_dataframe_to_file(df, output_dir, f"bench_{engine}", 'xlsx', engine=engine)
+    elapsed = time.perf_counter() - start
+    peak = peak_rss_mb()
+    size = os.path.getsize(os.path.join(output_dir, f"bench_{engine}.xlsx"))
+    queue.put((elapsed, None if peak is None else peak - baseline, size))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="xlsx 写出引擎性能对比")
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--cols', type=int, default=10)
+    parser.add_argument('--engines', default='openpyxl,write_only,xlsxwriter')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context('spawn')
+    print(f"行数: {args.rows}，列数: {args.cols}")
+    print(f"{'引擎':<12}{'实际引擎':<12}{'用时(秒)':>10}{'行/秒':>12}{'峰值内存增量(MB)':>20}{'文件大小(MB)':>16}")
+    with tempfile.TemporaryDirectory() as output_dir:
+        for engine in args.engines.split(','):
+            queue = context.Queue()
+            process = context.Process(target=_run_engine,
+                                      args=(engine, args.rows, args.cols, args.seed, output_dir, queue))
+            process.start()
+            elapsed, peak, size = queue.get()
+            process.join()
+            peak_text = 'N/A' if peak is None else f"{peak:.1f}"
+            print(f"{engine:<12}{get_xlsx_engine(engine):<12}{elapsed:>10.2f}{args.rows / elapsed:>12.0f}"
+                  f"{peak_text:>20}{size / 1024 ** 2:>16.1f}")
+
+
+if __name__ == '__main__':
+    main()
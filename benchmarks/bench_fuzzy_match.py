@@ -0,0 +1,88 @@
+"""
+去重匹配性能对比：逐键 re.match 与 LongestPrefixMatcher 前缀树。
+用法（在项目根目录执行）：python benchmarks/bench_fuzzy_match.py --uniques 100000 --keys 50000
+"""
+import argparse
+import logging
+import os
+import random
+import re
+import string
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from logic.data_match import fuzzy_match_and_fill  # noqa: E402
+from logic.matchers import LongestPrefixMatcher  # noqa: E402
+
+
+def _random_path(rng, depth):
+    return '/'.join(''.join(rng.choices(string.ascii_letters, k=rng.randint(4, 8))) for _ in range(depth))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="去重匹配性能对比")
+    parser.add_argument('--uniques', type=int, default=100000)
+    parser.add_argument('--keys', type=int, default=50000)
+    parser.add_argument('--legacy-values', type=int, default=200, help="逐键方式只抽样计时的值数量")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    keys = list(dict.fromkeys(_random_path(rng, rng.randint(1, 3)) for _ in range(args.keys)))
+    values = set()
+    while len(values) < args.uniques:
+        # 约一半的值以某个映射键开头
+        prefix = rng.choice(keys) + '/' if rng.random() < 0.5 else ''
+        values.add(prefix + _random_path(rng, rng.randint(1, 3)))
+    values = list(values)
+
+    start = time.perf_counter()
+    matcher = LongestPrefixMatcher(keys)
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = [matcher.find(value.strip().lower()) for value in values]
+    match_time = time.perf_counter() - start
+
+    sorted_keys = sorted(keys, key=len, reverse=True)
+    sample = values[:args.legacy_values]
+    legacy_results = []
+    start = time.perf_counter()
+    for value in sample:
+        value_str = value.strip().lower()
+        legacy_results.append(next((k for k in sorted_keys if re.match(re.escape(k.lower()), value_str)), None))
+    legacy_time = (time.perf_counter() - start) * len(values) / len(sample)
+
+    assert results[:len(sample)] == legacy_results, "前缀树结果与逐键匹配结果不一致"
+
+    # 端到端：包含读取映射文件
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        mapping_path = os.path.join(tmp_dir, 'mapping.csv')
+        pd.DataFrame({0: keys, 1: [f"组{i}" for i in range(len(keys))]}).to_csv(
+            mapping_path, index=False, header=False, encoding='utf-8')
+        logging.disable(logging.INFO)
+        stdout = sys.stdout
+        sys.stdout = open(os.devnull, 'w', encoding='utf-8')
+        try:
+            start = time.perf_counter()
+            fuzzy_match_and_fill(values, mapping_path)
+            end_to_end_time = time.perf_counter() - start
+        finally:
+            sys.stdout.close()
+            sys.stdout = stdout
+            logging.disable(logging.NOTSET)
+
+    print(f"唯一值: {len(values)}，映射键: {len(keys)}，命中: {sum(r is not None for r in results)}")
+    print(f"前缀树构建: {build_time:.2f} 秒，匹配: {match_time:.2f} 秒")
+    print(f"逐键匹配（按 {len(sample)} 个值抽样推算）: {legacy_time:.2f} 秒")
+    print(f"加速比: {legacy_time / max(match_time, 1e-9):.1f}x")
+    print(f"fuzzy_match_and_fill 端到端: {end_to_end_time:.2f} 秒")
+
+
+if __name__ == '__main__':
+    main()
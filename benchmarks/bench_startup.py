@@ -0,0 +1,65 @@
+"""
+程序启动用时测量：多次启动界面程序（或打包后的可执行文件），记录从启动进程到窗口首次绘制的用时。
+每次启动都是独立的新进程，外部用时包含解释器启动和单文件程序的解压，内部用时为 main.py 记录的首次绘制用时。
+用法（在项目根目录执行）：
+    python benchmarks/bench_startup.py --runs 5 --target 1.0
+    python benchmarks/bench_startup.py --exe dist/main.exe
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure_once(command, offscreen):
+    """启动一次程序，返回 (外部用时, 内部记录的首次绘制用时或 None)。"""
+    with tempfile.TemporaryDirectory() as tmp:
+        report_path = os.path.join(tmp, 'startup.jsonl')
+        env = dict(os.environ, DATA_CONVERT_STARTUP_REPORT=report_path, DATA_CONVERT_EXIT_AFTER_STARTUP='1')
+        if offscreen:
+            env['QT_QPA_PLATFORM'] = 'offscreen'
+        start = time.perf_counter()
+        subprocess.run(command, cwd=ROOT, env=env, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        elapsed = time.perf_counter() - start
+        if not os.path.exists(report_path):
+            return elapsed, None
+        with open(report_path, 'r', encoding='utf-8') as f:
+            return elapsed, json.loads(f.readline())['first_paint_seconds']
+
+
+def main():
+    parser = argparse.ArgumentParser(description="程序启动用时测量")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--exe', help="打包后的可执行文件路径，不指定时用当前解释器运行 main.py")
+    parser.add_argument('--offscreen', action='store_true', help="不显示窗口（无显示环境时使用）")
+    parser.add_argument('--target', type=float, default=1.0, help="首次绘制用时目标（秒），中位数超过时退出码为 1")
+    args = parser.parse_args()
+
+    command = [args.exe] if args.exe else [sys.executable, os.path.join(ROOT, 'main.py')]
+    external, internal = [], []
+    for i in range(args.runs):
+        elapsed, first_paint = measure_once(command, args.offscreen)
+        external.append(elapsed)
+        if first_paint is not None:
+            internal.append(first_paint)
+        first_paint_text = 'N/A' if first_paint is None else f"{first_paint:.3f}"
+        print(f"第 {i + 1} 次: 进程用时 {elapsed:.3f} 秒，首次绘制 {first_paint_text} 秒")
+
+    median = statistics.median(external)
+    print(f"\n进程用时（含退出）: 最短 {min(external):.3f} 秒，中位数 {median:.3f} 秒")
+    if internal:
+        print(f"首次绘制（进程内计时）: 最短 {min(internal):.3f} 秒，中位数 {statistics.median(internal):.3f} 秒")
+    if median > args.target:
+        print(f"中位数超过目标 {args.target:.1f} 秒")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
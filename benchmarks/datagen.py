@@ -0,0 +1,137 @@
+"""
+基准测试数据生成器：按固定随机种子生成源文件、筛选条件文件和映射关系文件，相同参数生成的数据完全一致。
+用法（在项目根目录执行）：
+    python benchmarks/datagen.py --out bench_data --rows 100000 --cols 8 --cardinality 5000 --format csv --encoding gbk
+"""
+import argparse
+import os
+import random
+
+import numpy as np
+import pandas as pd
+
+# 源文件中用于筛选/匹配的列
+KEY_COLUMN = '资源组'
+
+_REGIONS = ['华北', '华东', '华南', '西南', '西北', '东北', '华中']
+_SYSTEMS = ['核心网', '传输', '无线', '数据', '计费', '客服', '办公']
+
+
+def make_key_universe(cardinality, seed=42):
+    """
+    生成 cardinality 个不重复的资源组路径，形如“华北/核心网/节点0001”，可用 GBK 编码。
+    :return: 资源组列表
+    """
+    rng = random.Random(seed)
+    keys = []
+    seen = set()
+    while len(keys) < cardinality:
+        key = f"{rng.choice(_REGIONS)}/{rng.choice(_SYSTEMS)}/节点{rng.randint(0, cardinality * 4):05d}"
+        if key not in seen:
+            seen.add(key)
+            keys.append(key)
+    return keys
+
+
+def make_source_frame(rows, cols, keys, seed=42):
+    """
+    生成源数据：第一列为资源组（从 keys 中随机抽取），其余为数值、文本、日期交替的列。
+    :param rows: 行数
+    :param cols: 总列数（至少 1）
+    """
+    rng = np.random.default_rng(seed)
+    data = {KEY_COLUMN: np.asarray(keys, dtype=object)[rng.integers(0, len(keys), rows)]}
+    for i in range(1, cols):
+        kind = i % 3
+        if kind == 0:
+            data[f"数值{i}"] = rng.integers(0, 1_000_000, rows).astype(str)
+        elif kind == 1:
+            data[f"名称{i}"] = pd.Series(rng.integers(0, 10_000, rows)).map(lambda v: f"设备-{v:04d}").to_numpy()
+        else:
+            days = rng.integers(0, 3650, rows)
+            data[f"日期{i}"] = (np.datetime64('2015-01-01') + days.astype('timedelta64[D]')).astype(str)
+    return pd.DataFrame(data)
+
+
+def write_source_files(output_dir, rows, cols, cardinality, output_format='csv', encoding='utf-8', files=1,
+                       seed=42):
+    """
+    生成源文件（多个文件时行数平均分配），返回 (文件路径列表, 资源组列表)。
+    :param output_format: 'csv' 或 'xlsx'
+    :param encoding: CSV 文件编码，如 'utf-8'、'gbk'
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    keys = make_key_universe(cardinality, seed)
+    paths = []
+    for index in range(files):
+        file_rows = rows // files + (1 if index < rows % files else 0)
+        df = make_source_frame(file_rows, cols, keys, seed + index)
+        path = os.path.join(output_dir, f"source_{index + 1}.{output_format}")
+        if output_format == 'csv':
+            df.to_csv(path, index=False, encoding=encoding)
+        elif output_format == 'xlsx':
+            df.to_excel(path, index=False)
+        else:
+            raise ValueError("不支持的文件格式。请选择 'csv' 或 'xlsx'。")
+        paths.append(path)
+    return paths, keys
+
+
+def write_keyword_file(path, keys, count, seed=42):
+    """
+    生成筛选条件文件（无标题行，单列）：从资源组中抽取 count 个关键字，
+    一半为完整资源组、其余为资源组的前缀或末段，使四种匹配模式都有命中。
+    """
+    rng = random.Random(seed)
+    keywords = []
+    for key in rng.sample(keys, min(count, len(keys))):
+        kind = rng.random()
+        if kind < 0.5:
+            keywords.append(key)
+        elif kind < 0.75:
+            keywords.append(key.rsplit('/', 1)[0] + '/' + key.rsplit('/', 1)[1][:4])
+        else:
+            keywords.append(key.rsplit('/', 1)[1])
+    pd.DataFrame({0: keywords}).to_csv(path, index=False, header=False, encoding='utf-8')
+    return path
+
+
+def write_mapping_file(path, keys, groups, prefix=False, seed=42):
+    """
+    生成映射关系文件（无标题行，第一列为资源组，第二列为所属分组）。
+    :param groups: 分组数量
+    :param prefix: True 时第一列为资源组的上级路径（用于去重匹配的前缀匹配），否则为完整资源组（用于匹配分流的精确匹配）
+    """
+    rng = random.Random(seed)
+    sources = sorted({key.rsplit('/', 1)[0] for key in keys}) if prefix else list(keys)
+    # 约 90% 的资源组有映射，其余用于产生无匹配记录
+    sources = [source for source in sources if rng.random() < 0.9]
+    pd.DataFrame({0: sources, 1: [f"分组{rng.randrange(groups):03d}" for _ in sources]}).to_csv(
+        path, index=False, header=False, encoding='utf-8')
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="生成基准测试数据")
+    parser.add_argument('--out', required=True, help="输出目录")
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--cols', type=int, default=8)
+    parser.add_argument('--cardinality', type=int, default=5000, help="资源组（筛选/匹配列）的不同取值数量")
+    parser.add_argument('--files', type=int, default=1)
+    parser.add_argument('--format', choices=['csv', 'xlsx'], default='csv')
+    parser.add_argument('--encoding', default='utf-8')
+    parser.add_argument('--keywords', type=int, default=1000)
+    parser.add_argument('--groups', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    paths, keys = write_source_files(os.path.join(args.out, 'source'), args.rows, args.cols, args.cardinality,
+                                     args.format, args.encoding, args.files, args.seed)
+    write_keyword_file(os.path.join(args.out, 'keywords.csv'), keys, args.keywords, args.seed)
+    write_mapping_file(os.path.join(args.out, 'mapping_exact.csv'), keys, args.groups, seed=args.seed)
+    write_mapping_file(os.path.join(args.out, 'mapping_prefix.csv'), keys, args.groups, prefix=True, seed=args.seed)
+    print(f"已生成 {len(paths)} 个源文件及筛选条件、映射关系文件: {args.out}")
+
+
+if __name__ == '__main__':
+    main()
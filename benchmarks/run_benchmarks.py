@@ -0,0 +1,246 @@
+"""
+基准测试套件：用 datagen 生成固定的测试数据，对读取、四种筛选模式、去重匹配、匹配分流和各导出格式计时，
+结果写入 JSON 文件，并可与保存的基线结果对比。
+单项算法的新旧实现对比见 bench_contains.py、bench_fuzzy_match.py、bench_export.py。
+
+用法（在项目根目录执行）：
+    python benchmarks/run_benchmarks.py --output bench_results.json
+    python benchmarks/run_benchmarks.py --output new.json --baseline bench_results.json --threshold 0.1
+    python benchmarks/run_benchmarks.py --quick --cases filter,export
+"""
+import argparse
+import contextlib
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import datagen  # noqa: E402
+from logic import utils  # noqa: E402
+from logic.utils import read_file, export_dataframe_to_file, get_xlsx_engine  # noqa: E402
+from logic.data_filter import DataFilterLogic  # noqa: E402
+from logic.data_match import fuzzy_match_and_fill  # noqa: E402
+from logic.match_and_split import MatchAndSplitProcessor  # noqa: E402
+from logic.source_cache import configure_source_cache  # noqa: E402
+
+FILTER_MODES = ['精确匹配', '包含匹配', '前缀匹配', '后缀匹配']
+
+
+class BenchmarkData:
+    """一次运行共用的测试数据（位于临时目录中）。"""
+
+    def __init__(self, root, args):
+        self.root = root
+        self.rows = args.rows
+        self.csv_utf8, keys = datagen.write_source_files(
+            os.path.join(root, 'csv_utf8'), args.rows, args.cols, args.cardinality, 'csv', 'utf-8', seed=args.seed)
+        self.csv_gbk, _ = datagen.write_source_files(
+            os.path.join(root, 'csv_gbk'), args.rows, args.cols, args.cardinality, 'csv', 'gbk', seed=args.seed)
+        self.xlsx, _ = datagen.write_source_files(
+            os.path.join(root, 'xlsx'), args.xlsx_rows, args.cols, args.cardinality, 'xlsx', seed=args.seed)
+        self.xlsx_rows = args.xlsx_rows
+        self.keys = keys
+        self.keywords = datagen.write_keyword_file(os.path.join(root, 'keywords.csv'), keys, args.keywords,
+                                                   args.seed)
+        self.mapping_exact = datagen.write_mapping_file(os.path.join(root, 'mapping_exact.csv'), keys, args.groups,
+                                                        seed=args.seed)
+        self.mapping_prefix = datagen.write_mapping_file(os.path.join(root, 'mapping_prefix.csv'), keys,
+                                                         args.groups, prefix=True, seed=args.seed)
+        self.frame = pd.read_csv(self.csv_utf8[0], dtype=str)
+
+    def output_dir(self, name):
+        path = os.path.join(self.root, 'output', name)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+
+def _read_case(path):
+    def run():
+        # 清空编码缓存，每次计时都包含编码探测
+        utils._encoding_cache.clear()
+        read_file(path)
+    return run
+
+
+def _filter_case(data, match_mode):
+    output_dir = data.output_dir(f"filter_{match_mode}")
+
+    def run():
+        DataFilterLogic().process_data({
+            "is_filter_mode": True, "file_a_path": data.csv_utf8[0], "is_dir_mode": False,
+            "file_b_path": data.keywords, "col_a": datagen.KEY_COLUMN, "match_mode": match_mode,
+            "header_row": 1, "page_size": data.rows, "output_dir": output_dir, "output_format": 'csv',
+        })
+    return run
+
+
+def _fuzzy_match_case(data):
+    values = set(data.keys)
+
+    def run():
+        fuzzy_match_and_fill(values, data.mapping_prefix)
+    return run
+
+
+def _match_and_split_case(data, output_mode, streaming):
+    output_dir = data.output_dir(f"match_and_split_{output_mode}_{int(streaming)}")
+
+    def run():
+        processor = MatchAndSplitProcessor()
+        processor.set_output_dir(output_dir)
+        processor.load_source_files(data.csv_utf8[0], 1)
+        processor.load_mapping_file(data.mapping_exact)
+        processor.process_and_export(datagen.KEY_COLUMN, output_mode, max(data.rows // 10, 1), 'csv',
+                                     streaming=streaming)
+    return run
+
+
+def _export_case(data, output_format, engine=None):
+    output_dir = data.output_dir('export')
+    frame = data.frame if output_format == 'csv' else data.frame.iloc[:data.xlsx_rows]
+
+    def run():
+        export_dataframe_to_file(frame, output_dir, f"export_{engine or output_format}", output_format, engine=engine)
+    return run
+
+
+def build_cases(data):
+    """返回 [(用例名, 处理行数, 计时函数)]。"""
+    cases = [
+        ('read_file[csv-utf8]', data.rows, _read_case(data.csv_utf8[0])),
+        ('read_file[csv-gbk]', data.rows, _read_case(data.csv_gbk[0])),
+        ('read_file[xlsx]', data.xlsx_rows, _read_case(data.xlsx[0])),
+    ]
+    cases += [(f"filter[{mode}]", data.rows, _filter_case(data, mode)) for mode in FILTER_MODES]
+    cases.append(('fuzzy_match_and_fill', len(data.keys), _fuzzy_match_case(data)))
+    cases += [
+        ('process_and_export[single_file]', data.rows, _match_and_split_case(data, 'single_file', False)),
+        ('process_and_export[split_output]', data.rows, _match_and_split_case(data, 'split_output', False)),
+        ('process_and_export[split_output-streaming]', data.rows,
+         _match_and_split_case(data, 'split_output', True)),
+        ('export[csv]', data.rows, _export_case(data, 'csv')),
+    ]
+    for engine in ['openpyxl', 'write_only', 'xlsxwriter']:
+        # 未安装 xlsxwriter 时该引擎会回退，结果没有意义，跳过
+        if get_xlsx_engine(engine) == engine:
+            cases.append((f"export[xlsx-{engine}]", data.xlsx_rows, _export_case(data, 'xlsx', engine)))
+    return cases
+
+
+def time_case(func, repeats):
+    """执行 repeats 次，返回每次用时（秒）。处理过程中的日志和 print 输出被屏蔽。"""
+    timings = []
+    logging.disable(logging.CRITICAL)
+    try:
+        with open(os.devnull, 'w', encoding='utf-8') as devnull, contextlib.redirect_stdout(devnull):
+            for _ in range(repeats):
+                start = time.perf_counter()
+                func()
+                timings.append(time.perf_counter() - start)
+    finally:
+        logging.disable(logging.NOTSET)
+    return timings
+
+
+def compare_with_baseline(results, baseline, threshold):
+    """
+    与基线逐项对比，打印对比表。
+    :return: 变慢超过 threshold（比例）的用例名列表
+    """
+    regressions = []
+    print(f"\n{'用例':<44}{'基线(秒)':>10}{'本次(秒)':>10}{'变化':>9}")
+    for name, result in results.items():
+        base = baseline.get('results', {}).get(name)
+        if base is None:
+            print(f"{name:<44}{'-':>10}{result['best']:>10.3f}{'新增':>9}")
+            continue
+        change = result['best'] / base['best'] - 1 if base['best'] else 0.0
+        flag = ''
+        if change > threshold:
+            flag = '  <-- 变慢'
+            regressions.append(name)
+        print(f"{name:<44}{base['best']:>10.3f}{result['best']:>10.3f}{change:>+9.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="基准测试套件")
+    parser.add_argument('--output', default='bench_results.json', help="结果 JSON 文件路径")
+    parser.add_argument('--baseline', help="用于对比的基线结果 JSON 文件")
+    parser.add_argument('--threshold', type=float, default=0.1, help="判定为变慢的比例，默认 0.1（10%%）")
+    parser.add_argument('--cases', help="只运行名称包含这些关键字的用例，逗号分隔，如 filter,export")
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--xlsx-rows', type=int, default=20000, help="xlsx 读取和导出用例的行数")
+    parser.add_argument('--cols', type=int, default=8)
+    parser.add_argument('--cardinality', type=int, default=5000)
+    parser.add_argument('--keywords', type=int, default=1000)
+    parser.add_argument('--groups', type=int, default=20)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--quick', action='store_true', help="使用小数据量快速运行一遍")
+    args = parser.parse_args()
+    if args.quick:
+        args.rows, args.xlsx_rows, args.cardinality, args.repeats = 10000, 2000, 1000, 1
+
+    # 关闭源文件缓存，保证每次计时都真正解析文件
+    configure_source_cache(None)
+
+    with tempfile.TemporaryDirectory() as root:
+        print("正在生成测试数据...")
+        data = BenchmarkData(root, args)
+        cases = build_cases(data)
+        if args.cases:
+            keywords = args.cases.split(',')
+            cases = [case for case in cases if any(keyword in case[0] for keyword in keywords)]
+
+        results = {}
+        for name, rows, func in cases:
+            timings = time_case(func, args.repeats)
+            best = min(timings)
+            results[name] = {
+                'best': round(best, 4),
+                'mean': round(sum(timings) / len(timings), 4),
+                'rows': rows,
+                'rows_per_sec': round(rows / best) if best else None,
+            }
+            print(f"{name:<44}{best:>10.3f} 秒{rows / max(best, 1e-9):>14.0f} 行/秒")
+
+    report = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'environment': {
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'parameters': {key: value for key, value in vars(args).items()
+                       if key in ('rows', 'xlsx_rows', 'cols', 'cardinality', 'keywords', 'groups', 'repeats',
+                                  'seed')},
+        'results': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n结果已写入: {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('parameters') != report['parameters']:
+            print("注意：基线与本次运行的数据参数不同，对比结果仅供参考。")
+        regressions = compare_with_baseline(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} 个用例变慢超过 {args.threshold:.0%}: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
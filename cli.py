@@ -0,0 +1,276 @@
+"""
+命令行批处理入口（不依赖 Qt，可在无显示环境的服务器上运行）。
+根据任务描述文件（JSON 或 YAML）依次执行筛选、仅分页、去重匹配、匹配分流任务，
+并输出 JSON 格式的运行总结，便于调度系统并行驱动多个任务。
+
+用法：
+    python cli.py job.json [job2.yaml ...] [--summary summary.json]
+
+任务描述文件可以是单个任务，也可以是 {"settings": {...}, "jobs": [...]} 形式的任务列表，例如：
+    {
+      "settings": {"xlsx_engine": "auto", "excel_reader": "auto"},
+      "jobs": [
+        {"name": "白名单筛选", "type": "filter", "file_a_path": "data/", "file_b_path": "keys.xlsx",
+         "col_a": "资源组", "match_mode": "前缀匹配", "page_size": 1000000, "output_dir": "output/filter"},
+        {"type": "match_and_split", "file_a_path": "data/", "file_b_path": "mapping.xlsx", "col_a": "资源组",
+         "output_mode": "split_output", "split_row_count": 500000, "output_dir": "output/split"}
+      ]
+    }
+标题行 header_row 与界面一致，从 1 开始计数。
+运行总结默认输出到标准输出，处理日志输出到标准错误；所有任务成功时退出码为 0，否则为 1。
+"""
+import argparse
+import contextlib
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from datetime import datetime
+
+# settings 中的配置项 -> 环境变量，子进程（多进程并行处理）会自动继承
+SETTING_ENVS = {
+    'cache_dir': 'DATA_CONVERT_CACHE_DIR',
+    'cache_max_bytes': 'DATA_CONVERT_CACHE_MAX_BYTES',
+    'xlsx_engine': 'DATA_CONVERT_XLSX_ENGINE',
+    'excel_reader': 'DATA_CONVERT_EXCEL_READER',
+    'report_dir': 'DATA_CONVERT_REPORT_DIR',
+    'compact_dtypes': 'DATA_CONVERT_COMPACT_DTYPES',
+}
+
+
+def load_job_spec(path):
+    """
+    读取任务描述文件，返回 (settings, 任务列表)。
+    :param path: .json、.yaml 或 .yml 文件路径
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.lower().endswith(('.yaml', '.yml')):
+            try:
+                import yaml
+            except ImportError:
+                raise ValueError("读取 YAML 任务文件需要安装 PyYAML。")
+            spec = yaml.safe_load(f)
+        else:
+            spec = json.load(f)
+
+    if isinstance(spec, list):
+        return {}, spec
+    if not isinstance(spec, dict):
+        raise ValueError(f"任务文件格式不正确: {path}")
+    if 'jobs' in spec:
+        return spec.get('settings') or {}, list(spec['jobs'])
+    return {}, [spec]
+
+
+def apply_settings(settings):
+    """将 settings 写入对应的环境变量。"""
+    for key, value in settings.items():
+        if key not in SETTING_ENVS:
+            raise ValueError(f"未知的配置项: {key}。可选: {', '.join(SETTING_ENVS)}")
+        if value is None:
+            os.environ.pop(SETTING_ENVS[key], None)
+        else:
+            os.environ[SETTING_ENVS[key]] = str(value)
+
+
+@contextlib.contextmanager
+def _restored_environ():
+    """退出时把环境变量恢复为进入时的状态，使一个任务文件的 settings 不影响之后的任务文件。"""
+    saved = dict(os.environ)
+    try:
+        yield
+    finally:
+        os.environ.clear()
+        os.environ.update(saved)
+
+
+def _require(job, *keys):
+    missing = [key for key in keys if job.get(key) in (None, '')]
+    if missing:
+        raise ValueError(f"任务缺少必填参数: {', '.join(missing)}")
+
+
+def run_filter_job(job, is_filter_mode=True):
+    """执行筛选（或仅分页）任务。"""
+    from logic.data_filter import DataFilterLogic
+
+    _require(job, 'file_a_path', 'output_dir', 'page_size')
+    if is_filter_mode:
+        _require(job, 'file_b_path', 'col_a', 'match_mode')
+    params = {
+        "is_filter_mode": is_filter_mode,
+        "file_a_path": job['file_a_path'],
+        "is_dir_mode": os.path.isdir(job['file_a_path']),
+        "file_b_path": job.get('file_b_path'),
+        "col_a": job.get('col_a'),
+        "match_mode": job.get('match_mode'),
+        "header_row": int(job.get('header_row', 1)),
+        "page_size": int(job['page_size']),
+        "streaming": bool(job.get('streaming', False)),
+        "chunk_size": job.get('chunk_size'),
+        "incremental": bool(job.get('incremental', False)),
+        "workers": int(job.get('workers', 1)),
+        "output_dir": job['output_dir'],
+        "output_format": job.get('output_format', 'xlsx'),
+    }
+    if 'export_workers' in job:
+        params["export_workers"] = int(job['export_workers'])
+    DataFilterLogic().process_data(params)
+    return {}
+
+
+def run_pagination_job(job):
+    """执行仅分页任务。"""
+    return run_filter_job(job, is_filter_mode=False)
+
+
+def run_dedup_match_job(job):
+    """执行去重匹配任务：提取唯一值、按文件B右模糊匹配并导出结果。"""
+    from logic.data_match import get_unique_values, fuzzy_match_and_fill, export_match_results, MatchCache
+
+    _require(job, 'file_a_path', 'col_a', 'file_b_path', 'output_dir')
+    file_a_path = job['file_a_path']
+    output_dir = job['output_dir']
+    os.makedirs(output_dir, exist_ok=True)
+
+    unique_values = get_unique_values(file_a_path, os.path.isdir(file_a_path), int(job.get('header_row', 1)) - 1,
+                                      job['col_a'], workers=int(job.get('workers', 1)))
+    match_cache = MatchCache(job['match_cache']) if job.get('match_cache') else None
+    matched_results, unmatched_values = fuzzy_match_and_fill(
+        unique_values, job['file_b_path'], old_separator=job.get('old_separator'),
+        new_separator=job.get('new_separator'), match_cache=match_cache)
+    export_match_results(matched_results, unmatched_values, output_dir, job.get('output_format', 'xlsx'))
+    return {
+        'unique_values': len(unique_values),
+        'matched': len(matched_results),
+        'unmatched': len(unmatched_values),
+    }
+
+
+def run_match_and_split_job(job):
+    """执行匹配分流任务。"""
+    from logic.match_and_split import MatchAndSplitProcessor
+
+    _require(job, 'file_a_path', 'file_b_path', 'col_a', 'output_dir')
+    output_mode = job.get('output_mode', 'single_file')
+    if output_mode not in ('single_file', 'split_output'):
+        raise ValueError("output_mode 只能为 'single_file' 或 'split_output'。")
+    split_row_count = 0
+    if output_mode == 'split_output':
+        _require(job, 'split_row_count')
+        split_row_count = int(job['split_row_count'])
+        if split_row_count <= 0:
+            raise ValueError("split_row_count 必须为正整数。")
+
+    processor = MatchAndSplitProcessor()
+    processor.set_output_dir(job['output_dir'])
+    processor.load_source_files(job['file_a_path'], int(job.get('header_row', 1)))
+    processor.load_mapping_file(job['file_b_path'])
+    processor.process_and_export(
+        job['col_a'], output_mode, split_row_count, job.get('output_format', 'xlsx'),
+        workers=int(job.get('workers', 1)), export_workers=job.get('export_workers'),
+        streaming=bool(job.get('streaming', False)), chunk_size=job.get('chunk_size'),
+        incremental=bool(job.get('incremental', False)))
+    return {}
+
+
+JOB_RUNNERS = {
+    'filter': run_filter_job,
+    'pagination': run_pagination_job,
+    'dedup_match': run_dedup_match_job,
+    'match_and_split': run_match_and_split_job,
+}
+
+
+def _list_output_files(output_dir, since):
+    """返回输出目录中在 since 之后修改过的文件（文件名排序）。"""
+    if not output_dir or not os.path.isdir(output_dir):
+        return []
+    files = []
+    for name in sorted(os.listdir(output_dir)):
+        path = os.path.join(output_dir, name)
+        if os.path.isfile(path) and os.path.getmtime(path) >= since:
+            files.append(path)
+    return files
+
+
+def run_job(job, index):
+    """执行单个任务，返回该任务的运行结果（不抛出异常）。"""
+    name = job.get('name') or f"job_{index}"
+    job_type = job.get('type')
+    result = {
+        'name': name,
+        'type': job_type,
+        'status': 'success',
+        'error': None,
+        'started_at': datetime.now().isoformat(timespec='seconds'),
+        'elapsed_seconds': None,
+        'output_dir': job.get('output_dir'),
+        'output_files': [],
+    }
+    logging.info(f"--- 开始任务 [{name}]（{job_type}）---")
+    start_wall = time.time()
+    start = time.perf_counter()
+    try:
+        runner = JOB_RUNNERS.get(job_type)
+        if runner is None:
+            raise ValueError(f"未知的任务类型: {job_type}。可选: {', '.join(JOB_RUNNERS)}")
+        result.update(runner(job))
+    except Exception as e:
+        logging.error(f"任务 [{name}] 失败: {e}")
+        result['status'] = 'failed'
+        result['error'] = str(e)
+    result['elapsed_seconds'] = round(time.perf_counter() - start, 3)
+    # 文件修改时间的精度可能低于 time.time()，留出 1 秒余量
+    result['output_files'] = _list_output_files(job.get('output_dir'), start_wall - 1)
+    logging.info(f"--- 任务 [{name}] 结束，状态: {result['status']}，用时: {result['elapsed_seconds']} 秒 ---")
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="数据处理工具命令行批处理入口")
+    parser.add_argument('job_files', nargs='+', help="任务描述文件（.json / .yaml）")
+    parser.add_argument('--summary', help="运行总结输出路径，默认输出到标准输出")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    started_at = datetime.now().isoformat(timespec='seconds')
+    start = time.perf_counter()
+    results = []
+
+    # 处理过程中 print 的内容转到标准错误，标准输出只保留运行总结
+    with contextlib.redirect_stdout(sys.stderr):
+        for job_file in args.job_files:
+            with _restored_environ():
+                try:
+                    settings, jobs = load_job_spec(job_file)
+                    apply_settings(settings)
+                except Exception as e:
+                    logging.error(f"读取任务文件 {job_file} 失败: {e}")
+                    results.append({'name': job_file, 'type': None, 'status': 'failed', 'error': str(e)})
+                    continue
+                for job in jobs:
+                    results.append(run_job(job, len(results) + 1))
+
+    summary = {
+        'started_at': started_at,
+        'elapsed_seconds': round(time.perf_counter() - start, 3),
+        'succeeded': sum(result['status'] == 'success' for result in results),
+        'failed': sum(result['status'] != 'success' for result in results),
+        'jobs': results,
+    }
+    text = json.dumps(summary, ensure_ascii=False, indent=2)
+    if args.summary:
+        with open(args.summary, 'w', encoding='utf-8') as f:
+            f.write(text)
+    else:
+        print(text)
+    return 0 if summary['failed'] == 0 else 1
+
+
+if __name__ == '__main__':
+    # 打包为可执行文件后，多进程并行处理需要此调用
+    multiprocessing.freeze_support()
+    sys.exit(main())
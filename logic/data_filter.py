@@ -1,10 +1,16 @@
+import numpy as np
 import pandas as pd
 import os
 import logging
-from logic.utils import read_file, get_file_list, export_dataframe_to_file
-
-# 配置日志
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+from contextlib import nullcontext
+from logic.utils import read_file, read_file_chunks, read_columns, union_columns, get_file_list, concat_frames, \
+    compact_dtypes_enabled, frame_memory_mb, DEFAULT_CHUNK_SIZE
+from logic.writers import PagedWriter
+from logic.matchers import build_matcher
+from logic.parallel import map_files, replay_messages, resolve_worker_count
+from logic.instrumentation import run, stage, collect, current_file, merge_records
+from logic.progress import ProgressTracker
+from logic.incremental import IncrementalStore, settings_digest
 
 
 class DataFilterLogic:
@@ -26,31 +32,34 @@ class DataFilterLogic:
                 raise FileNotFoundError("所选目录中没有找到可用的CSV或Excel文件！")
             file_to_read = files[0]
 
-        # 调用 utils 中的 read_file 函数，仅读取标题行
-        df = read_file(file_to_read, header_row=header_row - 1, nrows=0)
-        return [str(col) for col in df.columns]
+        # 调用 utils 中的 read_columns 函数，仅读取标题行
+        return [str(col) for col in read_columns(file_to_read, header_row=header_row - 1)]
 
     def process_data(self, params):
         """
         根据参数处理数据。
-        :param params: 包含所有处理参数的字典
+        :param params: 包含所有处理参数的字典；可选的 "progress"（ProgressTracker）用于上报进度和响应取消，
+                       取消时在当前文件或数据块处理完后抛出 OperationCancelled；
+                       筛选模式下 "incremental" 为真时只重新筛选新增或变化的文件（见 IncrementalStore）
         """
-        if params["is_filter_mode"]:
-            self._start_filter(params)
-        else:
-            self._start_pagination_only(params)
+        # 记录各阶段、各文件的用时和内存，结束时输出总结并在输出目录的 run_reports 子目录中写入运行报告
+        name = "filter" if params["is_filter_mode"] else "pagination"
+        report_dir = os.path.join(params["output_dir"], "run_reports") if params.get("output_dir") else None
+        with run(name, report_dir=report_dir, log=self.log):
+            if params["is_filter_mode"]:
+                self._start_filter(params)
+            else:
+                self._start_pagination_only(params)
 
     def _start_filter(self, params):
         """筛选模式的业务逻辑"""
         file_a_path = params["file_a_path"]
-        is_dir_mode = params["is_dir_mode"]
         file_b_path = params["file_b_path"]
         col_a = params["col_a"]
         match_mode = params["match_mode"]
         header_row = params["header_row"] - 1
         page_size = params["page_size"]
         output_dir = params["output_dir"]
-        output_format = params["output_format"]
 
         # 参数校验
         if not file_a_path or not file_b_path:
@@ -69,51 +78,153 @@ class DataFilterLogic:
         filter_criteria = self._read_file_b_criteria(file_b_path, header_row)
         self.log.info(f"筛选条件共 {len(filter_criteria)} 条。")
 
+        # 根据匹配模式一次性构建匹配器（集合/自动机/前缀树），目录模式下所有文件共用
+        matcher = build_matcher(match_mode, filter_criteria)
+
         # 批量处理文件
         files_to_process = get_file_list(file_a_path)
         if not files_to_process:
             raise FileNotFoundError("没有找到需要处理的文件！")
         self.log.info(f"共找到 {len(files_to_process)} 个文件需要处理。")
 
-        filtered_data_all = pd.DataFrame()
-        total_records_processed = 0
-
-        for i, full_path_a in enumerate(files_to_process):
-            file_name = os.path.basename(full_path_a)
-            self.log.info(f"[{i + 1}/{len(files_to_process)}] 正在处理文件：{file_name}")
-
-            df = read_file(full_path_a, header_row=header_row)
-            if col_a not in df.columns:
-                self.log.warning(f"文件 {file_name} 中不存在列 '{col_a}'。跳过。")
-                continue
-
-            # 将筛选列转为小写处理
-            temp_col = df[col_a].astype(str).str.lower().fillna('')
-
-            # 执行筛选
-            if match_mode == '精确匹配':
-                df_filtered = df[temp_col.isin(filter_criteria)].copy()
-            elif match_mode == '包含匹配':
-                df_filtered = df[temp_col.apply(lambda x: any(c in x for c in filter_criteria))].copy()
-            elif match_mode == '前缀匹配':
-                df_filtered = df[temp_col.apply(lambda x: any(x.startswith(c) for c in filter_criteria))].copy()
-            elif match_mode == '后缀匹配':
-                df_filtered = df[temp_col.apply(lambda x: any(x.endswith(c) for c in filter_criteria))].copy()
-
-            self.log.info(f"  - 原文件记录数：{len(df)}，筛选保留记录数：{len(df_filtered)}")
-            total_records_processed += len(df)
-            filtered_data_all = pd.concat([filtered_data_all, df_filtered], ignore_index=True)
-
-        self.log.info(f"已加载所有文件，总记录数: {len(filtered_data_all)}")
-
-        # 统一分页输出
-        self._export_paged_data(filtered_data_all, page_size, output_dir, output_format, "filtered_part")
+        streaming = params.get("streaming")
+        chunk_size = params.get("chunk_size") or DEFAULT_CHUNK_SIZE
+        # 增量处理：筛选结果按文件保存在输出目录的 _incremental 子目录中，清空输出目录时保留
+        store = IncrementalStore(output_dir, "filter", settings_digest(
+            col_a, match_mode, header_row, bool(streaming), sorted(filter_criteria)), log=self.log) \
+            if params.get("incremental") else None
+        with store or nullcontext():
+            total_records_processed, total_records_kept = self._filter_files(
+                params, files_to_process, header_row, col_a, matcher, streaming, chunk_size, store)
 
         self.log.info("\n--- 筛选过程总结 ---")
         self.log.info(f"处理文件总数: {len(files_to_process)}")
         self.log.info(f"总记录数: {total_records_processed}")
-        self.log.info(f"筛选保留总记录数: {len(filtered_data_all)}")
-        self.log.info(f"筛选丢弃总记录数: {total_records_processed - len(filtered_data_all)}")
+        self.log.info(f"筛选保留总记录数: {total_records_kept}")
+        self.log.info(f"筛选丢弃总记录数: {total_records_processed - total_records_kept}")
+
+    def _filter_files(self, params, files_to_process, header_row, col_a, matcher, streaming, chunk_size, store):
+        """
+        筛选全部文件并分页输出，store 不为空时只筛选新增或变化的文件，其余文件使用保存的筛选结果。
+        :return: (总记录数, 筛选保留总记录数)
+        """
+        page_size = params["page_size"]
+        output_dir = params["output_dir"]
+        output_format = params["output_format"]
+        workers = resolve_worker_count(params.get("workers"))
+        export_workers = resolve_worker_count(params.get("export_workers", workers))
+        progress = params.get("progress") or ProgressTracker()
+        progress.start(len(files_to_process))
+
+        pending_files = files_to_process
+        if store is not None:
+            pending_files = store.pending(files_to_process)
+            self.log.info(f"增量处理：{len(pending_files)} 个文件新增或有变化，"
+                          f"{len(files_to_process) - len(pending_files)} 个文件使用上次的筛选结果。")
+
+        # 流式输出时各分页都按包含筛选列的文件合并后的列输出，与一次性合并后分页的结果一致
+        columns = union_columns(files_to_process, header_row=header_row, required=col_a) if streaming else None
+
+        if streaming and workers <= 1:
+            with PagedWriter(output_dir, "filtered_part", page_size, output_format, log=self.log,
+                             export_workers=export_workers, columns=columns) as writer:
+                total_records_processed = self._filter_files_streaming(
+                    files_to_process, header_row, col_a, matcher, chunk_size, writer, progress, store)
+            total_records_kept = writer.rows_written
+        else:
+            # 逐文件筛选（可选多进程并行），匹配器只在每个工作进程启动时传递一次，结果按文件顺序合并
+            filtered_parts = []
+            total_records_processed = 0
+
+            pending_set = set(pending_files)
+            tasks = [(i + 1, len(files_to_process), path) for i, path in enumerate(files_to_process)
+                     if path in pending_set]
+            results = map_files(_filter_file_task, tasks, workers,
+                                initializer=_init_filter_worker,
+                                initargs=(matcher, col_a, header_row, chunk_size if streaming else None))
+            if store is not None:
+                results = _merge_cached_results(files_to_process, results, store)
+            if streaming:
+                with PagedWriter(output_dir, "filtered_part", page_size, output_format, log=self.log,
+                                 export_workers=export_workers, columns=columns) as writer:
+                    for file_rows, df_filtered, messages, records in results:
+                        replay_messages(messages, self.log)
+                        merge_records(records)
+                        if df_filtered is not None:
+                            total_records_processed += file_rows
+                            writer.write(df_filtered)
+                        progress.file_done(file_rows)
+                total_records_kept = writer.rows_written
+            else:
+                for file_rows, df_filtered, messages, records in results:
+                    replay_messages(messages, self.log)
+                    merge_records(records)
+                    if df_filtered is not None:
+                        total_records_processed += file_rows
+                        filtered_parts.append(df_filtered)
+                    progress.file_done(file_rows)
+
+                # 所有文件处理完后一次性合并，避免循环内反复 concat 造成的重复拷贝
+                with stage('concat') as record:
+                    filtered_data_all = concat_frames(filtered_parts)
+                    record.rows_out = len(filtered_data_all)
+                del filtered_parts
+                if compact_dtypes_enabled():
+                    self.log.info(f"紧凑内存模式: 合并后的数据内存占用 {frame_memory_mb(filtered_data_all):.1f} MB")
+                total_records_kept = len(filtered_data_all)
+                self.log.info(f"已加载所有文件，总记录数: {total_records_kept}")
+
+                # 统一分页输出
+                self._export_paged_data(filtered_data_all, page_size, output_dir, output_format, "filtered_part",
+                                        export_workers=export_workers)
+        return total_records_processed, total_records_kept
+
+    def _filter_files_streaming(self, files_to_process, header_row, col_a, matcher, chunk_size, writer, progress,
+                                store=None):
+        """
+        流式筛选：逐文件分块读取、筛选，并将保留的记录直接推送给分页写出器。
+        store 不为空时，未变化的文件直接推送保存的筛选结果，其余文件的筛选结果边输出边保存。
+        :return: 处理的总记录数
+        """
+        total_records_processed = 0
+        for i, full_path_a in enumerate(files_to_process):
+            file_name = os.path.basename(full_path_a)
+            if store is not None and store.is_cached(full_path_a):
+                self.log.info(f"[{i + 1}/{len(files_to_process)}] 文件未变化，使用上次的筛选结果：{file_name}")
+                if not store.is_skipped(full_path_a):
+                    for chunk_filtered in store.load(full_path_a):
+                        writer.write(chunk_filtered)
+                    total_records_processed += store.rows(full_path_a)
+                progress.file_done(store.rows(full_path_a))
+                continue
+            self.log.info(f"[{i + 1}/{len(files_to_process)}] 正在流式处理文件：{file_name}")
+
+            file_rows = 0
+            file_kept = 0
+            with store.partial(full_path_a) if store is not None else nullcontext() as partial:
+                try:
+                    with current_file(file_name):
+                        for chunk_rows, chunk_filtered in _filtered_chunks(full_path_a, header_row, col_a, matcher,
+                                                                           chunk_size):
+                            file_rows += chunk_rows
+                            file_kept += len(chunk_filtered)
+                            writer.write(chunk_filtered)
+                            if partial is not None:
+                                partial.write(chunk_filtered)
+                            progress.add_rows(chunk_rows)
+                except _MissingColumnError:
+                    self.log.warning(f"文件 {file_name} 中不存在列 '{col_a}'。跳过。")
+                    if partial is not None:
+                        partial.skip()
+                    progress.file_done()
+                    continue
+                if partial is not None:
+                    partial.add_rows(file_rows)
+
+            self.log.info(f"  - 原文件记录数：{file_rows}，筛选保留记录数：{file_kept}")
+            total_records_processed += file_rows
+            progress.file_done()
+        return total_records_processed
 
     def _start_pagination_only(self, params):
         """仅分页模式的业务逻辑"""
@@ -140,36 +251,45 @@ class DataFilterLogic:
             raise FileNotFoundError("没有找到需要处理的文件！")
         self.log.info(f"共找到 {len(files_to_process)} 个文件需要处理。")
 
-        all_data_to_page = pd.DataFrame()
+        # 逐文件分块读取并推送给滚动分页写出器，不足一页的剩余记录跨文件累积，无需一次性加载全部数据
+        chunk_size = params.get("chunk_size") or DEFAULT_CHUNK_SIZE
+        export_workers = resolve_worker_count(params.get("export_workers", params.get("workers")))
+        progress = params.get("progress") or ProgressTracker()
+        progress.start(len(files_to_process))
         total_records_processed = 0
-
-        for i, full_path_a in enumerate(files_to_process):
-            file_name = os.path.basename(full_path_a)
-            self.log.info(f"[{i + 1}/{len(files_to_process)}] 正在处理文件：{file_name}")
-
-            df = read_file(full_path_a, header_row=header_row)
-            total_records_processed += len(df)
-            all_data_to_page = pd.concat([all_data_to_page, df], ignore_index=True)
-
-        self.log.info(f"已加载所有文件，总记录数: {total_records_processed}")
-
-        # 统一分页输出
-        self._export_paged_data(all_data_to_page, page_size, output_dir, output_format, "paged_part")
+        # 各文件列不同时，所有分页都按合并后的列输出，与一次性合并后分页的结果一致
+        columns = union_columns(files_to_process, header_row=header_row)
+
+        with PagedWriter(output_dir, "paged_part", page_size, output_format, log=self.log,
+                         export_workers=export_workers, columns=columns) as writer:
+            for i, full_path_a in enumerate(files_to_process):
+                file_name = os.path.basename(full_path_a)
+                self.log.info(f"[{i + 1}/{len(files_to_process)}] 正在处理文件：{file_name}")
+
+                for chunk in read_file_chunks(full_path_a, header_row=header_row, chunksize=chunk_size):
+                    total_records_processed += len(chunk)
+                    writer.write(chunk)
+                    progress.add_rows(len(chunk))
+                progress.file_done()
+
+        if not writer.pages_written:
+            self.log.info("没有数据需要导出，操作跳过。")
 
         self.log.info("\n--- 分页过程总结 ---")
         self.log.info(f"处理文件总数: {len(files_to_process)}")
         self.log.info(f"总记录数: {total_records_processed}")
+        self.log.info(f"输出分页文件数: {writer.pages_written}")
 
     def _read_file_b_criteria(self, file_b_path, header_row):
         """读取筛选条件文件，并返回一个包含所有条件的集合。"""
-        df_b = read_file(file_b_path, header_row=None)
+        df_b = read_file(file_b_path, header_row=None, compact=False)
         if df_b.empty:
             raise ValueError("筛选条件文件为空，请检查文件内容。")
         criteria_set = set(df_b.iloc[:, 0].dropna().astype(str).str.lower().tolist())
         return criteria_set
 
-    def _export_paged_data(self, df, page_size, output_dir, output_format, prefix):
-        """通用分页导出逻辑"""
+    def _export_paged_data(self, df, page_size, output_dir, output_format, prefix, export_workers=1):
+        """通用分页导出逻辑，export_workers > 1 时各分页文件并行写出"""
         if df.empty:
             self.log.info("没有数据需要导出，操作跳过。")
             return
@@ -177,14 +297,9 @@ class DataFilterLogic:
         num_chunks = (len(df) + page_size - 1) // page_size
         self.log.info(f"总记录数 {len(df)}，将分为 {num_chunks} 个文件进行导出。")
 
-        for i in range(num_chunks):
-            start_index = i * page_size
-            end_index = start_index + page_size
-            chunk = df.iloc[start_index:end_index]
-
-            file_name = f"{prefix}_{i + 1}"
-            export_dataframe_to_file(chunk, output_dir, file_name, output_format)
-            self.log.info(f"  - 【输出文件】已输出第 {i + 1} 个分页文件，记录数：{len(chunk)}")
+        with PagedWriter(output_dir, prefix, page_size, output_format, log=self.log,
+                         export_workers=export_workers) as writer:
+            writer.write(df)
 
     def _clear_output_dir(self, directory):
         """清空指定目录下的文件"""
@@ -193,4 +308,136 @@ class DataFilterLogic:
             file_path = os.path.join(directory, filename)
             if os.path.isfile(file_path):
                 os.remove(file_path)
-        self.log.info("输出目录已清空。")
\ No newline at end of file
+        self.log.info("输出目录已清空。")
+
+
+# 工作进程内的筛选状态，由 _init_filter_worker 在进程启动时设置一次
+_worker_state = {}
+
+
+def _init_filter_worker(matcher, col_a, header_row, chunk_size):
+    """工作进程初始化：保存匹配器及筛选参数。"""
+    _worker_state.update(matcher=matcher, col_a=col_a, header_row=header_row, chunk_size=chunk_size)
+
+
+class _MissingColumnError(Exception):
+    """文件中不存在筛选列。"""
+
+
+def _filter_mask(df, col_a, matcher):
+    """计算筛选掩码（numpy 布尔数组）。"""
+    # 将筛选列转为小写处理
+    with stage('normalize', rows_in=len(df)):
+        temp_col = df[col_a].astype(str).str.lower().fillna('')
+    with stage('match', rows_in=len(df)) as record:
+        mask = matcher.match(temp_col).to_numpy()
+        record.rows_out = int(mask.sum())
+    return mask
+
+
+def _filtered_chunks(full_path_a, header_row, col_a, matcher, chunk_size=None):
+    """
+    读取并筛选单个文件，逐块返回 (原记录数, 保留的记录)；chunk_size 为空时整个文件作为一块。
+    流式读取 CSV 文件时采用两阶段读取：先只读取筛选列计算掩码，再分块读取完整记录并只保留命中的行，
+    没有任何命中的文件不再读取其他列。非流式读取和 Excel 文件只读取一次完整记录后筛选，
+    避免有命中的文件被完整解析两次。
+    文件中不存在筛选列时在返回任何数据之前抛出 _MissingColumnError。
+    """
+    def read_chunks(usecols=None):
+        if chunk_size:
+            return read_file_chunks(full_path_a, header_row=header_row, chunksize=chunk_size, usecols=usecols)
+        return [read_file(full_path_a, header_row=header_row, usecols=usecols)]
+
+    if not chunk_size or os.path.splitext(full_path_a)[1].lower() != '.csv':
+        for chunk in read_chunks():
+            if col_a not in chunk.columns:
+                raise _MissingColumnError(col_a)
+            yield len(chunk), chunk[_filter_mask(chunk, col_a, matcher)].copy()
+        return
+
+    # 第一阶段：只读取筛选列
+    masks = []
+    for key_chunk in read_chunks(usecols=[col_a]):
+        if col_a not in key_chunk.columns:
+            raise _MissingColumnError(col_a)
+        masks.append(_filter_mask(key_chunk, col_a, matcher))
+    mask = np.concatenate(masks) if masks else np.zeros(0, dtype=bool)
+
+    if not mask.any():
+        yield len(mask), pd.DataFrame(columns=read_columns(full_path_a, header_row=header_row))
+        return
+
+    # 第二阶段：读取完整记录，按第一阶段的掩码保留命中的行
+    offset = 0
+    for chunk in read_chunks():
+        chunk_mask = mask[offset:offset + len(chunk)]
+        offset += len(chunk)
+        yield len(chunk), chunk[chunk_mask].copy()
+
+
+def _merge_cached_results(files_to_process, results, store):
+    """
+    按文件顺序返回各文件的 (原记录数, 筛选结果 DataFrame 或 None, 日志列表, 阶段计时记录)：
+    未变化的文件读取保存的筛选结果，其余文件依次取自 results（只包含这些文件）并保存筛选结果。
+    """
+    try:
+        for full_path_a in files_to_process:
+            if not store.is_cached(full_path_a):
+                result = next(results)
+                store.save(full_path_a, result[1], result[0])
+                yield result
+                continue
+
+            file_name = os.path.basename(full_path_a)
+            if store.is_skipped(full_path_a):
+                yield 0, None, [(logging.INFO, f"文件 {file_name} 未变化，上次筛选时已跳过。")], []
+                continue
+            parts = list(store.load(full_path_a))
+            df_filtered = parts[0] if len(parts) == 1 else concat_frames(parts)
+            messages = [(logging.INFO, f"文件 {file_name} 未变化，使用上次的筛选结果，"
+                                       f"原文件记录数：{store.rows(full_path_a)}，筛选保留记录数：{len(df_filtered)}")]
+            yield store.rows(full_path_a), df_filtered, messages, []
+    finally:
+        results.close()
+
+
+def _filter_file_task(task):
+    """
+    筛选单个文件（可在工作进程中执行）。
+    :param task: (序号, 文件总数, 文件路径)
+    :return: (原记录数, 筛选结果 DataFrame 或 None（跳过时）, 日志列表, 阶段计时记录)
+    """
+    with collect() as records:
+        result = _filter_file(task)
+    return result + (records,)
+
+
+def _filter_file(task):
+    """筛选单个文件，返回 (原记录数, 筛选结果 DataFrame 或 None, 日志列表)。"""
+    index, total, full_path_a = task
+    matcher = _worker_state["matcher"]
+    col_a = _worker_state["col_a"]
+    header_row = _worker_state["header_row"]
+    chunk_size = _worker_state["chunk_size"]
+
+    file_name = os.path.basename(full_path_a)
+    messages = [(logging.INFO, f"[{index}/{total}] 正在处理文件：{file_name}")]
+
+    file_rows = 0
+    kept_parts = []
+    try:
+        with current_file(file_name):
+            for chunk_rows, chunk_filtered in _filtered_chunks(full_path_a, header_row, col_a, matcher,
+                                                               chunk_size):
+                file_rows += chunk_rows
+                kept_parts.append(chunk_filtered)
+    except _MissingColumnError:
+        messages.append((logging.WARNING, f"文件 {file_name} 中不存在列 '{col_a}'。跳过。"))
+        return 0, None, messages
+
+    with stage('concat', file=file_name) as record:
+        df_filtered = pd.concat(kept_parts, ignore_index=True) if len(kept_parts) > 1 else \
+            (kept_parts[0] if kept_parts else pd.DataFrame())
+        record.rows_out = len(df_filtered)
+    messages.append((logging.INFO, f"  - 原文件记录数：{file_rows}，筛选保留记录数：{len(df_filtered)}"))
+    return file_rows, df_filtered, messages
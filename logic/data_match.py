@@ -1,41 +1,64 @@
-import pandas as pd
 import os
-import re
+import bisect
 import logging
-from logic.utils import read_file, export_match_results as utils_export_match_results
+import pickle
+from itertools import islice
+from logic.utils import read_file, read_file_chunks, read_columns, get_file_list, DEFAULT_CHUNK_SIZE, \
+    export_match_results as utils_export_match_results
+from logic.parallel import map_files
+from logic.matchers import LongestPrefixMatcher
+from logic.instrumentation import run, stage, collect, current_file, merge_records
+from logic.progress import ProgressTracker, OperationCancelled
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+def get_source_columns(file_a_path, is_dir_mode, header_row):
+    """
+    读取文件a（目录模式下为第一个文件）的列标题，只读取标题行。
+    :param header_row: 标题行索引（从0开始）
+    :return: 列标题列表
+    """
+    file_to_read = file_a_path
+    if is_dir_mode:
+        files = get_file_list(file_a_path)
+        if not files:
+            raise FileNotFoundError("所选目录中没有找到可用的CSV或Excel文件！")
+        file_to_read = files[0]
+
+    return [str(col) for col in read_columns(file_to_read, header_row=header_row)]
 
-def get_unique_values(file_a_path, is_dir_mode, header_row, col_a):
+
+def get_unique_values(file_a_path, is_dir_mode, header_row, col_a, workers=1, chunk_size=DEFAULT_CHUNK_SIZE,
+                      progress=None):
     """
     从文件a或目录中读取指定列，并返回去重后的值。
+    每个文件只读取指定列并分块去重，不在内存中保留完整数据；各文件的唯一值集合最后按文件顺序合并。
+    :param workers: 并行进程数，大于1时按文件并行读取
+    :param chunk_size: 分块读取的行数
+    :param progress: 可选的 ProgressTracker，每处理完一个文件上报一次进度，并在文件之间响应取消
     """
     unique_values = set()
-    files_to_process = []
-
-    if is_dir_mode:
-        files_to_process = [os.path.join(file_a_path, f) for f in os.listdir(file_a_path) if
-                            f.endswith(('.csv', '.xlsx', '.xls'))]
-    else:
-        files_to_process = [file_a_path]
+    files_to_process = get_file_list(file_a_path) if is_dir_mode else [file_a_path]
 
     if not files_to_process:
         raise ValueError("没有找到需要处理的文件！")
 
     print("正在从源文件中读取并去重指定列...")
-    for full_path_a in files_to_process:
-        try:
-            df_a = read_file(full_path_a, header_row=header_row)
-            if col_a not in df_a.columns:
-                print(f"警告: 文件 '{os.path.basename(full_path_a)}' 中找不到列: '{col_a}'。跳过此文件。")
-                continue
-
-            # 使用 .astype(str) 防止数据类型问题
-            unique_values.update(df_a[col_a].dropna().astype(str).unique())
-            print(f"  - 从文件 '{os.path.basename(full_path_a)}' 中提取 {len(unique_values)} 条唯一值。")
-        except Exception as e:
-            print(f"处理文件 '{os.path.basename(full_path_a)}' 失败：{e}")
+    progress = progress or ProgressTracker()
+    progress.start(len(files_to_process))
+    tasks = [(full_path_a, header_row, col_a, chunk_size) for full_path_a in files_to_process]
+    with run("unique_values"):
+        results = map_files(_unique_values_task, tasks, workers)
+        for full_path_a, file_values, error, file_rows, records in results:
+            merge_records(records)
+            file_name = os.path.basename(full_path_a)
+            if error:
+                print(f"处理文件 '{file_name}' 失败：{error}")
+            elif file_values is None:
+                print(f"警告: 文件 '{file_name}' 中找不到列: '{col_a}'。跳过此文件。")
+            else:
+                unique_values.update(file_values)
+                print(f"  - 从文件 '{file_name}' 中提取 {len(unique_values)} 条唯一值。")
+            progress.file_done(file_rows)
 
     if not unique_values:
         raise ValueError("去重后的内容为空，请检查文件和列名。")
@@ -43,63 +66,287 @@ def get_unique_values(file_a_path, is_dir_mode, header_row, col_a):
     return unique_values
 
 
-def fuzzy_match_and_fill(source_values, mapping_file_path, old_separator=None, new_separator=None):
+def _unique_values_task(task):
+    """
+    分块读取单个文件的指定列并去重（可在工作进程中执行）。
+    :return: (文件路径, 唯一值集合或 None（找不到列时）, 错误信息, 读取的记录数, 阶段计时记录)
+    """
+    with collect() as records, current_file(os.path.basename(task[0])):
+        result = _unique_values_of_file(*task)
+    return result + (records,)
+
+
+def _unique_values_of_file(full_path_a, header_row, col_a, chunk_size):
+    """返回 (文件路径, 唯一值集合或 None（找不到列时）, 错误信息, 读取的记录数)。"""
+    file_values = set()
+    file_rows = 0
+    try:
+        # 只读取需要去重的列
+        for chunk in read_file_chunks(full_path_a, header_row=header_row, chunksize=chunk_size, usecols=[col_a]):
+            if col_a not in chunk.columns:
+                return full_path_a, None, None, 0
+            file_rows += len(chunk)
+
+            # 使用 .astype(str) 防止数据类型问题
+            with stage('normalize', rows_in=len(chunk)) as record:
+                chunk_values = chunk[col_a].dropna().astype(str).unique()
+                record.rows_out = len(chunk_values)
+            file_values.update(chunk_values)
+        return full_path_a, file_values, None, file_rows
+    except Exception as e:
+        return full_path_a, None, str(e), file_rows
+
+
+# 匹配缓存保留的缓存值数量上限
+DEFAULT_MATCH_CACHE_MAX_ENTRIES = 1000000
+
+
+class MatchCache:
+    """
+    去重匹配结果缓存，用于修改文件B后重新匹配同一批唯一值。
+    以规范化后的值（去空格、转小写）为键保存其命中的映射键；映射内容或分隔符设置变化时，
+    只使受新增、删除或变更的键影响的值（即以这些键为前缀的值）失效并重新匹配，其余结果直接复用；
+    文件B未修改时只按签名判断，不再逐个比较映射键。未命中缓存的值通过查找其各个前缀匹配，不构建整棵前缀树。
+    指定 cache_path 时缓存会保存到磁盘，程序重启后仍可使用；只在缓存内容变化时写盘。
+    缓存值超过 max_entries 个时，删除本次匹配没有用到的值（如之前其他源文件的值），避免缓存无限增长。
+    """
+
+    def __init__(self, cache_path=None, max_entries=DEFAULT_MATCH_CACHE_MAX_ENTRIES):
+        self.cache_path = cache_path
+        self.max_entries = max_entries
+        self._dirty = False
+        self._signature = None
+        self._key_winners = {}
+        self._results = {}
+        self._sorted_values = []
+        self._sorted_dirty = False
+        if cache_path and os.path.exists(cache_path):
+            self._load()
+
+    def lookup(self, source_values, mapping_dict, signature):
+        """
+        返回每个源值命中的映射键（原始形式），未命中为 None。
+        :param source_values: 去重后的源值
+        :param mapping_dict: 映射字典（键已完成分隔符替换），只在签名变化时用于比较映射键
+        :param signature: 文件B与分隔符设置的签名（见 _mapping_signature）
+        :return: 源值 -> 映射键或 None
+        """
+        if signature != self._signature:
+            key_winners = _key_winners(mapping_dict)
+            if self._signature is not None:
+                changed_keys = {key for key in key_winners.keys() | self._key_winners.keys()
+                                if key_winners.get(key) != self._key_winners.get(key)}
+                invalidated = self._invalidate(changed_keys)
+                logging.info(f"映射关系发生变化：变更的键 {len(changed_keys)} 个，需重新匹配的缓存值 {invalidated} 个。")
+            self._signature = signature
+            self._key_winners = key_winners
+            self._dirty = True
+
+        normalized = {value: str(value).strip().lower() for value in source_values}
+        missing = {value_str for value_str in normalized.values() if value_str not in self._results}
+        if missing:
+            # 只对未命中缓存的值逐个查找其前缀，不必为全部映射键构建前缀树
+            key_winners = self._key_winners
+            for value_str in missing:
+                self._results[value_str] = _longest_prefix_key(value_str, key_winners)
+            self._sorted_dirty = True
+            self._dirty = True
+        logging.info(f"匹配缓存：复用 {len(normalized) - len(missing)} 个结果，重新匹配 {len(missing)} 个值。")
+
+        if len(self._results) > self.max_entries:
+            self._prune(set(normalized.values()))
+        if self._dirty:
+            self._save()
+        return {value: self._results[value_str] for value, value_str in normalized.items()}
+
+    def _invalidate(self, changed_keys):
+        """删除以变更键为前缀的缓存值，返回删除的数量。"""
+        if not changed_keys:
+            return 0
+        if self._sorted_dirty:
+            self._sorted_values = sorted(self._results)
+            self._sorted_dirty = False
+
+        # 已排序的值中，以某个键为前缀的值是连续的一段，用二分查找定位
+        invalidated = 0
+        for key in changed_keys:
+            index = bisect.bisect_left(self._sorted_values, key)
+            while index < len(self._sorted_values) and self._sorted_values[index].startswith(key):
+                if self._results.pop(self._sorted_values[index], _MISSING) is not _MISSING:
+                    invalidated += 1
+                index += 1
+        self._sorted_dirty = True
+        return invalidated
+
+    def _prune(self, keep):
+        """只保留 keep 中的缓存值。"""
+        pruned = len(self._results) - len(keep)
+        self._results = {value_str: self._results[value_str] for value_str in keep}
+        self._sorted_dirty = True
+        self._dirty = True
+        logging.info(f"匹配缓存超过 {self.max_entries} 个值，已删除本次未用到的 {pruned} 个缓存值。")
+
+    def _load(self):
+        try:
+            with open(self.cache_path, 'rb') as f:
+                state = pickle.load(f)
+            self._signature = state['signature']
+            self._key_winners = state['key_winners']
+            self._results = state['results']
+            self._sorted_dirty = True
+        except Exception as e:
+            logging.warning(f"读取匹配缓存失败，将重新匹配: {e}")
+
+    def _save(self):
+        if not self.cache_path:
+            return
+        state = {'signature': self._signature, 'key_winners': self._key_winners, 'results': self._results}
+        tmp_path = f"{self.cache_path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.cache_path)
+        self._dirty = False
+
+
+_MISSING = object()
+
+
+def _key_winners(mapping_dict):
+    """
+    返回 小写键 -> 实际生效的原始键。
+    与 LongestPrefixMatcher 的规则一致：同一小写键对应多个原始键时，原始键更长者优先，长度相同时先出现者优先。
+    """
+    winners = {}
+    priorities = {}
+    for rank, key in enumerate(mapping_dict.keys()):
+        if not isinstance(key, str) or not key:
+            continue
+        lowered = key.lower()
+        priority = (len(key), -rank)
+        if lowered not in priorities or priority > priorities[lowered]:
+            priorities[lowered] = priority
+            winners[lowered] = key
+    return winners
+
+
+def _longest_prefix_key(text, key_winners):
+    """
+    返回作为 text 前缀的最优映射键（原始形式），没有命中时返回 None。
+    依次查找 text 的各个前缀，与 LongestPrefixMatcher 一致，原始键更长者优先。
+    :param text: 已去除首尾空格并转为小写的值
+    :param key_winners: 小写键 -> 实际生效的原始键（见 _key_winners）
+    """
+    best = None
+    for end in range(len(text), 0, -1):
+        key = key_winners.get(text[:end])
+        if key is not None and (best is None or len(key) > len(best)):
+            best = key
+    return best
+
+
+def _mapping_signature(mapping_file_path, old_separator, new_separator):
+    """
+    返回文件B与分隔符设置的签名：文件路径、大小、修改时间及分隔符。
+    只读取文件元数据，文件B未修改时匹配缓存无需逐个比较映射键。
+    """
+    stat = os.stat(mapping_file_path)
+    return repr((os.path.abspath(mapping_file_path), stat.st_size, stat.st_mtime_ns, old_separator, new_separator))
+
+
+def fuzzy_match_and_fill(source_values, mapping_file_path, old_separator=None, new_separator=None,
+                         match_cache=None, progress=None):
     """
     根据映射文件对去重后的源值进行模糊匹配和填充。
     新增了分隔符替换功能。
     **已优化为右模糊匹配（前缀匹配）**
+    :param match_cache: 可选的 MatchCache，修改文件B后重新匹配时只重新计算受影响的值
+    :param progress: 可选的 ProgressTracker，按已匹配的值数上报进度，并在每批值之间响应取消
     """
+    with run("fuzzy_match"):
+        return _fuzzy_match_and_fill(source_values, mapping_file_path, old_separator, new_separator, match_cache,
+                                     progress or ProgressTracker())
+
+
+# 模糊匹配时每批匹配的值数量，每批之间上报进度并检查是否取消
+_MATCH_BATCH_SIZE = 10000
+
+# 模糊匹配逐值日志、无法匹配列表默认输出的条数
+LOG_SAMPLE_SIZE = 20
+
+
+def _fuzzy_match_and_fill(source_values, mapping_file_path, old_separator, new_separator, match_cache, progress):
     try:
-        df_b = read_file(mapping_file_path, header_row=None)
+        progress.start(0)
+        signature = _mapping_signature(mapping_file_path, old_separator, new_separator)
+        df_b = read_file(mapping_file_path, header_row=None, compact=False)
 
         if df_b.shape[1] < 2:
             raise ValueError("匹配关系文件（文件b）至少需要两列：第一列为资源组，第二列为匹配值。")
 
-        # 将第一列和第二列转换为字符串并去除首尾空格
-        df_b.iloc[:, 0] = df_b.iloc[:, 0].astype(str).str.strip()
-        df_b.iloc[:, 1] = df_b.iloc[:, 1].astype(str).str.strip()
+        with stage('normalize', file=os.path.basename(mapping_file_path), rows_in=len(df_b)) as record:
+            # 将第一列和第二列转换为字符串并去除首尾空格
+            df_b.iloc[:, 0] = df_b.iloc[:, 0].astype(str).str.strip()
+            df_b.iloc[:, 1] = df_b.iloc[:, 1].astype(str).str.strip()
 
-        # **新增逻辑：处理分隔符替换**
-        if old_separator and new_separator and old_separator != new_separator:
-            # 处理转义字符
-            if old_separator == '\\':
-                old_separator = r'\\'
-            logging.info(f"正在将文件B第一列中的分隔符 '{old_separator}' 替换为 '{new_separator}'")
-            df_b.iloc[:, 0] = df_b.iloc[:, 0].str.replace(old_separator, new_separator, regex=False)
+            # **新增逻辑：处理分隔符替换**
+            if old_separator and new_separator and old_separator != new_separator:
+                # 处理转义字符
+                if old_separator == '\\':
+                    old_separator = r'\\'
+                logging.info(f"正在将文件B第一列中的分隔符 '{old_separator}' 替换为 '{new_separator}'")
+                df_b.iloc[:, 0] = df_b.iloc[:, 0].str.replace(old_separator, new_separator, regex=False)
 
-        # 构建匹配字典
-        mapping_dict = dict(zip(df_b.iloc[:, 0], df_b.iloc[:, 1]))
+            # 构建匹配字典
+            mapping_dict = dict(zip(df_b.iloc[:, 0], df_b.iloc[:, 1]))
+            record.rows_out = len(mapping_dict)
 
-        # **优化点：对 mapping_dict 的键按长度进行降序排序**
-        sorted_keys = sorted(mapping_dict.keys(), key=len, reverse=True)
+        # **优化点：将 mapping_dict 的键一次性构建为最长前缀树，每个值只需沿树查找一次**
+        # **最长的前缀键优先，长度相同时先出现的键优先**
+        with stage('match', rows_in=len(source_values)) as record:
+            if match_cache is not None:
+                pattern_keys = match_cache.lookup(source_values, mapping_dict, signature)
+                progress.add_rows(len(source_values))
+            else:
+                matcher = LongestPrefixMatcher(mapping_dict.keys())
+                pattern_keys = {}
+                values = list(source_values)
+                for start in range(0, len(values), _MATCH_BATCH_SIZE):
+                    batch = values[start:start + _MATCH_BATCH_SIZE]
+                    # 将源值转换为字符串并转为小写
+                    pattern_keys.update((value, matcher.find(str(value).strip().lower())) for value in batch)
+                    progress.add_rows(len(batch))
+            record.rows_out = sum(pattern_key is not None for pattern_key in pattern_keys.values())
+        progress.finish()
 
         matched_results = {}
         unmatched = set()
         match_count = 0
 
         logging.info("开始进行右模糊匹配...")
+        # 逐值日志只输出前 LOG_SAMPLE_SIZE 条作为样例，其余仅在 DEBUG 级别输出
+        log_all = logging.getLogger().isEnabledFor(logging.DEBUG)
         for value in source_values:
             matched = False
-            # 将源值转换为字符串并转为小写
-            value_str = str(value).strip().lower()
-
-            # **核心优化：遍历排序后的键进行前缀匹配**
-            for pattern_key in sorted_keys:
-                if pd.isna(pattern_key) or not isinstance(pattern_key, str) or not pattern_key:
-                    continue
-
-                # 转换为小写进行匹配，并使用 re.match 确保是从开头进行匹配
-                # re.escape() 用于处理模式中的特殊字符
-                if re.match(re.escape(pattern_key.lower()), value_str):
-                    matched_results[value] = mapping_dict[pattern_key]
-                    matched = True
-                    match_count += 1
+            pattern_key = pattern_keys[value]
+            if pattern_key is not None:
+                matched_results[value] = mapping_dict[pattern_key]
+                matched = True
+                match_count += 1
+                if match_count <= LOG_SAMPLE_SIZE:
                     logging.info(f"成功匹配: '{value}' -> '{mapping_dict[pattern_key]}'")
-                    break  # 找到最长匹配后立即停止
+                elif log_all:
+                    logging.debug(f"成功匹配: '{value}' -> '{mapping_dict[pattern_key]}'")
 
             if not matched:
                 unmatched.add(value)
-                logging.info(f"未匹配: '{value}'")
+                if len(unmatched) <= LOG_SAMPLE_SIZE:
+                    logging.info(f"未匹配: '{value}'")
+                elif log_all:
+                    logging.debug(f"未匹配: '{value}'")
+
+        if not log_all and max(match_count, len(unmatched)) > LOG_SAMPLE_SIZE:
+            logging.info(f"逐条匹配日志仅显示前 {LOG_SAMPLE_SIZE} 条成功匹配和未匹配记录（DEBUG 级别输出全部），"
+                         f"完整结果请导出查看。")
 
         print("\n--- 匹配结果总结 ---")
         print(f"总计资源组数量: {len(source_values)}")
@@ -108,11 +355,15 @@ def fuzzy_match_and_fill(source_values, mapping_file_path, old_separator=None, n
 
         if unmatched:
             print("\n无法匹配的资源组:")
-            for item in unmatched:
+            for item in islice(unmatched, LOG_SAMPLE_SIZE):
                 print(f"- {item}")
+            if len(unmatched) > LOG_SAMPLE_SIZE:
+                print(f"- ……其余 {len(unmatched) - LOG_SAMPLE_SIZE} 条见导出的无匹配结果文件")
 
         return matched_results, unmatched
 
+    except OperationCancelled:
+        raise
     except Exception as e:
         logging.error(f"处理文件b失败: {e}")
         raise
@@ -124,7 +375,8 @@ def export_match_results(matched_results, unmatched_values, output_dir, output_f
     该函数作为中间层，实际导出逻辑已转移至 utils.py。
     """
     try:
-        utils_export_match_results(matched_results, unmatched_values, output_dir, output_format)
+        with run("match_export", report_dir=os.path.join(output_dir, "run_reports")):
+            utils_export_match_results(matched_results, unmatched_values, output_dir, output_format)
     except Exception as e:
         logging.error(f"导出匹配结果失败: {e}")
         raise
\ No newline at end of file
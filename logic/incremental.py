@@ -0,0 +1,200 @@
+import os
+import json
+import pickle
+import hashlib
+import logging
+from contextlib import contextmanager
+
+# 增量处理数据保存在输出目录的该子目录中（清空输出目录时只删除文件，子目录会保留）
+INCREMENTAL_DIR = '_incremental'
+
+_MANIFEST_NAME = 'manifest.json'
+_MANIFEST_VERSION = 1
+
+# 计算文件内容哈希时每次读取的字节数
+_HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def file_digest(file_path):
+    """返回文件内容的 SHA-1 哈希（十六进制）。"""
+    digest = hashlib.sha1()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(_HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def settings_digest(*values):
+    """将影响处理结果的参数（筛选条件、映射字典、列名等）转换为可比较的摘要。"""
+    payload = json.dumps(values, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+class IncrementalStore:
+    """
+    增量处理的文件清单及各文件的中间结果。
+    清单记录每个已处理源文件的路径、大小、修改时间、内容哈希和原记录数；中间结果为该文件处理后的
+    一个或多个 DataFrame，依次以 pickle 片段保存。再次处理同一目录时，大小和修改时间均未变化、
+    或内容哈希未变化的文件直接读取中间结果，其余文件重新处理；处理参数（settings）变化时全部重新处理。
+    """
+
+    def __init__(self, output_dir, name, settings, log=None):
+        """
+        :param output_dir: 输出目录，数据保存在其中的 _incremental/{name} 子目录
+        :param name: 流程名称，如 'filter'、'match_and_split'
+        :param settings: 影响中间结果的参数摘要（见 settings_digest）
+        """
+        self.directory = os.path.join(output_dir, INCREMENTAL_DIR, name)
+        self.settings = settings
+        self.log = log or logging.getLogger(__name__)
+        self._files = {}
+        self._signatures = {}
+        os.makedirs(self.directory, exist_ok=True)
+        self._load_manifest()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        # 取消或出错时同样保存清单，已完成的文件下次无需重新处理
+        self.save_manifest()
+
+    def pending(self, file_paths):
+        """
+        返回需要重新处理的文件（保持原顺序）；清单中不在 file_paths 内的文件及其中间结果被删除。
+        :param file_paths: 本次要处理的全部源文件
+        """
+        wanted = {_key(path) for path in file_paths}
+        for key in [key for key in self._files if key not in wanted]:
+            self._remove_entry(key)
+
+        pending = []
+        for path in file_paths:
+            key = _key(path)
+            entry = self._files.get(key)
+            stat = os.stat(path)
+            if entry is not None and os.path.exists(self._partial_path(key)):
+                if entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+                    continue
+                # 修改时间变化但内容相同（如重新复制）时同样沿用中间结果
+                if entry['size'] == stat.st_size and file_digest(path) == entry['sha1']:
+                    entry['mtime_ns'] = stat.st_mtime_ns
+                    continue
+            self._signatures[key] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha1': file_digest(path)}
+            pending.append(path)
+        return pending
+
+    def is_cached(self, file_path):
+        """文件是否有可用的中间结果（应在 pending() 之后调用）。"""
+        key = _key(file_path)
+        return key in self._files and key not in self._signatures
+
+    def rows(self, file_path):
+        """返回已保存的中间结果对应的原记录数。"""
+        return self._files[_key(file_path)]['rows']
+
+    def load(self, file_path):
+        """
+        依次返回文件的中间结果片段。
+        :return: DataFrame 迭代器；该文件上次被跳过（如缺少所需的列）时不返回任何片段
+        """
+        with open(self._partial_path(_key(file_path)), 'rb') as f:
+            while True:
+                try:
+                    yield pickle.load(f)
+                except EOFError:
+                    return
+
+    def is_skipped(self, file_path):
+        """文件上次处理时是否被跳过（如缺少所需的列）。"""
+        return self._files[_key(file_path)]['skipped']
+
+    @contextmanager
+    def partial(self, file_path):
+        """
+        写入单个文件的中间结果：with 块内调用 write(df) 追加片段，add_rows(n) 累计原记录数，skip() 标记该文件被跳过；
+        块内出现异常（包括取消）时丢弃已写入的内容，文件保持待处理状态。
+        """
+        key = _key(file_path)
+        path = self._partial_path(key)
+        tmp_path = f"{path}.tmp"
+        writer = _PartialWriter(open(tmp_path, 'wb'))
+        try:
+            yield writer
+        except BaseException:
+            writer.handle.close()
+            os.remove(tmp_path)
+            raise
+        writer.handle.close()
+        os.replace(tmp_path, path)
+        self._files[key] = dict(self._signatures.pop(key), path=os.path.abspath(file_path), rows=writer.row_count,
+                                skipped=writer.skipped)
+
+    def save(self, file_path, df, rows):
+        """保存单个文件的完整中间结果，df 为 None 表示该文件被跳过。"""
+        with self.partial(file_path) as partial:
+            partial.add_rows(rows)
+            if df is None:
+                partial.skip()
+            else:
+                partial.write(df)
+
+    def save_manifest(self):
+        """写出文件清单（先写临时文件再替换，中断时不会留下不完整的清单）。"""
+        manifest = {'version': _MANIFEST_VERSION, 'settings': self.settings, 'files': self._files}
+        path = os.path.join(self.directory, _MANIFEST_NAME)
+        with open(f"{path}.tmp", 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=1)
+        os.replace(f"{path}.tmp", path)
+
+    def _load_manifest(self):
+        path = os.path.join(self.directory, _MANIFEST_NAME)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            self.log.warning(f"增量处理清单无法读取，将重新处理全部文件: {e}")
+            manifest = {}
+
+        if manifest.get('version') == _MANIFEST_VERSION and manifest.get('settings') == self.settings:
+            self._files = manifest['files']
+            return
+        if manifest:
+            self.log.info("处理参数与上次不同，将重新处理全部文件。")
+        for name in os.listdir(self.directory):
+            if name.endswith('.pkl'):
+                os.remove(os.path.join(self.directory, name))
+
+    def _remove_entry(self, key):
+        self._files.pop(key)
+        partial_path = self._partial_path(key)
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+
+    def _partial_path(self, key):
+        return os.path.join(self.directory, key + '.pkl')
+
+
+class _PartialWriter:
+    """IncrementalStore.partial() 返回的写入对象。"""
+
+    def __init__(self, handle):
+        self.handle = handle
+        self.row_count = 0
+        self.skipped = False
+
+    def write(self, df):
+        pickle.dump(df, self.handle, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def add_rows(self, rows):
+        self.row_count += rows
+
+    def skip(self):
+        self.skipped = True
+
+
+def _key(file_path):
+    """清单中文件的键：绝对路径的哈希，同时用作中间结果的文件名。"""
+    return hashlib.sha1(os.path.abspath(file_path).encode('utf-8')).hexdigest()[:20]
@@ -0,0 +1,373 @@
+import os
+import sys
+import json
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+# 运行报告（JSON）的默认保存目录，未在 run() 中指定目录时使用；子进程会自动继承
+REPORT_DIR_ENV = 'DATA_CONVERT_REPORT_DIR'
+
+# 标准阶段名称，报告中按此顺序汇总
+STAGES = ['encoding_detect', 'parse', 'normalize', 'match', 'concat', 'export']
+
+# 阶段运行期间采样当前常驻内存的间隔（秒），用于得到各阶段的峰值内存
+RSS_SAMPLE_INTERVAL = 0.05
+
+# 每个线程独立的当前运行报告和当前文件（界面中不同页面可能在不同线程中同时运行）
+_local = threading.local()
+
+try:
+    # 用于读取当前常驻内存（Windows 上没有 resource 模块，也依赖它读取峰值内存）
+    import psutil
+    _process = psutil.Process()
+except ImportError:
+    _process = None
+
+
+def peak_rss_mb():
+    """返回当前进程整个生命周期内的峰值常驻内存（MB），无法获取时返回 None。"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux 单位为 KB，macOS 为字节
+        return peak / 1024 ** 2 if sys.platform == 'darwin' else peak / 1024
+    except ImportError:
+        pass
+    if _process is None:
+        return None
+    memory = _process.memory_info()
+    return getattr(memory, 'peak_wset', memory.rss) / 1024 ** 2
+
+
+def current_rss_mb():
+    """返回当前进程此刻的常驻内存（MB），未安装 psutil 时返回 None。"""
+    if _process is None:
+        return None
+    return _process.memory_info().rss / 1024 ** 2
+
+
+def _rss_delta(start_rss):
+    """返回自 start_rss 以来常驻内存的变化量（MB），无法获取时返回 None。"""
+    if start_rss is None:
+        return None
+    return current_rss_mb() - start_rss
+
+
+class _RssSampler:
+    """
+    阶段峰值内存采样器：进程内共用一个后台线程，有阶段正在运行时每隔 interval 秒读取一次当前常驻内存，
+    更新所有正在运行的阶段的峰值；没有运行中的阶段时线程等待，不采样。
+    阶段开始和结束时各额外读取一次，短于采样间隔的阶段也有峰值（取两端的较大值）。
+    """
+
+    def __init__(self, interval=RSS_SAMPLE_INTERVAL):
+        self.interval = interval
+        self._reset()
+
+    def _reset(self):
+        self._watches = {}
+        self._lock = threading.Lock()
+        self._active = threading.Event()
+        self._thread = None
+
+    def begin(self):
+        """开始跟踪一个阶段，返回保存该阶段峰值（MB）的单元素列表；未安装 psutil 时返回 None。"""
+        rss = current_rss_mb()
+        if rss is None:
+            return None
+        watch = [rss]
+        with self._lock:
+            self._watches[id(watch)] = watch
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='rss-sampler', daemon=True)
+                self._thread.start()
+            self._active.set()
+        return watch
+
+    def end(self, watch):
+        """结束跟踪，返回该阶段运行期间的峰值常驻内存（MB）。"""
+        if watch is None:
+            return None
+        rss = current_rss_mb()
+        with self._lock:
+            self._watches.pop(id(watch), None)
+            if not self._watches:
+                self._active.clear()
+        return max(watch[0], rss)
+
+    def _run(self):
+        while True:
+            self._active.wait()
+            rss = current_rss_mb()
+            with self._lock:
+                for watch in self._watches.values():
+                    if rss > watch[0]:
+                        watch[0] = rss
+            time.sleep(self.interval)
+
+
+_sampler = _RssSampler()
+
+
+def _reset_after_fork():
+    """fork 出的子进程（进程池工作进程）没有父进程的采样线程，且 psutil 需重新绑定到子进程。"""
+    global _process
+    if _process is not None:
+        _process = psutil.Process()
+    _sampler._reset()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+class StageRecord:
+    """
+    单次阶段计时的记录，调用方可在阶段内设置 rows_in / rows_out。
+    peak_rss_mb 为阶段运行期间采样到的最高常驻内存（MB），包括阶段内分配后又释放的中间数据；
+    rss_delta_mb 为阶段结束时与开始时当前常驻内存之差（MB），反映该阶段留下（负数为释放）的内存。
+    """
+
+    def __init__(self, stage, file=None, rows_in=None, rows_out=None):
+        self.stage = stage
+        self.file = file
+        self.rows_in = rows_in
+        self.rows_out = rows_out
+        self.seconds = 0.0
+        self.peak_rss_mb = None
+        self.rss_delta_mb = None
+
+    def to_dict(self):
+        return {'stage': self.stage, 'file': self.file, 'seconds': self.seconds, 'rows_in': self.rows_in,
+                'rows_out': self.rows_out, 'peak_rss_mb': self.peak_rss_mb, 'rss_delta_mb': self.rss_delta_mb,
+                'pid': os.getpid()}
+
+
+class RunReport:
+    """
+    一次处理过程的运行报告：按 (阶段, 文件) 累计用时、输入/输出行数、调用次数、常驻内存变化量并取峰值内存，
+    以及整个过程结束时的进程峰值内存（process_peak_rss_mb，为进程生命周期内的峰值，不区分阶段）。
+    同一文件的同一阶段被分块多次调用时合并为一条，报告大小与数据块数量无关。
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.started_at = datetime.now().isoformat(timespec='seconds')
+        self.seconds = None
+        self.process_peak_rss_mb = None
+        self._start = time.perf_counter()
+        self._entries = {}
+
+    def add(self, record):
+        """累加一条阶段记录（StageRecord 或其 to_dict() 结果，后者用于合并工作进程的记录）。"""
+        if isinstance(record, StageRecord):
+            record = record.to_dict()
+        key = (record['stage'], record['file'])
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = {'stage': record['stage'], 'file': record['file'], 'calls': 0,
+                                          'seconds': 0.0, 'rows_in': None, 'rows_out': None,
+                                          'peak_rss_mb': None, 'rss_delta_mb': None, 'pids': []}
+        entry['calls'] += record.get('calls', 1)
+        entry['seconds'] += record['seconds']
+        for field in ('rows_in', 'rows_out', 'rss_delta_mb'):
+            if record.get(field) is not None:
+                entry[field] = (entry[field] or 0) + record[field]
+        if record.get('peak_rss_mb') is not None:
+            entry['peak_rss_mb'] = max(entry['peak_rss_mb'] or 0, record['peak_rss_mb'])
+        pids = record.get('pids') or ([record['pid']] if record.get('pid') is not None else [])
+        for pid in pids:
+            if pid not in entry['pids']:
+                entry['pids'].append(pid)
+
+    def finish(self):
+        self.seconds = time.perf_counter() - self._start
+        self.process_peak_rss_mb = peak_rss_mb()
+
+    def stage_totals(self):
+        """按阶段汇总：阶段 -> {seconds, rows_in, rows_out, calls, peak_rss_mb, rss_delta_mb}。"""
+        totals = {}
+        for entry in self._entries.values():
+            total = totals.setdefault(entry['stage'], {'seconds': 0.0, 'rows_in': 0, 'rows_out': 0, 'calls': 0,
+                                                       'peak_rss_mb': None, 'rss_delta_mb': None})
+            total['seconds'] += entry['seconds']
+            total['rows_in'] += entry['rows_in'] or 0
+            total['rows_out'] += entry['rows_out'] or 0
+            total['calls'] += entry['calls']
+            if entry['peak_rss_mb'] is not None:
+                total['peak_rss_mb'] = max(total['peak_rss_mb'] or 0, entry['peak_rss_mb'])
+            if entry['rss_delta_mb'] is not None:
+                total['rss_delta_mb'] = (total['rss_delta_mb'] or 0) + entry['rss_delta_mb']
+        order = {stage: i for i, stage in enumerate(STAGES)}
+        return dict(sorted(totals.items(), key=lambda item: order.get(item[0], len(STAGES))))
+
+    def file_totals(self):
+        """按文件汇总各阶段用时：文件 -> {阶段: 秒数, 'total': 秒数}，按总用时从大到小排序。"""
+        totals = {}
+        for entry in self._entries.values():
+            if entry['file'] is None:
+                continue
+            total = totals.setdefault(entry['file'], {'total': 0.0})
+            total[entry['stage']] = total.get(entry['stage'], 0.0) + entry['seconds']
+            total['total'] += entry['seconds']
+        return dict(sorted(totals.items(), key=lambda item: item[1]['total'], reverse=True))
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'started_at': self.started_at,
+            'seconds': self.seconds,
+            'process_peak_rss_mb': self.process_peak_rss_mb,
+            'stages': self.stage_totals(),
+            'files': self.file_totals(),
+            'entries': list(self._entries.values()),
+        }
+
+    def write_json(self, report_dir):
+        """将报告写入 report_dir，返回文件路径。"""
+        os.makedirs(report_dir, exist_ok=True)
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        path = os.path.join(report_dir, f"run_report_{self.name}_{timestamp}.json")
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        return path
+
+    def summary_lines(self, top_files=5):
+        """生成便于阅读的总结文本行。"""
+        peak = 'N/A' if self.process_peak_rss_mb is None else f"{self.process_peak_rss_mb:.0f} MB"
+        lines = [f"--- 运行报告：{self.name} ---", f"总用时: {self.seconds:.2f} 秒，进程峰值内存: {peak}"]
+        for stage, total in self.stage_totals().items():
+            share = total['seconds'] / self.seconds if self.seconds else 0
+            memory = '' if total['peak_rss_mb'] is None else f"，峰值内存 {total['peak_rss_mb']:.0f} MB"
+            if total['rss_delta_mb'] is not None:
+                memory += f"，内存变化 {total['rss_delta_mb']:+.0f} MB"
+            lines.append(f"  阶段 {stage:<16}用时 {total['seconds']:>8.2f} 秒（{share:>4.0%}），"
+                         f"输入 {total['rows_in']} 行，输出 {total['rows_out']} 行，调用 {total['calls']} 次{memory}")
+        files = list(self.file_totals().items())[:top_files]
+        if files:
+            lines.append(f"用时最多的 {len(files)} 个文件:")
+            for file, total in files:
+                detail = '，'.join(f"{stage} {seconds:.2f}" for stage, seconds in total.items() if stage != 'total')
+                lines.append(f"  {file}: {total['total']:.2f} 秒（{detail}）")
+        return lines
+
+
+def current_report():
+    """返回当前线程正在记录的运行报告，没有时返回 None。"""
+    return getattr(_local, 'report', None)
+
+
+@contextmanager
+def run(name, report_dir=None, log=None):
+    """
+    开始一次处理过程的计时，结束时通过 logging 输出总结并写出 JSON 报告。
+    JSON 报告写入 report_dir，未指定时写入环境变量 DATA_CONVERT_REPORT_DIR 指定的目录，都没有时只输出日志总结。
+    已有运行中的报告时（例如外层流程调用内层流程），直接沿用外层报告。
+    """
+    if current_report() is not None:
+        yield current_report()
+        return
+
+    report = RunReport(name)
+    _local.report = report
+    try:
+        yield report
+    finally:
+        _local.report = None
+        report.finish()
+        log = log or logging.getLogger(__name__)
+        log.info("\n" + "\n".join(report.summary_lines()))
+        report_dir = report_dir or os.environ.get(REPORT_DIR_ENV)
+        if report_dir:
+            try:
+                log.info(f"运行报告已写入: {report.write_json(report_dir)}")
+            except OSError as e:
+                log.warning(f"写入运行报告失败: {e}")
+
+
+@contextmanager
+def collect():
+    """
+    在工作进程中收集一个任务的阶段记录，返回的列表在任务结束后包含按 (阶段, 文件) 累计的记录，
+    由主进程通过 merge_records() 合并到当前报告。单进程顺序执行时同样可用（记录先收集再合并）。
+    """
+    records = []
+    previous = current_report()
+    report = RunReport('worker')
+    _local.report = report
+    try:
+        yield records
+    finally:
+        _local.report = previous
+        records.extend(report._entries.values())
+
+
+def merge_records(records):
+    """将工作进程返回的记录合并到当前报告。"""
+    report = current_report()
+    if report is not None:
+        for record in records or ():
+            report.add(record)
+
+
+@contextmanager
+def current_file(file_name):
+    """设置当前处理的文件，期间未显式指定文件的阶段记录都归属于该文件。"""
+    previous = getattr(_local, 'file', None)
+    _local.file = file_name
+    try:
+        yield
+    finally:
+        _local.file = previous
+
+
+@contextmanager
+def stage(name, file=None, rows_in=None, rows_out=None):
+    """
+    记录一个阶段的用时、峰值内存和常驻内存变化量，没有运行中的报告时开销仅为一次属性查找。
+    用法：
+        with stage('parse', rows_in=n) as record:
+            df = ...
+            record.rows_out = len(df)
+    """
+    report = current_report()
+    record = StageRecord(name, file or getattr(_local, 'file', None), rows_in, rows_out)
+    if report is None:
+        yield record
+        return
+    watch = _sampler.begin()
+    start_rss = watch[0] if watch is not None else None
+    start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record.seconds = time.perf_counter() - start
+        record.peak_rss_mb = _sampler.end(watch)
+        record.rss_delta_mb = _rss_delta(start_rss)
+        report.add(record)
+
+
+def timed_chunks(chunks, name='parse', file=None):
+    """包装数据块迭代器，把每次取下一块的用时、行数、峰值内存和常驻内存变化量计入指定阶段。"""
+    iterator = iter(chunks)
+    while True:
+        report = current_report()
+        watch = _sampler.begin() if report is not None else None
+        start_rss = watch[0] if watch is not None else None
+        start = time.perf_counter()
+        try:
+            chunk = next(iterator, None)
+        finally:
+            peak = _sampler.end(watch)
+        if chunk is None:
+            return
+        if report is not None:
+            record = StageRecord(name, file or getattr(_local, 'file', None), rows_out=len(chunk))
+            record.seconds = time.perf_counter() - start
+            record.peak_rss_mb = peak
+            record.rss_delta_mb = _rss_delta(start_rss)
+            report.add(record)
+        yield chunk
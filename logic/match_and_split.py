@@ -1,13 +1,18 @@
+import numpy as np
 import pandas as pd
 import os
 import re
-from collections import defaultdict
 import logging
 import time
-from logic.utils import read_file, get_file_list, get_excel_row_limit, \
-    export_single_file, export_split_files, export_unmatched_file
-
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+from contextlib import nullcontext
+from logic.utils import read_file, read_file_chunks, read_columns, get_file_list, \
+    export_single_file, export_split_files, export_unmatched_file, concat_frames, compact_dtypes_enabled, \
+    frame_memory_mb, DEFAULT_CHUNK_SIZE
+from logic.writers import GroupedPagedWriter
+from logic.parallel import map_files, replay_messages, resolve_worker_count
+from logic.instrumentation import run, stage, collect, current_file, merge_records
+from logic.progress import ProgressTracker, OperationCancelled
+from logic.incremental import IncrementalStore, settings_digest
 
 
 class MatchAndSplitProcessor:
@@ -29,9 +34,8 @@ class MatchAndSplitProcessor:
             raise ValueError("没有找到需要处理的文件！")
 
         try:
-            # 使用统一的 read_file 函数
-            df = read_file(self.all_file_paths[0], header_row=header_row - 1)
-            self.column_headers = list(df.columns)
+            # 只读取标题行，不加载整个文件
+            self.column_headers = read_columns(self.all_file_paths[0], header_row=header_row - 1)
             logging.info(f"成功读取 {os.path.basename(self.all_file_paths[0])} 的列标题。")
             return self.column_headers
         except Exception as e:
@@ -40,18 +44,21 @@ class MatchAndSplitProcessor:
     def load_mapping_file(self, mapping_file_path):
         """加载文件B，并构建精确匹配的映射字典。"""
         try:
-            # 使用统一的 read_file 函数
-            df_b = read_file(mapping_file_path, header_row=None)
+            # 使用统一的 read_file 函数；映射文件读取后立即转换为字典，不需要紧凑类型
+            df_b = read_file(mapping_file_path, header_row=None, compact=False)
             if df_b.shape[1] < 2:
                 raise ValueError("匹配关系文件（文件B）至少需要两列。")
 
             self.mapping_dict.clear()
 
-            self.mapping_dict = {
-                str(row.iloc[0]).strip().lower(): str(row.iloc[1]).strip()
-                for _, row in df_b.iterrows()
-                if not pd.isna(row.iloc[0]) and not pd.isna(row.iloc[1])
-            }
+            # 按列向量化处理：去掉任一列为空的行，键去空格并转小写，值去空格；重复键以最后一次出现为准
+            keys = df_b.iloc[:, 0]
+            values = df_b.iloc[:, 1]
+            valid = keys.notna() & values.notna()
+            self.mapping_dict = dict(zip(
+                keys[valid].astype(str).str.strip().str.lower(),
+                values[valid].astype(str).str.strip()
+            ))
 
             if not self.mapping_dict:
                 raise ValueError("映射字典文件内容为空或格式不正确。")
@@ -59,9 +66,18 @@ class MatchAndSplitProcessor:
         except Exception as e:
             raise Exception(f"加载映射文件失败: {e}")
 
-    def process_and_export(self, col_a, output_mode, split_row_count, output_format):
+    def process_and_export(self, col_a, output_mode, split_row_count, output_format, workers=1,
+                           export_workers=None, streaming=False, chunk_size=DEFAULT_CHUNK_SIZE, progress=None,
+                           incremental=False):
         """
         主处理函数，遍历所有文件，进行匹配、处理并分流输出。
+        :param workers: 并行进程数，大于1时按文件并行处理，映射字典只在每个工作进程启动时传递一次
+        :param export_workers: 分割模式下并行导出的进程数上限，默认与 workers 相同
+        :param streaming: 流式处理，分块读取并将各分组的记录直接推送给分组写出器，不在内存中合并全部数据
+        :param chunk_size: 流式处理时分块读取的行数
+        :param progress: 可选的 ProgressTracker，用于上报进度，并在文件之间、数据块之间响应取消
+        :param incremental: 增量处理，各文件新增“所属”列后的数据保存在输出目录的 _incremental 子目录中，
+                            再次处理时只读取新增或变化的文件，输出由保存的数据和新处理的数据重新合并生成
         """
         if not self.all_file_paths:
             raise ValueError("请先加载源文件。")
@@ -70,35 +86,52 @@ class MatchAndSplitProcessor:
         if col_a not in self.column_headers:
             raise ValueError(f"选择的列 '{col_a}' 在文件中不存在。")
 
-        # 1. 统一处理所有源文件
-        all_processed_data = pd.DataFrame()
-        for file_path in self.all_file_paths:
-            start_time = time.time()
-            try:
-                logging.info(f"开始处理文件: {os.path.basename(file_path)}")
-                # 使用统一的 read_file 函数
-                df = read_file(file_path, header_row=0)
-
-                if col_a not in df.columns:
-                    logging.warning(f"文件 {os.path.basename(file_path)} 中不存在列 '{col_a}'，跳过该文件。")
-                    continue
-
-                original_rows = len(df)
+        # 记录各阶段、各文件的用时和内存，结束时输出总结并在输出目录的 run_reports 子目录中写入运行报告
+        with run("match_and_split", report_dir=os.path.join(self.output_dir, "run_reports")):
+            store = IncrementalStore(self.output_dir, "match_and_split", settings_digest(
+                col_a, sorted(self.mapping_dict.items()), bool(streaming))) if incremental else None
+            if store is not None:
+                self._remove_previous_outputs()
+            with store or nullcontext():
+                self._process_and_export(col_a, output_mode, split_row_count, output_format, workers,
+                                         export_workers, streaming, chunk_size, progress or ProgressTracker(), store)
 
-                # 新增一列，名为“所属”，并进行映射
-                df['所属'] = df[col_a].apply(self._find_match_for_row)
+    def _process_and_export(self, col_a, output_mode, split_row_count, output_format, workers, export_workers,
+                            streaming, chunk_size, progress, store=None):
+        if streaming:
+            self._process_and_export_streaming(col_a, output_mode, split_row_count, output_format, workers,
+                                               workers if export_workers is None else export_workers,
+                                               chunk_size or DEFAULT_CHUNK_SIZE, progress, store)
+            return
 
-                all_processed_data = pd.concat([all_processed_data, df], ignore_index=True)
+        progress.start(len(self.all_file_paths))
 
-                elapsed_time = time.time() - start_time
-                logging.info(
-                    f"文件 {os.path.basename(file_path)} 处理完成。原行数: {original_rows}, 用时: {elapsed_time:.2f} 秒。")
-
-                del df
+        # 1. 统一处理所有源文件（可选多进程并行），结果按文件顺序合并；增量处理时只处理新增或变化的文件
+        processed_parts = []
+        pending_files = self._pending_files(self.all_file_paths, store)
+        results = map_files(_process_file_task, pending_files, workers,
+                            initializer=_init_match_worker, initargs=(self.mapping_dict, col_a))
+        if store is not None:
+            results = _merge_cached_results(self.all_file_paths, results, store)
+        try:
+            for df, messages, records in results:
+                replay_messages(messages, logging.getLogger())
+                merge_records(records)
+                if df is not None:
+                    processed_parts.append(df)
+                progress.file_done(0 if df is None else len(df))
+        except OperationCancelled:
+            raise
+        except Exception as e:
+            logging.error(str(e))
+            raise
 
-            except Exception as e:
-                logging.error(f"处理文件 {os.path.basename(file_path)} 失败: {e}")
-                raise
+        with stage('concat') as record:
+            all_processed_data = concat_frames(processed_parts)
+            record.rows_out = len(all_processed_data)
+        del processed_parts
+        if compact_dtypes_enabled():
+            logging.info(f"紧凑内存模式: 合并后的数据内存占用 {frame_memory_mb(all_processed_data):.1f} MB")
 
         if all_processed_data.empty:
             logging.warning("所有文件处理后均无数据，无法进行导出。")
@@ -119,7 +152,8 @@ class MatchAndSplitProcessor:
             if output_mode == 'single_file':
                 self._export_single_file(matched_data, output_format)
             else:
-                self._export_split_files(matched_data, split_row_count, output_format)
+                self._export_split_files(matched_data, split_row_count, output_format,
+                                         workers if export_workers is None else export_workers)
         else:
             logging.info("没有找到任何匹配数据，跳过匹配文件导出。")
 
@@ -129,24 +163,266 @@ class MatchAndSplitProcessor:
         else:
             logging.info("没有无匹配数据，无需导出无匹配文件。")
 
-    def _find_match_for_row(self, value):
-        """为单个值查找精确匹配项，并返回映射值或“无匹配”。"""
-        if pd.isna(value) or not str(value).strip():
-            return "无匹配"
+    def _remove_previous_outputs(self):
+        """
+        删除输出目录中上次导出的匹配分割文件（增量处理时输出全部重新生成，
+        避免分组或页数减少后留下过期的分页文件），其他文件和子目录保留。
+        """
+        pattern = re.compile(r'^(.+_)?match_and_split(_\d+)?\.(csv|xlsx)$')
+        for file_name in os.listdir(self.output_dir):
+            file_path = os.path.join(self.output_dir, file_name)
+            if pattern.match(file_name) and os.path.isfile(file_path):
+                os.remove(file_path)
+
+    def _pending_files(self, file_paths, store):
+        """返回需要处理的文件：未启用增量处理时为全部文件，否则为新增或有变化的文件。"""
+        if store is None:
+            return file_paths
+        pending_files = store.pending(file_paths)
+        logging.info(f"增量处理：{len(pending_files)} 个文件新增或有变化，"
+                     f"{len(file_paths) - len(pending_files)} 个文件使用上次的处理结果。")
+        return pending_files
 
-        return self.mapping_dict.get(str(value).strip().lower(), "无匹配")
+    def _process_and_export_streaming(self, col_a, output_mode, split_row_count, output_format, workers,
+                                      export_workers, chunk_size, progress, store=None):
+        """
+        流式处理并分流输出：每个数据块按“所属”拆分后推送给分组写出器（无匹配记录推送给单独的写出器），
+        分割模式下各匹配分组按 split_row_count 分页输出、无匹配记录不分页，内存占用取决于数据块大小而不是数据总量。
+        """
+        # 先只读取各文件的标题行，得到合并后的列顺序，保证各分页文件的列与一次性合并导出时一致
+        columns, file_paths = self._streaming_columns(col_a)
+        page_size = split_row_count if output_mode == 'split_output' else None
+        total_rows = 0
+        unmatched_rows = 0
+        progress.start(len(file_paths))
+
+        # 无匹配记录与一次性导出一致，不分页，始终输出为一个文件
+        with GroupedPagedWriter(self.output_dir, page_size, output_format,
+                                export_workers=resolve_worker_count(export_workers)) as writer, \
+                GroupedPagedWriter(self.output_dir, None, output_format) as unmatched_writer:
+            for df in self._iter_processed_chunks(file_paths, col_a, workers, chunk_size, progress, store):
+                if list(df.columns) != columns:
+                    df = df.reindex(columns=columns)
+                unmatched_mask = df['所属'] == '无匹配'
+                matched_df = df[~unmatched_mask]
+                total_rows += len(df)
+                unmatched_rows += len(df) - len(matched_df)
+
+                if output_mode == 'single_file':
+                    writer.write("match_and_split", matched_df)
+                else:
+                    for group_name, group_df in matched_df.groupby('所属', sort=False, observed=True):
+                        writer.write(f"{group_name}_match_and_split", group_df)
+                unmatched_writer.write("无匹配_match_and_split", df[unmatched_mask])
+                progress.add_rows(len(df))
+
+            if total_rows == 0:
+                logging.warning("所有文件处理后均无数据，无法进行导出。")
+                return
+
+            logging.info(
+                f"所有文件处理完毕。总记录数: {total_rows}, 匹配记录数: {total_rows - unmatched_rows}, 无匹配记录数: {unmatched_rows}。")
+            if unmatched_rows:
+                logging.warning(f"警告: 存在 {unmatched_rows} 条记录未能找到匹配项，已单独导出到无匹配文件。")
+            else:
+                logging.info("没有无匹配数据，无需导出无匹配文件。")
+            if total_rows == unmatched_rows:
+                logging.info("没有找到任何匹配数据，跳过匹配文件导出。")
+
+    def _streaming_columns(self, col_a):
+        """
+        读取各文件的标题行，返回 (合并后的输出列, 包含匹配列的文件列表)。
+        列顺序与按文件顺序 concat 各文件（末尾追加“所属”列）的结果一致。
+        """
+        columns = []
+        file_paths = []
+        for file_path in self.all_file_paths:
+            try:
+                file_columns = read_columns(file_path, header_row=0)
+            except Exception as e:
+                raise RuntimeError(f"处理文件 {os.path.basename(file_path)} 失败: {e}") from e
+            if col_a not in file_columns:
+                logging.warning(f"文件 {os.path.basename(file_path)} 中不存在列 '{col_a}'，跳过该文件。")
+                continue
+            file_paths.append(file_path)
+            for col in list(file_columns) + ['所属']:
+                if col not in columns:
+                    columns.append(col)
+        return columns, file_paths
+
+    def _iter_processed_chunks(self, file_paths, col_a, workers, chunk_size, progress, store=None):
+        """
+        依次返回已新增“所属”列的数据块，每个文件处理完后调用 progress.file_done()（记录数由调用方累计）。
+        单进程时逐文件分块读取；多进程时各工作进程处理整个文件，结果按文件顺序返回。
+        store 不为空时，未变化的文件直接返回保存的数据块，其余文件的数据块边返回边保存。
+        """
+        pending_files = self._pending_files(file_paths, store)
+        if resolve_worker_count(workers) <= 1:
+            belonging_dtype = _belonging_dtype(self.mapping_dict)
+            for file_path in file_paths:
+                file_name = os.path.basename(file_path)
+                if store is not None and store.is_cached(file_path):
+                    logging.info(f"文件 {file_name} 未变化，使用上次的处理结果。原行数: {store.rows(file_path)}")
+                    yield from store.load(file_path)
+                    progress.file_done()
+                    continue
+                logging.info(f"开始处理文件: {file_name}")
+                start_time = time.time()
+                original_rows = 0
+                try:
+                    with store.partial(file_path) if store is not None else nullcontext() as partial, \
+                            current_file(file_name):
+                        for chunk in read_file_chunks(file_path, header_row=0, chunksize=chunk_size):
+                            original_rows += len(chunk)
+                            chunk['所属'] = _map_belonging(chunk[col_a], self.mapping_dict, belonging_dtype)
+                            if partial is not None:
+                                partial.write(chunk)
+                                partial.add_rows(len(chunk))
+                            yield chunk
+                except Exception as e:
+                    logging.error(f"处理文件 {file_name} 失败: {e}")
+                    raise RuntimeError(f"处理文件 {file_name} 失败: {e}") from e
+                elapsed_time = time.time() - start_time
+                logging.info(f"文件 {file_name} 处理完成。原行数: {original_rows}, 用时: {elapsed_time:.2f} 秒。")
+                progress.file_done()
+            return
+
+        results = map_files(_process_file_task, pending_files, workers,
+                            initializer=_init_match_worker, initargs=(self.mapping_dict, col_a))
+        if store is not None:
+            results = _merge_cached_results(file_paths, results, store)
+        try:
+            for df, messages, records in results:
+                replay_messages(messages, logging.getLogger())
+                merge_records(records)
+                if df is not None:
+                    yield df
+                progress.file_done()
+        except OperationCancelled:
+            raise
+        except Exception as e:
+            logging.error(str(e))
+            raise
 
     def _export_single_file(self, df, output_format):
         """导出单个匹配文件。"""
         # 调用 utils 中的统一导出方法
         export_single_file(df, self.output_dir, "match_and_split", output_format)
 
-    def _export_split_files(self, df, split_row_count, output_format):
+    def _export_split_files(self, df, split_row_count, output_format, export_workers=1):
         """导出分割匹配文件。"""
         # 调用 utils 中的统一导出方法
-        export_split_files(df, self.output_dir, split_row_count, output_format)
+        export_split_files(df, self.output_dir, split_row_count, output_format,
+                           max_workers=resolve_worker_count(export_workers))
 
     def _export_unmatched_file(self, df, output_format):
         """导出无匹配文件。"""
         # 调用 utils 中的统一导出方法
-        export_unmatched_file(df, self.output_dir, output_format)
\ No newline at end of file
+        export_unmatched_file(df, self.output_dir, output_format)
+
+
+# 工作进程内的映射状态，由 _init_match_worker 在进程启动时设置一次
+_worker_state = {}
+
+
+def _init_match_worker(mapping_dict, col_a):
+    """工作进程初始化：保存映射字典、匹配列及“所属”列的类别。"""
+    _worker_state.update(mapping_dict=mapping_dict, col_a=col_a, belonging_dtype=_belonging_dtype(mapping_dict))
+
+
+def _belonging_dtype(mapping_dict):
+    """
+    “所属”列的 category 类型：类别为全部映射值加上“无匹配”，按文本排序。
+    各文件、各数据块使用相同的类别，合并后仍为 category，按“所属”分组的顺序与按文本排序一致。
+    """
+    return pd.CategoricalDtype(sorted(set(mapping_dict.values()) | {"无匹配"}))
+
+
+def _map_belonging(values, mapping_dict, belonging_dtype=None):
+    """
+    向量化地为整列查找精确匹配项，返回映射值，空值或未匹配时为“无匹配”。
+    先对列去重编码，只对不同的值做去空格、转小写处理，再通过哈希连接映射回所有行。
+    :param values: 匹配列 Series
+    :param mapping_dict: 小写键 -> 映射值
+    :param belonging_dtype: 结果的 category 类型（见 _belonging_dtype），为空时按 mapping_dict 生成
+    :return: 与 values 等长的 category 类型 Series
+    """
+    if belonging_dtype is None:
+        belonging_dtype = _belonging_dtype(mapping_dict)
+    no_match = belonging_dtype.categories.get_loc("无匹配")
+
+    with stage('normalize', rows_in=len(values)) as record:
+        codes, uniques = pd.factorize(values)
+        normalized = pd.Series(uniques, dtype=object).astype(str).str.strip().str.lower()
+        record.rows_out = len(normalized)
+
+    with stage('match', rows_in=len(values)) as record:
+        mapped = normalized.map(mapping_dict).where(normalized != '')
+        unique_codes = belonging_dtype.categories.get_indexer(mapped.fillna("无匹配"))
+        # 空值（编码为 -1）统一视为无匹配
+        result = np.append(unique_codes, no_match)[codes]
+        record.rows_out = int((result != no_match).sum())
+    return pd.Series(pd.Categorical.from_codes(result, dtype=belonging_dtype), index=values.index)
+
+
+def _merge_cached_results(file_paths, results, store):
+    """
+    按文件顺序返回各文件的 (处理后的 DataFrame 或 None, 日志列表, 阶段计时记录)：
+    未变化的文件读取保存的数据，其余文件依次取自 results（只包含这些文件）并保存处理结果。
+    """
+    try:
+        for file_path in file_paths:
+            if not store.is_cached(file_path):
+                result = next(results)
+                store.save(file_path, result[0], 0 if result[0] is None else len(result[0]))
+                yield result
+                continue
+
+            file_name = os.path.basename(file_path)
+            if store.is_skipped(file_path):
+                yield None, [(logging.INFO, f"文件 {file_name} 未变化，上次处理时已跳过。")], []
+                continue
+            parts = list(store.load(file_path))
+            df = parts[0] if len(parts) == 1 else concat_frames(parts)
+            yield df, [(logging.INFO, f"文件 {file_name} 未变化，使用上次的处理结果。原行数: {len(df)}")], []
+    finally:
+        results.close()
+
+
+def _process_file_task(file_path):
+    """
+    处理单个源文件（可在工作进程中执行）：读取并新增“所属”列。
+    :return: (处理后的 DataFrame 或 None（跳过时）, 日志列表, 阶段计时记录)
+    """
+    with collect() as records, current_file(os.path.basename(file_path)):
+        result = _process_file(file_path)
+    return result + (records,)
+
+
+def _process_file(file_path):
+    """读取单个源文件并新增“所属”列，返回 (处理后的 DataFrame 或 None, 日志列表)。"""
+    mapping_dict = _worker_state["mapping_dict"]
+    col_a = _worker_state["col_a"]
+    file_name = os.path.basename(file_path)
+    messages = [(logging.INFO, f"开始处理文件: {file_name}")]
+
+    start_time = time.time()
+    try:
+        # 使用统一的 read_file 函数
+        df = read_file(file_path, header_row=0)
+    except Exception as e:
+        raise RuntimeError(f"处理文件 {file_name} 失败: {e}") from e
+
+    if col_a not in df.columns:
+        messages.append((logging.WARNING, f"文件 {file_name} 中不存在列 '{col_a}'，跳过该文件。"))
+        return None, messages
+
+    original_rows = len(df)
+
+    # 新增一列，名为“所属”，并进行映射
+    df['所属'] = _map_belonging(df[col_a], mapping_dict, _worker_state["belonging_dtype"])
+
+    elapsed_time = time.time() - start_time
+    messages.append((logging.INFO,
+                     f"文件 {file_name} 处理完成。原行数: {original_rows}, 用时: {elapsed_time:.2f} 秒。"))
+    return df, messages
@@ -0,0 +1,235 @@
+import pandas as pd
+from abc import ABC, abstractmethod
+
+try:
+    # 可选依赖：安装了 pyahocorasick 时使用其 C 实现，否则使用下方的纯 Python 自动机
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+
+class _ValueMatcher(ABC):
+    """匹配器基类：对整列去重后逐个判断，再映射回所有行。"""
+
+    match_all = False
+
+    @abstractmethod
+    def search(self, text):
+        """判断单个已转换为小写的字符串是否命中。"""
+
+    def match(self, values):
+        """
+        对整列进行匹配，返回布尔掩码。
+        先对列去重，每个不同的值只判断一次，再通过 isin 映射回所有行。
+        :param values: 已转换为小写字符串的 Series
+        :return: 与 values 等长的布尔 Series
+        """
+        if self.match_all:
+            return pd.Series(True, index=values.index)
+
+        hits = [value for value in pd.unique(values) if self.search(value)]
+        return values.isin(hits)
+
+
+class ExactMatcher:
+    """“精确匹配”：直接使用集合的哈希查找。"""
+
+    def __init__(self, keywords):
+        self.keywords = {str(k) for k in keywords}
+
+    def match(self, values):
+        return values.isin(self.keywords)
+
+
+class _KeyTrie:
+    """关键字前缀树，用于判断字符串是否以任意关键字开头。"""
+
+    # 单个字符都是长度为1的字符串，用空字符串作结束标记不会与之冲突，且可被 pickle
+    _END = ''
+
+    def __init__(self, keywords):
+        self._root = {}
+        for keyword in keywords:
+            node = self._root
+            for ch in keyword:
+                node = node.setdefault(ch, {})
+            node[self._END] = True
+
+    def has_prefix_of(self, text):
+        node = self._root
+        end = self._END
+        for ch in text:
+            if end in node:
+                return True
+            node = node.get(ch)
+            if node is None:
+                return False
+        return end in node
+
+
+class PrefixMatcher(_ValueMatcher):
+    """“前缀匹配”：关键字前缀树，每个值的判断代价为 O(关键字长度)。"""
+
+    def __init__(self, keywords):
+        keywords = {str(k) for k in keywords}
+        self.match_all = '' in keywords
+        self._trie = _KeyTrie(keywords)
+
+    def search(self, text):
+        return self._trie.has_prefix_of(text)
+
+
+class SuffixMatcher(_ValueMatcher):
+    """“后缀匹配”：对反转后的关键字建立前缀树，用反转后的值查询。"""
+
+    def __init__(self, keywords):
+        keywords = {str(k) for k in keywords}
+        self.match_all = '' in keywords
+        self._trie = _KeyTrie(k[::-1] for k in keywords)
+
+    def search(self, text):
+        return self._trie.has_prefix_of(text[::-1])
+
+
+class ContainsMatcher(_ValueMatcher):
+    """
+    “包含匹配”的多模式匹配器（Aho-Corasick 自动机）。
+    根据文件B的全部关键字一次性构建自动机，每个值只需扫描一遍即可判断是否包含任意关键字，
+    与 any(c in x for c in criteria) 的结果完全一致。
+    """
+
+    def __init__(self, keywords):
+        keywords = {str(k) for k in keywords}
+        # 空字符串是任何值的子串，此时所有记录都应保留
+        self.match_all = '' in keywords
+        keywords.discard('')
+
+        self._automaton = None
+        if ahocorasick is not None and keywords:
+            self._automaton = ahocorasick.Automaton()
+            for keyword in keywords:
+                self._automaton.add_word(keyword, keyword)
+            self._automaton.make_automaton()
+        else:
+            self._build(keywords)
+
+    def _build(self, keywords):
+        """构建 goto / fail / output 表。"""
+        self._goto = [{}]
+        self._output = [False]
+        for keyword in keywords:
+            state = 0
+            for ch in keyword:
+                next_state = self._goto[state].get(ch)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][ch] = next_state
+                    self._goto.append({})
+                    self._output.append(False)
+                state = next_state
+            self._output[state] = True
+
+        # 广度优先计算失败指针，并沿失败指针传递输出标记
+        self._fail = [0] * len(self._goto)
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for ch, next_state in self._goto[state].items():
+                fail_state = self._fail[state]
+                while fail_state and ch not in self._goto[fail_state]:
+                    fail_state = self._fail[fail_state]
+                self._fail[next_state] = self._goto[fail_state].get(ch, 0)
+                if self._output[self._fail[next_state]]:
+                    self._output[next_state] = True
+                queue.append(next_state)
+
+    def search(self, text):
+        """判断单个字符串是否包含任意关键字。"""
+        if self.match_all:
+            return True
+        if self._automaton is not None:
+            for _ in self._automaton.iter(text):
+                return True
+            return False
+
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if output[state]:
+                return True
+        return False
+
+    def match(self, values):
+        if self._automaton is None and not self.match_all and len(self._goto) == 1:
+            return pd.Series(False, index=values.index)
+        return super().match(values)
+
+
+class LongestPrefixMatcher:
+    """
+    最长前缀匹配器（用于去重匹配的右模糊匹配）。
+    将映射键转为小写后构建前缀树，每个值沿树走一遍即可找到所有作为其前缀的键，代价为 O(值长度)。
+    多个键同时命中时，与“按原始键长度降序逐个尝试、取第一个命中”的结果一致：
+    原始键更长者优先，长度相同时先出现的键优先。
+    """
+
+    _END = ''
+
+    def __init__(self, keys):
+        """
+        :param keys: 映射键（按出现顺序），空字符串和非字符串键会被忽略
+        """
+        self._root = {}
+        for rank, key in enumerate(keys):
+            if not isinstance(key, str) or not key:
+                continue
+            node = self._root
+            for ch in key.lower():
+                node = node.setdefault(ch, {})
+            priority = (len(key), -rank)
+            existing = node.get(self._END)
+            if existing is None or priority > existing[0]:
+                node[self._END] = (priority, key)
+
+    def find(self, text):
+        """
+        返回作为 text 前缀的最优映射键（原始形式），没有命中时返回 None。
+        :param text: 已去除首尾空格并转为小写的值
+        """
+        end = self._END
+        best = None
+        node = self._root
+        for ch in text:
+            hit = node.get(end)
+            if hit is not None and (best is None or hit[0] > best[0]):
+                best = hit
+            node = node.get(ch)
+            if node is None:
+                break
+        else:
+            hit = node.get(end)
+            if hit is not None and (best is None or hit[0] > best[0]):
+                best = hit
+        return best[1] if best is not None else None
+
+
+MATCHERS = {
+    '精确匹配': ExactMatcher,
+    '包含匹配': ContainsMatcher,
+    '前缀匹配': PrefixMatcher,
+    '后缀匹配': SuffixMatcher,
+}
+
+
+def build_matcher(match_mode, keywords):
+    """
+    根据匹配模式构建匹配器。匹配器只需根据文件B构建一次，可在目录模式下复用于所有文件。
+    :param match_mode: 匹配模式（精确匹配/包含匹配/前缀匹配/后缀匹配）
+    :param keywords: 已转换为小写的筛选条件集合
+    :return: 提供 match(series) 方法的匹配器
+    """
+    if match_mode not in MATCHERS:
+        raise ValueError(f"不支持的匹配模式: {match_mode}")
+    return MATCHERS[match_mode](keywords)
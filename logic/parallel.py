@@ -0,0 +1,54 @@
+import os
+import logging
+from concurrent.futures import ProcessPoolExecutor
+
+
+def resolve_worker_count(workers):
+    """
+    规范化并行进程数。
+    :param workers: None/1 表示在当前进程内顺序执行；0 或负数表示使用全部 CPU 核心
+    :return: 实际使用的进程数
+    """
+    if workers is None:
+        return 1
+    if workers <= 0:
+        return os.cpu_count() or 1
+    return workers
+
+
+def map_files(func, tasks, workers=1, initializer=None, initargs=()):
+    """
+    按任务顺序返回 func(task) 的结果。
+    workers > 1 时使用进程池并行执行，initializer/initargs 只在每个工作进程启动时传递一次
+    （例如筛选条件集合、映射字典），结果仍按原任务顺序依次返回，保证合并顺序确定。
+    :param func: 模块级函数（需可被 pickle）
+    :param tasks: 任务列表
+    :param workers: 进程数
+    :param initializer: 工作进程初始化函数
+    :param initargs: 初始化函数参数
+    :return: 结果迭代器
+    """
+    tasks = list(tasks)
+    workers = min(resolve_worker_count(workers), len(tasks))
+
+    if workers <= 1:
+        if initializer is not None:
+            initializer(*initargs)
+        for task in tasks:
+            yield func(task)
+        return
+
+    logging.info(f"启用多进程并行处理，进程数: {workers}")
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=initializer, initargs=initargs)
+    try:
+        yield from executor.map(func, tasks)
+    finally:
+        # 调用方提前结束迭代（如用户取消）时丢弃尚未开始的任务，只等待正在执行的任务
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def replay_messages(messages, log=None):
+    """在主进程中按顺序输出工作进程收集的日志。"""
+    log = log or logging.getLogger(__name__)
+    for level, message in messages:
+        log.log(level, message)
@@ -0,0 +1,84 @@
+import time
+import threading
+
+
+class OperationCancelled(Exception):
+    """用户取消了正在执行的操作。"""
+
+
+class CancelToken:
+    """取消令牌：界面线程调用 cancel()，处理逻辑在文件之间、数据块之间调用 check()。"""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    def is_cancelled(self):
+        return self._event.is_set()
+
+    def check(self):
+        """已取消时抛出 OperationCancelled。"""
+        if self._event.is_set():
+            raise OperationCancelled("操作已取消。")
+
+
+class ProgressTracker:
+    """
+    进度跟踪：累计已完成的文件数和已处理的记录数，计算吞吐量，并在每次更新时检查取消令牌。
+    callback(已完成文件数, 文件总数, 已处理记录数, 每秒记录数) 最多每 min_interval 秒调用一次，
+    文件完成时总是调用。未指定回调和令牌时所有方法都是空操作，处理逻辑可以无条件调用。
+    """
+
+    def __init__(self, callback=None, cancel_token=None, min_interval=0.2):
+        self.callback = callback
+        self.cancel_token = cancel_token
+        self.min_interval = min_interval
+        self.total_files = 0
+        self.files_done = 0
+        self.rows_done = 0
+        self._start = time.perf_counter()
+        self._last_notify = 0.0
+
+    def start(self, total_files):
+        """开始处理，设置文件总数并重新计时。"""
+        self.total_files = total_files
+        self.files_done = 0
+        self.rows_done = 0
+        self._start = time.perf_counter()
+        self._notify(force=True)
+
+    def add_rows(self, rows):
+        """累加已处理的记录数（每处理完一个数据块调用一次）。"""
+        self.rows_done += rows
+        self._notify()
+        self.check()
+
+    def file_done(self, rows=0):
+        """一个文件处理完成，rows 为该文件中尚未通过 add_rows 计入的记录数。"""
+        self.files_done += 1
+        self.rows_done += rows
+        self._notify(force=True)
+        self.check()
+
+    def finish(self):
+        """处理结束，立即上报最终进度（按记录数上报、没有文件的流程使用）。"""
+        self._notify(force=True)
+
+    def check(self):
+        """已取消时抛出 OperationCancelled。"""
+        if self.cancel_token is not None:
+            self.cancel_token.check()
+
+    def rows_per_sec(self):
+        elapsed = time.perf_counter() - self._start
+        return self.rows_done / elapsed if elapsed > 0 else 0.0
+
+    def _notify(self, force=False):
+        if self.callback is None:
+            return
+        now = time.perf_counter()
+        if force or now - self._last_notify >= self.min_interval:
+            self._last_notify = now
+            self.callback(self.files_done, self.total_files, self.rows_done, self.rows_per_sec())
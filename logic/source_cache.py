@@ -0,0 +1,179 @@
+import os
+import json
+import hashlib
+import logging
+import numpy as np
+import pandas as pd
+
+# 通过环境变量启用缓存，子进程（多进程并行处理）会自动继承同样的配置
+CACHE_DIR_ENV = 'DATA_CONVERT_CACHE_DIR'
+CACHE_MAX_BYTES_ENV = 'DATA_CONVERT_CACHE_MAX_BYTES'
+
+# 缓存目录默认大小上限：10 GB
+DEFAULT_MAX_BYTES = 10 * 1024 ** 3
+
+_CACHE_SUFFIX = '.feather'
+
+
+class SourceCache:
+    """
+    源文件解析结果的磁盘缓存（Feather 列式格式）。
+    缓存键由文件路径、修改时间、文件大小以及标题行等读取参数共同决定，源文件变化后自动失效；
+    缓存总大小超过上限时按最近使用时间淘汰最旧的条目。
+    """
+
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def make_key(self, file_path, **read_options):
+        """根据文件签名和读取参数生成缓存键。"""
+        stat = os.stat(file_path)
+        payload = {
+            'path': os.path.abspath(file_path),
+            'mtime': stat.st_mtime_ns,
+            'size': stat.st_size,
+            'options': read_options,
+        }
+        return hashlib.sha1(json.dumps(payload, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """读取缓存，未命中时返回 None。"""
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            df = pd.read_feather(path)
+        except Exception as e:
+            logging.warning(f"读取缓存失败，将重新解析源文件: {e}")
+            return None
+
+        # 更新修改时间作为最近使用时间，供 LRU 淘汰使用
+        os.utime(path)
+        return _restore_missing_values(df)
+
+    def get_chunks(self, key, chunksize):
+        """
+        分块读取缓存：按记录批次读取 Feather 文件，每凑满 chunksize 行转换为一个 DataFrame，不整体加载。
+        未命中或无法读取时返回 None，否则返回 DataFrame 迭代器（至少返回一个数据块，空文件时为空 DataFrame）。
+        """
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            import pyarrow as pa
+            source = pa.OSFile(path, 'rb')
+            reader = pa.ipc.open_file(source)
+        except Exception as e:
+            logging.warning(f"读取缓存失败，将重新解析源文件: {e}")
+            return None
+
+        # 更新修改时间作为最近使用时间，供 LRU 淘汰使用
+        os.utime(path)
+        return self._iter_batches(source, reader, chunksize)
+
+    @staticmethod
+    def _iter_batches(source, reader, chunksize):
+        import pyarrow as pa
+
+        def to_frame(table, start):
+            df = _restore_missing_values(table.to_pandas())
+            df.index = pd.RangeIndex(start, start + len(df))
+            return df
+
+        with source:
+            pending = []
+            pending_rows = 0
+            rows_yielded = 0
+            for i in range(reader.num_record_batches):
+                batch = reader.get_batch(i)
+                pending.append(batch)
+                pending_rows += batch.num_rows
+                while pending_rows >= chunksize:
+                    table = pa.Table.from_batches(pending, schema=reader.schema)
+                    yield to_frame(table.slice(0, chunksize), rows_yielded)
+                    rows_yielded += chunksize
+                    pending = table.slice(chunksize).to_batches()
+                    pending_rows -= chunksize
+            if pending_rows or not rows_yielded:
+                yield to_frame(pa.Table.from_batches(pending, schema=reader.schema), rows_yielded)
+
+    def put(self, key, df):
+        """写入缓存；数据无法以列式格式保存（如列名不是字符串、列中类型混杂）时跳过。"""
+        if not all(isinstance(col, str) for col in df.columns):
+            logging.info("列名包含非字符串，跳过缓存。")
+            return
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            df.reset_index(drop=True).to_feather(tmp_path)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logging.info(f"数据无法写入缓存，已跳过: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        self._evict()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + _CACHE_SUFFIX)
+
+    def _evict(self):
+        """按最近使用时间淘汰缓存，直到总大小不超过上限。"""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(_CACHE_SUFFIX):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                logging.info(f"缓存超出上限，已淘汰: {os.path.basename(path)}")
+            except FileNotFoundError:
+                pass
+
+
+def _restore_missing_values(df):
+    """Feather 读回的文本列用 None 表示缺失值，统一还原为 NaN，与直接解析的结果保持一致。"""
+    for col in df.columns:
+        if df[col].dtype == object:
+            df[col] = df[col].where(df[col].notna(), np.nan)
+    return df
+
+
+def configure_source_cache(cache_dir, max_bytes=DEFAULT_MAX_BYTES):
+    """
+    启用（cache_dir 非空）或关闭（cache_dir 为空）源文件缓存。
+    配置写入环境变量，多进程并行处理时子进程同样生效。
+    """
+    if cache_dir:
+        os.environ[CACHE_DIR_ENV] = cache_dir
+        os.environ[CACHE_MAX_BYTES_ENV] = str(max_bytes)
+    else:
+        os.environ.pop(CACHE_DIR_ENV, None)
+        os.environ.pop(CACHE_MAX_BYTES_ENV, None)
+
+
+def get_source_cache():
+    """返回当前启用的缓存，未启用或缺少 pyarrow 时返回 None。"""
+    cache_dir = os.environ.get(CACHE_DIR_ENV)
+    if not cache_dir:
+        return None
+    try:
+        import pyarrow  # noqa: F401  Feather 格式依赖 pyarrow
+    except ImportError:
+        logging.warning("未安装 pyarrow，源文件缓存不可用。")
+        return None
+    max_bytes = int(os.environ.get(CACHE_MAX_BYTES_ENV) or DEFAULT_MAX_BYTES)
+    return SourceCache(cache_dir, max_bytes)
@@ -1,10 +1,59 @@
+import numpy as np
 import pandas as pd
 import os
+import codecs
 import logging
 import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from logic.source_cache import get_source_cache
+from logic.instrumentation import stage, timed_chunks, collect, merge_records
 
-# 配置日志
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+try:
+    # 可选依赖：用于在常用中文编码都无法解码时猜测其他编码
+    import chardet
+except ImportError:
+    chardet = None
+
+
+# CSV 文件依次尝试的编码
+CSV_ENCODINGS = ['utf-8', 'gbk', 'gb18030', 'ansi', 'latin1', 'gb2312']
+
+# 流式读取时每个数据块的默认行数
+DEFAULT_CHUNK_SIZE = 100000
+
+# 编码探测时读取的字节数
+ENCODING_SAMPLE_SIZE = 64 * 1024
+
+# 编码缓存：(路径, 修改时间, 文件大小) -> (编码, 是否已完整校验)
+_encoding_cache = {}
+
+# xlsx 写出引擎，通过环境变量选择，子进程（并行导出）会自动继承同样的配置：
+# openpyxl   - pandas 默认方式，在内存中构建完整的工作簿对象（默认）
+# write_only - openpyxl 只写模式，逐行流式写出
+# xlsxwriter - xlsxwriter 常量内存模式，未安装时回退到 write_only
+# auto       - 已安装 xlsxwriter 时使用 xlsxwriter，否则使用 write_only
+XLSX_ENGINE_ENV = 'DATA_CONVERT_XLSX_ENGINE'
+XLSX_ENGINES = ('openpyxl', 'write_only', 'xlsxwriter', 'auto')
+DEFAULT_XLSX_ENGINE = 'openpyxl'
+
+# 流式写出 xlsx 时每批转换的行数
+XLSX_WRITE_BATCH_ROWS = 10000
+
+# Excel 读取引擎，通过环境变量选择，子进程同样生效：
+# openpyxl  - pandas 默认方式，整体读取（默认）
+# calamine  - pandas 的 calamine 引擎整体读取，速度更快（需要安装 python-calamine，未安装时回退到 openpyxl）
+# streaming - 分块读取 xlsx 时以 openpyxl 只读模式逐批读取行，内存占用与文件大小无关
+# auto      - 分块读取 xlsx 时使用 streaming，整体读取时已安装 python-calamine 则使用 calamine
+EXCEL_READER_ENV = 'DATA_CONVERT_EXCEL_READER'
+EXCEL_READERS = ('openpyxl', 'calamine', 'streaming', 'auto')
+DEFAULT_EXCEL_READER = 'openpyxl'
+
+# 紧凑内存模式，通过环境变量启用（设为 1），子进程同样生效：整体读取源文件后，
+# 重复值较多的文本列转换为 category，其余纯文本列转换为 Arrow 存储的字符串（需要安装 pyarrow）
+COMPACT_DTYPES_ENV = 'DATA_CONVERT_COMPACT_DTYPES'
+# 不同值的个数不超过行数的该比例时转换为 category
+CATEGORY_MAX_RATIO = 0.5
 
 
 def get_excel_row_limit():
@@ -12,35 +61,290 @@ def get_excel_row_limit():
     return 1048576
 
 
-def read_file(file_path, header_row=0, nrows=None):
+def _file_signature(file_path):
+    """返回 (绝对路径, 修改时间, 文件大小)，文件内容变化后签名随之变化。"""
+    stat = os.stat(file_path)
+    return os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size
+
+
+def _decodes(data, encoding, final):
+    """判断字节数据能否用指定编码解码；final=False 时允许末尾有被截断的多字节字符。"""
+    try:
+        codecs.getincrementaldecoder(encoding)().decode(data, final=final)
+        return True
+    except (UnicodeDecodeError, LookupError):
+        return False
+
+
+def _sniff_encoding_from_sample(file_path):
+    """
+    根据文件开头的字节样本判断编码，无法确定时返回 None。
+    按 CSV_ENCODINGS 的顺序取第一个能解码样本的编码，与逐个尝试完整读取的结果一致；
+    样本全为 ASCII 且文件比样本大时，后续内容可能是任意编码，视为无法确定。
+    """
+    with open(file_path, 'rb') as f:
+        sample = f.read(ENCODING_SAMPLE_SIZE)
+    whole_file = len(sample) < ENCODING_SAMPLE_SIZE or os.path.getsize(file_path) == len(sample)
+
+    if sample.startswith(codecs.BOM_UTF8):
+        return 'utf-8'
+    if sample.isascii():
+        return 'utf-8' if whole_file else None
+
+    for encoding in CSV_ENCODINGS:
+        if encoding == 'latin1':
+            break
+        if _decodes(sample, encoding, final=whole_file):
+            return encoding
+
+    # 常用中文编码都无法解码时，借助 chardet 猜测（如 big5、utf-16 等）
+    if chardet is not None:
+        guess = chardet.detect(sample)
+        encoding = guess.get('encoding')
+        if encoding and guess.get('confidence', 0) >= 0.8 and _decodes(sample, encoding, final=whole_file):
+            return encoding.lower()
+    return None
+
+
+def detect_csv_encoding(file_path, block_size=1 << 20):
+    """
+    按块流式校验CSV文件的编码，返回第一个能完整解码整个文件的编码。
+    只做字节解码而不解析CSV，内存占用与文件大小无关。
+    :param file_path: 文件路径
+    :param block_size: 每次读取的字节数
+    :return: 编码名称
+    """
+    for encoding in CSV_ENCODINGS:
+        try:
+            decoder = codecs.getincrementaldecoder(encoding)()
+        except LookupError:
+            continue
+        try:
+            with open(file_path, 'rb') as f:
+                while True:
+                    block = f.read(block_size)
+                    if not block:
+                        break
+                    decoder.decode(block)
+                decoder.decode(b'', final=True)
+            return encoding
+        except UnicodeDecodeError as e:
+            logging.warning(f"使用 {encoding} 编码失败: {e}")
+    raise ValueError("所有尝试的编码均无法正确读取CSV文件。请检查文件编码。")
+
+
+def sniff_csv_encoding(file_path, verify=False):
+    """
+    探测CSV文件编码，结果按 (路径, 修改时间, 文件大小) 缓存，读取标题和处理数据时无需重复探测。
+    先根据字节样本判断；样本无法确定时回退到完整校验。
+    :param file_path: 文件路径
+    :param verify: 是否要求编码已对整个文件完整校验（流式分块读取时需要，避免读到中途才解码失败）
+    :return: 编码名称
+    """
+    signature = _file_signature(file_path)
+    cached = _encoding_cache.get(signature)
+    if cached and (cached[1] or not verify):
+        return cached[0]
+
+    with stage('encoding_detect', file=os.path.basename(file_path)):
+        encoding = None if verify else _sniff_encoding_from_sample(file_path)
+        verified = False
+        if encoding is None:
+            logging.info("正在完整校验文件编码...")
+            encoding = detect_csv_encoding(file_path)
+            verified = True
+
+    logging.info(f"检测到文件编码: {encoding}")
+    _encoding_cache[signature] = (encoding, verified)
+    return encoding
+
+
+def read_file(file_path, header_row=0, nrows=None, usecols=None, compact=None):
     """
     智能读取CSV或Excel文件，并处理常见的中文编码问题。
+    启用源文件缓存后，完整读取时优先从缓存加载，未命中则解析后写入缓存。
     :param file_path: 文件路径
     :param header_row: 标题行索引（从0开始）
     :param nrows: 要读取的行数，用于优化大文件读取
+    :param usecols: 只读取这些列（列名列表），文件中不存在的列会被忽略
+    :param compact: 完整读取后是否转换为紧凑的数据类型（见 compact_frame），为 None 时取环境变量配置
     :return: Pandas DataFrame
     """
     logging.info(f"正在读取文件: {os.path.basename(file_path)}")
+    if compact is None:
+        compact = compact_dtypes_enabled()
+
+    cache = get_source_cache() if nrows is None else None
+    if cache is None:
+        df = _parse_file(file_path, header_row, nrows, usecols)
+    else:
+        cache_key = _source_cache_key(cache, file_path, header_row, usecols)
+        with stage('parse', file=os.path.basename(file_path)) as record:
+            df = cache.get(cache_key)
+            record.rows_out = None if df is None else len(df)
+        if df is not None:
+            logging.info("已从缓存加载文件。")
+        else:
+            df = _parse_file(file_path, header_row, nrows, usecols)
+            cache.put(cache_key, df)
+
+    if compact and nrows is None:
+        before = frame_memory_mb(df)
+        compact_frame(df)
+        logging.info(f"紧凑内存模式: {os.path.basename(file_path)} 内存占用 {before:.1f} MB -> "
+                     f"{frame_memory_mb(df):.1f} MB")
+    return df
+
+
+def compact_dtypes_enabled():
+    """返回是否通过环境变量启用了紧凑内存模式。"""
+    return os.environ.get(COMPACT_DTYPES_ENV, '').strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def frame_memory_mb(df):
+    """返回 DataFrame 实际占用的内存（MB），包括 object 列中各个字符串对象。"""
+    return df.memory_usage(deep=True).sum() / 1024 ** 2
+
+
+def _arrow_string_dtype():
+    """返回缺失值为 NaN 的 Arrow 字符串类型，未安装 pyarrow 时返回 None。"""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return None
+    try:
+        return pd.StringDtype('pyarrow', na_value=np.nan)
+    except TypeError:
+        # pandas 2.3 之前的写法
+        return pd.StringDtype('pyarrow_numpy')
+
+
+def compact_frame(df, max_category_ratio=CATEGORY_MAX_RATIO):
+    """
+    就地将 object 列和字符串类型（pd.StringDtype，pandas 3 中文本列的默认类型）的列转换为更省内存的类型，返回 df：
+    不同值个数不超过行数 max_category_ratio 倍的列转换为 category（各单元格的值原样保留），
+    其余值全部为字符串的列转换为 Arrow 字符串（未安装 pyarrow 或已是该类型时保持不变），其他列不做处理。
+    两种类型的缺失值仍为 NaN，astype(str)、.str 方法和比较的结果与原来相同。
+    """
+    if df.empty:
+        return df
+    string_dtype = _arrow_string_dtype()
+    for i in range(df.shape[1]):
+        values = df.iloc[:, i]
+        is_string = isinstance(values.dtype, pd.StringDtype)
+        if values.dtype != object and not is_string:
+            continue
+        if values.nunique() <= len(values) * max_category_ratio:
+            df.isetitem(i, values.astype('category'))
+        elif string_dtype is not None and values.dtype != string_dtype and \
+                (is_string or pd.api.types.infer_dtype(values, skipna=True) == 'string'):
+            df.isetitem(i, values.astype(string_dtype))
+    return df
+
+
+def concat_frames(frames):
+    """
+    按顺序合并多个 DataFrame（重新编号索引）。
+    紧凑内存模式下，先统一各部分同名 category 列的类别，避免合并后退化为 object 列，
+    合并结果中仍为 object 的列再按 compact_frame 的规则转换。
+    """
+    if not frames:
+        return pd.DataFrame()
+    if not compact_dtypes_enabled():
+        return pd.concat(frames, ignore_index=True)
+
+    frames = [df.copy(deep=False) for df in frames]
+    columns = {col for df in frames for col in df.columns}
+    for col in columns:
+        parts = [df[col] for df in frames if col in df.columns]
+        if not all(isinstance(part.dtype, pd.CategoricalDtype) for part in parts):
+            continue
+        try:
+            categories = pd.api.types.union_categoricals(parts, ignore_order=True).categories
+        except TypeError:
+            # 各部分的类别类型不同（如数字与文本），合并后由 compact_frame 重新转换
+            continue
+        for df in frames:
+            if col in df.columns:
+                df[col] = df[col].cat.set_categories(categories)
+    return compact_frame(pd.concat(frames, ignore_index=True))
+
+
+def _usecols_key(usecols):
+    """将列投影参数转换为可作为缓存键的形式。"""
+    return None if usecols is None else sorted(str(col) for col in usecols)
+
+
+def _source_cache_key(cache, file_path, header_row, usecols):
+    """
+    生成源文件缓存键：包含标题行、列投影，Excel 文件还包含整体读取时的解析引擎
+    （不同引擎对日期、数字的解析结果可能不同，切换读取方式后不能沿用其他引擎的解析结果）。
+    紧凑内存模式在读取缓存后才转换类型，缓存中保存的始终是未转换的数据，因此不计入缓存键。
+    """
+    options = {'header_row': header_row, 'usecols': _usecols_key(usecols)}
+    if os.path.splitext(file_path)[1].lower() in ('.xlsx', '.xls'):
+        options['engine'] = _excel_parse_engine() or 'default'
+    return cache.make_key(file_path, **options)
+
+
+def _usecols_filter(usecols):
+    """
+    将列名列表转换为 pandas 的 usecols 可调用对象。
+    使用可调用对象而不是列表，文件中缺少某列时不会报错，由调用方按列是否存在判断。
+    """
+    if usecols is None:
+        return None
+    wanted = set(usecols)
+    return lambda col: col in wanted
+
+
+def _parse_file(file_path, header_row, nrows, usecols=None):
+    """解析CSV或Excel文件，编码探测与解析分别计时。"""
+    if os.path.splitext(file_path)[1].lower() == '.csv':
+        sniff_csv_encoding(file_path)
+    with stage('parse', file=os.path.basename(file_path)) as record:
+        df = _parse_file_content(file_path, header_row, nrows, usecols)
+        record.rows_out = len(df)
+    return df
+
+
+def _parse_file_content(file_path, header_row, nrows, usecols=None):
+    """解析CSV或Excel文件的内容。"""
     file_extension = os.path.splitext(file_path)[1].lower()
+    usecols = _usecols_filter(usecols)
 
     if file_extension == '.csv':
-        encodings = ['utf-8', 'gbk', 'gb18030', 'ansi', 'latin1','gb2312']
-        for encoding in encodings:
+        encoding = sniff_csv_encoding(file_path)
+        try:
+            return pd.read_csv(file_path, header=header_row, nrows=nrows, usecols=usecols, dtype=str,
+                               encoding=encoding)
+        except UnicodeDecodeError as e:
+            logging.warning(f"使用探测到的编码 {encoding} 读取失败: {e}，将逐个尝试其他编码。")
+        except Exception as e:
+            logging.error(f"读取文件 {file_path} 时发生非编码错误: {e}")
+            raise
+
+        for fallback_encoding in CSV_ENCODINGS:
+            if fallback_encoding == encoding:
+                continue
             try:
-                logging.info(f"尝试使用 {encoding} 编码读取...")
-                df = pd.read_csv(file_path, header=header_row, nrows=nrows, dtype=str, encoding=encoding)
-                logging.info(f"文件成功使用 {encoding} 编码读取。")
+                logging.info(f"尝试使用 {fallback_encoding} 编码读取...")
+                df = pd.read_csv(file_path, header=header_row, nrows=nrows, usecols=usecols, dtype=str,
+                                 encoding=fallback_encoding)
+                logging.info(f"文件成功使用 {fallback_encoding} 编码读取。")
+                _encoding_cache[_file_signature(file_path)] = (fallback_encoding, nrows is None)
                 return df
-            except UnicodeDecodeError as e:
-                logging.warning(f"使用 {encoding} 编码失败: {e}")
+            except (UnicodeDecodeError, LookupError) as e:
+                logging.warning(f"使用 {fallback_encoding} 编码失败: {e}")
             except Exception as e:
                 logging.error(f"读取文件 {file_path} 时发生非编码错误: {e}")
                 raise
-        raise UnicodeDecodeError("所有尝试的编码均无法正确读取CSV文件。请检查文件编码。")
+        raise ValueError("所有尝试的编码均无法正确读取CSV文件。请检查文件编码。")
 
     elif file_extension in ['.xlsx', '.xls']:
         try:
-            return pd.read_excel(file_path, header=header_row, nrows=nrows)
+            return pd.read_excel(file_path, header=header_row, nrows=nrows, usecols=usecols,
+                                 engine=_excel_parse_engine())
         except Exception as e:
             logging.error(f"读取Excel文件失败: {e}")
             raise
@@ -49,6 +353,299 @@ def read_file(file_path, header_row=0, nrows=None):
         raise ValueError("不支持的文件格式。请选择 .csv, .xlsx 或 .xls 文件。")
 
 
+def get_excel_reader(reader=None):
+    """
+    返回配置的 Excel 读取方式（见 EXCEL_READERS）。
+    :param reader: 指定的读取方式，为空时取环境变量配置
+    """
+    reader = (reader or os.environ.get(EXCEL_READER_ENV) or DEFAULT_EXCEL_READER).lower()
+    if reader not in EXCEL_READERS:
+        raise ValueError(f"不支持的 Excel 读取方式: {reader}。可选: {', '.join(EXCEL_READERS)}")
+    return reader
+
+
+def _excel_parse_engine():
+    """返回整体读取 Excel 时传给 pd.read_excel 的引擎，None 表示使用 pandas 默认引擎。"""
+    if get_excel_reader() not in ('calamine', 'auto'):
+        return None
+    try:
+        import python_calamine  # noqa: F401
+        return 'calamine'
+    except ImportError:
+        if get_excel_reader() == 'calamine':
+            logging.warning("未安装 python-calamine，改用 openpyxl 读取Excel文件。")
+        return None
+
+
+def read_columns(file_path, header_row=0):
+    """
+    只读取标题行，返回列名列表（列名规则与 read_file 一致）。
+    CSV 只解析开头几行；xlsx 以只读流式方式打开工作簿，标题行占满工作表记录的数据范围时读到标题行即停止，
+    不加载整个工作簿；标题行比数据范围窄（或为空、不存在）时逐行扫描，按 pandas 的规则确定列数。
+    :param file_path: 文件路径
+    :param header_row: 标题行索引（从0开始）
+    :return: 列名列表
+    """
+    logging.info(f"正在读取列标题: {os.path.basename(file_path)}")
+    file_extension = os.path.splitext(file_path)[1].lower()
+
+    if file_extension == '.csv':
+        return list(read_file(file_path, header_row=header_row, nrows=0).columns)
+
+    elif file_extension == '.xlsx':
+        from openpyxl import load_workbook
+
+        # calamine 引擎把只含空白字符的标题单元格读为空值（命名为 Unnamed: i），但这些单元格仍计入列数
+        calamine = _excel_parse_engine() == 'calamine'
+        workbook = load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            sheet = workbook.worksheets[0]
+            width = _xlsx_sheet_width(sheet)
+            header = next(sheet.iter_rows(min_row=header_row + 1, max_row=header_row + 1, values_only=True), ())
+            header = _trim_empty_cells(header, blank_is_empty=calamine)
+            if len(header) < width:
+                # 数据范围可能包含只有格式或空字符串的单元格，pandas 不计入这些列，逐行扫描得到实际的列数和行数
+                width, rows = _xlsx_sheet_extent(sheet)
+                if rows <= header_row:
+                    if rows == 0:
+                        return []
+                    raise ValueError(f"标题行为第 {header_row + 1} 行，但文件只有 {rows} 行数据。")
+        finally:
+            workbook.close()
+        # 数据比标题行宽、或标题行为空时，多出的列同样命名为 Unnamed: i
+        names = _excel_header_names(header, width)
+        # 与 read_file 一样由列名构造 Index：例如标题中同时有 2.5 和 1 时整体为浮点数，1 变为 1.0
+        return list(pd.Index(names, tupleize_cols=False))
+
+    elif file_extension == '.xls':
+        return list(read_file(file_path, header_row=header_row, nrows=0).columns)
+
+    else:
+        raise ValueError("不支持的文件格式。请选择 .csv, .xlsx 或 .xls 文件。")
+
+
+def union_columns(file_paths, header_row=0, required=None):
+    """
+    读取各文件的标题行，返回合并后的列名列表，列顺序与按文件顺序 concat 各文件的结果一致。
+    :param file_paths: 文件路径列表
+    :param header_row: 标题行索引（从0开始）
+    :param required: 不为空时跳过不包含该列的文件
+    :return: 列名列表
+    """
+    columns = []
+    for file_path in file_paths:
+        file_columns = read_columns(file_path, header_row=header_row)
+        if required is not None and required not in file_columns:
+            continue
+        for col in file_columns:
+            if col not in columns:
+                columns.append(col)
+    return columns
+
+
+def _xlsx_sheet_width(sheet):
+    """
+    返回只读工作表的列数：优先取工作表记录的数据范围（dimension），不需要读取数据行；
+    文件中没有记录数据范围时逐行扫描，按 pandas 的规则取各行去掉末尾空单元格后的最大列数。
+    注意设置过格式的空单元格也会计入数据范围，此时末尾会多出全空的 Unnamed 列。
+    须在调用 sheet.reset_dimensions() 之前调用。
+    """
+    if sheet.max_column is not None and sheet.calculate_dimension() != 'A1:A1':
+        return sheet.max_column
+    return _xlsx_sheet_extent(sheet)[0]
+
+
+def _xlsx_sheet_extent(sheet):
+    """
+    逐行扫描只读工作表，按 pandas 的规则返回 (列数, 行数)：列数为各行去掉末尾空单元格后的最大长度，
+    行数截止到最后一个有数据的行。会调用 sheet.reset_dimensions()。
+    """
+    sheet.reset_dimensions()
+    width = 0
+    rows = 0
+    for row_number, row in enumerate(sheet.iter_rows(values_only=True)):
+        row = _trim_empty_cells(row)
+        if row:
+            width = max(width, len(row))
+            rows = row_number + 1
+    return width, rows
+
+
+def _trim_empty_cells(row, blank_is_empty=False):
+    """
+    去掉行末尾的空单元格（None 或空字符串），返回列表。
+    :param blank_is_empty: 为真时只含空白字符的单元格同样视为空，并替换为 None
+    """
+    if blank_is_empty:
+        row = [None if isinstance(value, str) and not value.strip() else value for value in row]
+    else:
+        row = list(row)
+    while row and row[-1] in (None, ''):
+        row.pop()
+    return row
+
+
+def _excel_header_names(header, width=None):
+    """
+    按 pandas 的规则处理标题单元格：去掉末尾空单元格，空标题命名为 Unnamed: i，重名追加 .1、.2 后缀。
+    :param width: 数据的列数；数据行比标题行宽时，多出的列同样命名为 Unnamed: i
+    """
+    header = _trim_empty_cells(header)
+    if width is not None and width > len(header):
+        header.extend([None] * (width - len(header)))
+
+    names = []
+    unnamed = []
+    for i, value in enumerate(header):
+        if isinstance(value, float) and value.is_integer():
+            value = int(value)
+        if value in (None, ''):
+            value = f"Unnamed: {i}"
+            unnamed.append(i)
+        names.append(value)
+
+    # 先处理有名称的列再处理未命名列；重名时跳过已存在的后缀
+    counts = {}
+    for i in [i for i in range(len(names)) if i not in unnamed] + unnamed:
+        name = original = names[i]
+        count = counts.get(name, 0)
+        while count > 0:
+            counts[original] = count + 1
+            name = f"{original}.{count}"
+            count = count + 1 if name in names else counts.get(name, 0)
+        names[i] = name
+        counts[name] = count + 1
+    return names
+
+
+def read_file_chunks(file_path, header_row=0, chunksize=DEFAULT_CHUNK_SIZE, usecols=None):
+    """
+    分块读取CSV或Excel文件，逐块返回 DataFrame，用于流式处理。
+    CSV 文件真正按块解析；xlsx 文件在 Excel 读取方式为 streaming/auto 时以只读模式逐批读取行，
+    其余情况下 Excel 文件整体读取后按块切分。启用源文件缓存且已缓存时，按记录批次分块读取缓存文件。
+    :param file_path: 文件路径
+    :param header_row: 标题行索引（从0开始）
+    :param chunksize: 每块的行数
+    :param usecols: 只读取这些列（列名列表），文件中不存在的列会被忽略
+    :return: DataFrame 迭代器
+    """
+    logging.info(f"正在分块读取文件: {os.path.basename(file_path)}")
+    file_extension = os.path.splitext(file_path)[1].lower()
+
+    cache = get_source_cache()
+    cache_key = _source_cache_key(cache, file_path, header_row, usecols) if cache else None
+    cached_chunks = cache.get_chunks(cache_key, chunksize) if cache is not None else None
+    if cached_chunks is not None:
+        logging.info("已从缓存分块加载文件。")
+        yield from timed_chunks(cached_chunks, file=os.path.basename(file_path))
+
+    elif file_extension == '.csv':
+        encoding = sniff_csv_encoding(file_path, verify=True)
+        logging.info(f"文件将使用 {encoding} 编码分块读取。")
+        with pd.read_csv(file_path, header=header_row, usecols=_usecols_filter(usecols), dtype=str,
+                         encoding=encoding, chunksize=chunksize) as reader:
+            yield from timed_chunks(reader, file=os.path.basename(file_path))
+
+    elif file_extension == '.xlsx' and header_row is not None and get_excel_reader() in ('streaming', 'auto'):
+        logging.info("文件将以只读流式方式分块读取。")
+        yield from timed_chunks(_iter_xlsx_chunks(file_path, header_row, chunksize, usecols),
+                                file=os.path.basename(file_path))
+
+    elif file_extension in ['.xlsx', '.xls']:
+        df = read_file(file_path, header_row=header_row, usecols=usecols)
+        if df.empty:
+            yield df
+            return
+        for start in range(0, len(df), chunksize):
+            # 返回副本而不是切片视图，调用方可以直接给数据块新增列
+            yield df.iloc[start:start + chunksize].copy()
+
+    else:
+        raise ValueError("不支持的文件格式。请选择 .csv, .xlsx 或 .xls 文件。")
+
+
+def _xlsx_cell_value(cell):
+    """与 pandas 的 openpyxl 引擎一致地转换单元格：空单元格为空字符串，错误值为 NaN，整数值的浮点数转为整数。"""
+    from openpyxl.cell.cell import TYPE_ERROR, TYPE_NUMERIC
+
+    if cell.value is None:
+        return ""
+    if cell.data_type == TYPE_ERROR:
+        return np.nan
+    if cell.data_type == TYPE_NUMERIC:
+        value = int(cell.value)
+        return value if value == cell.value else float(cell.value)
+    return cell.value
+
+
+def _iter_xlsx_chunks(file_path, header_row, chunksize, usecols=None):
+    """
+    以 openpyxl 只读模式逐行读取 xlsx 文件的第一个工作表，每凑满 chunksize 行解析为一个 DataFrame。
+    单元格转换、空值识别与 pd.read_excel 相同，但数据类型按块推断
+    （例如某列只在部分数据块中有空值时，只有这些块的该列为浮点数）。
+    列数在输出第一个数据块之前由工作表的数据范围确定（见 _xlsx_sheet_width），各数据块的列相同。
+    """
+    from openpyxl import load_workbook
+    from pandas.io.parsers import TextParser
+
+    wanted = None if usecols is None else set(usecols)
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        sheet = workbook.worksheets[0]
+        width = _xlsx_sheet_width(sheet)
+        sheet.reset_dimensions()
+
+        header = []
+        batch = []
+        blank_rows = 0
+        rows_yielded = 0
+
+        def parse(rows):
+            names = _excel_header_names(header, width)
+            indices = [i for i, name in enumerate(names) if wanted is None or name in wanted]
+            index = pd.RangeIndex(rows_yielded, rows_yielded + len(rows))
+            if not indices:
+                return pd.DataFrame(index=index)
+            data = [[row[i] if i < len(row) else "" for i in indices] for row in rows]
+            df = TextParser(data, names=[names[i] for i in indices], header=None,
+                            skip_blank_lines=False).read()
+            df.index = index
+            return df
+
+        for row_number, row in enumerate(sheet.rows):
+            values = [_xlsx_cell_value(cell) for cell in row]
+            while values and values[-1] == "":
+                values.pop()
+            if len(values) > width:
+                # 工作表记录的数据范围偏小时扩大列数，不丢弃数据（此后的数据块会多出新列）
+                logging.warning(f"文件 {os.path.basename(file_path)} 第 {row_number + 1} 行超出工作表记录的数据范围，"
+                                f"列数由 {width} 增加到 {len(values)}。")
+                width = len(values)
+            if row_number < header_row:
+                continue
+            if row_number == header_row:
+                header = [None if value == "" else value for value in values]
+                continue
+
+            # 末尾的空行不输出，中间的空行保留为全空记录
+            if not values:
+                blank_rows += 1
+                continue
+            batch.extend([[]] * blank_rows)
+            blank_rows = 0
+            batch.append(values)
+            while len(batch) >= chunksize:
+                chunk = parse(batch[:chunksize])
+                batch = batch[chunksize:]
+                rows_yielded += len(chunk)
+                yield chunk
+
+        if batch or not rows_yielded:
+            yield parse(batch)
+    finally:
+        workbook.close()
+
+
 def get_file_list(path):
     """获取目录下的所有csv和excel文件列表"""
     if os.path.isdir(path):
@@ -57,13 +654,14 @@ def get_file_list(path):
         return [path]
 
 
-def export_dataframe_to_file(df, output_dir, file_name, output_format='xlsx'):
+def export_dataframe_to_file(df, output_dir, file_name, output_format='xlsx', engine=None):
     """
     统一的 DataFrame 导出函数。根据指定的格式导出文件。
     :param df: 要导出的 DataFrame
     :param output_dir: 输出目录
     :param file_name: 输出文件名（不含扩展名）
     :param output_format: 输出格式 ('xlsx' 或 'csv')，默认为 'xlsx'
+    :param engine: xlsx 写出引擎（见 XLSX_ENGINES），默认取环境变量 DATA_CONVERT_XLSX_ENGINE 的配置
     """
     if df.empty:
         logging.info(f"DataFrame 为空，跳过导出: {file_name}")
@@ -74,15 +672,16 @@ def export_dataframe_to_file(df, output_dir, file_name, output_format='xlsx'):
     output_path = os.path.join(output_dir, f"{safe_file_name}.{output_format}")
 
     try:
-        if output_format == 'xlsx':
-            if len(df) > get_excel_row_limit():
-                logging.error(f"行数 {len(df)} 超出 XLSX 文件格式限制。请尝试分流模式。")
-                raise ValueError("行数超出 XLSX 文件格式限制")
-            df.to_excel(output_path, index=False)
-        elif output_format == 'csv':
-            df.to_csv(output_path, index=False, encoding='utf-8-sig')
-        else:
-            raise ValueError("不支持的输出格式。请选择 'xlsx' 或 'csv'。")
+        with stage('export', file=f"{safe_file_name}.{output_format}", rows_in=len(df)):
+            if output_format == 'xlsx':
+                if len(df) > get_excel_row_limit():
+                    logging.error(f"行数 {len(df)} 超出 XLSX 文件格式限制。请尝试分流模式。")
+                    raise ValueError("行数超出 XLSX 文件格式限制")
+                _write_xlsx(df, output_path, engine)
+            elif output_format == 'csv':
+                df.to_csv(output_path, index=False, encoding='utf-8-sig')
+            else:
+                raise ValueError("不支持的输出格式。请选择 'xlsx' 或 'csv'。")
 
         logging.info(f"成功导出文件至: {output_path}")
     except Exception as e:
@@ -90,6 +689,165 @@ def export_dataframe_to_file(df, output_dir, file_name, output_format='xlsx'):
         raise
 
 
+def get_xlsx_engine(engine=None):
+    """
+    返回实际使用的 xlsx 写出引擎：'openpyxl'、'write_only' 或 'xlsxwriter'。
+    :param engine: 指定的引擎，为空时取环境变量配置
+    """
+    engine = (engine or os.environ.get(XLSX_ENGINE_ENV) or DEFAULT_XLSX_ENGINE).lower()
+    if engine not in XLSX_ENGINES:
+        raise ValueError(f"不支持的 xlsx 写出引擎: {engine}。可选: {', '.join(XLSX_ENGINES)}")
+    if engine in ('xlsxwriter', 'auto'):
+        try:
+            import xlsxwriter  # noqa: F401
+            return 'xlsxwriter'
+        except ImportError:
+            if engine == 'xlsxwriter':
+                logging.warning("未安装 xlsxwriter，改用 openpyxl 只写模式导出。")
+            return 'write_only'
+    return engine
+
+
+def _write_xlsx(df, output_path, engine=None):
+    """按选定的引擎写出 xlsx 文件，各引擎输出的工作表名、标题行样式与 df.to_excel 一致。"""
+    engine = get_xlsx_engine(engine)
+    if engine == 'openpyxl':
+        df.to_excel(output_path, index=False)
+    elif engine == 'write_only':
+        _write_xlsx_write_only(df, output_path)
+    else:
+        _write_xlsx_constant_memory(df, output_path)
+
+
+def _xlsx_row_batches(df, batch_rows=XLSX_WRITE_BATCH_ROWS):
+    """按批将数据转换为 Python 对象的行元组，缺失值转为 None（写出为空单元格）。"""
+    for start in range(0, len(df), batch_rows):
+        batch = df.iloc[start:start + batch_rows]
+        columns = [batch.iloc[:, i].astype(object) for i in range(batch.shape[1])]
+        columns = [col.where(col.notna(), None).tolist() for col in columns]
+        yield zip(*columns)
+
+
+def _write_xlsx_write_only(df, output_path):
+    """openpyxl 只写模式：逐行写出，不在内存中保留单元格对象。"""
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Alignment, Border, Font, Side
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Sheet1')
+
+    # 标题行样式与 pandas 一致：加粗、细边框、水平居中
+    side = Side(style='thin')
+    font = Font(bold=True)
+    border = Border(left=side, right=side, top=side, bottom=side)
+    alignment = Alignment(horizontal='center', vertical='top')
+    header = []
+    for col in df.columns:
+        cell = WriteOnlyCell(sheet, value=col)
+        cell.font = font
+        cell.border = border
+        cell.alignment = alignment
+        header.append(cell)
+    sheet.append(header)
+
+    for rows in _xlsx_row_batches(df):
+        for row in rows:
+            sheet.append(row)
+    workbook.save(output_path)
+
+
+def _write_xlsx_constant_memory(df, output_path):
+    """xlsxwriter 常量内存模式：按行顺序写出，每写完一行即刷新到临时文件。"""
+    import xlsxwriter
+
+    # 关闭字符串自动转换为超链接，与 openpyxl 写出的内容保持一致
+    workbook = xlsxwriter.Workbook(output_path, {
+        'constant_memory': True,
+        'strings_to_urls': False,
+        'default_date_format': 'yyyy-mm-dd hh:mm:ss',
+    })
+    try:
+        sheet = workbook.add_worksheet('Sheet1')
+        header_format = workbook.add_format({'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'})
+        sheet.write_row(0, 0, list(df.columns), header_format)
+
+        row_index = 1
+        for rows in _xlsx_row_batches(df):
+            for row in rows:
+                sheet.write_row(row_index, 0, row)
+                row_index += 1
+    finally:
+        workbook.close()
+
+
+class ParallelExporter:
+    """
+    并行导出器：在工作进程中并发写出互不相关的分页/分组文件。
+    同时在途的任务数不超过 max_workers 的两倍，避免待写出的数据在内存中堆积；
+    完成回调按提交顺序触发，因此日志顺序与顺序导出一致。
+    max_workers <= 1 时直接在当前进程中顺序导出。
+    """
+
+    def __init__(self, max_workers=1):
+        self.max_workers = max_workers or 1
+        self._executor = ProcessPoolExecutor(max_workers=self.max_workers) if self.max_workers > 1 else None
+        self._pending = deque()
+
+    def submit(self, df, output_dir, file_name, output_format, on_done=None):
+        """
+        提交一个导出任务。
+        :param on_done: 导出完成后在当前进程中调用的回调（无参数）
+        """
+        if self._executor is None:
+            export_dataframe_to_file(df, output_dir, file_name, output_format)
+            if on_done:
+                on_done()
+            return
+
+        while len(self._pending) >= self.max_workers * 2:
+            self._wait_oldest()
+        future = self._executor.submit(_export_task, df, output_dir, file_name, output_format)
+        self._pending.append((future, on_done))
+
+    def close(self):
+        """等待所有任务完成并关闭进程池。"""
+        try:
+            while self._pending:
+                self._wait_oldest()
+        finally:
+            self.shutdown()
+
+    def shutdown(self):
+        """立即关闭进程池，取消尚未开始的任务。"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+        self._pending.clear()
+
+    def _wait_oldest(self):
+        future, on_done = self._pending.popleft()
+        merge_records(future.result())
+        if on_done:
+            on_done()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.shutdown()
+
+
+def _export_task(df, output_dir, file_name, output_format):
+    """在工作进程中导出文件，返回导出阶段的计时记录。"""
+    with collect() as records:
+        export_dataframe_to_file(df, output_dir, file_name, output_format)
+    return records
+
+
 def export_single_file(df, output_dir, file_prefix, output_format):
     """
     导出单个文件（用于 match_and_split 的单个文件模式）。
@@ -101,30 +859,38 @@ def export_single_file(df, output_dir, file_prefix, output_format):
     export_dataframe_to_file(df, output_dir, file_prefix, output_format)
 
 
-def export_split_files(df, output_dir, split_row_count, output_format):
+def export_split_files(df, output_dir, split_row_count, output_format, max_workers=1):
     """
     导出分割文件（用于 match_and_split 的分割模式）。
     :param df: 要导出的 DataFrame
     :param output_dir: 输出目录
     :param split_row_count: 每个文件的最大行数
     :param output_format: 输出格式 ('xlsx' 或 'csv')
+    :param max_workers: 并行导出的进程数上限，1 表示顺序导出
     """
-    grouped_dataframes = df.groupby('所属')
+    # “所属”为 category 列，只导出实际出现的分组
+    grouped_dataframes = df.groupby('所属', observed=True)
+
+    with ParallelExporter(max_workers) as exporter:
+        for group_name, group_df in grouped_dataframes:
+            _export_group_pages(exporter, group_name, group_df, output_dir, split_row_count, output_format)
+
 
-    for group_name, group_df in grouped_dataframes:
-        total_rows = len(group_df)
-        num_pages = (total_rows + split_row_count - 1) // split_row_count
+def _export_group_pages(exporter, group_name, group_df, output_dir, split_row_count, output_format):
+    """将单个“所属”分组按行数分页后提交导出。"""
+    total_rows = len(group_df)
+    num_pages = (total_rows + split_row_count - 1) // split_row_count
 
-        for page in range(num_pages):
-            start_row = page * split_row_count
-            end_row = min((page + 1) * split_row_count, total_rows)
-            page_df = group_df.iloc[start_row:end_row]
+    for page in range(num_pages):
+        start_row = page * split_row_count
+        end_row = min((page + 1) * split_row_count, total_rows)
+        page_df = group_df.iloc[start_row:end_row]
 
-            # 清理组名中的非法字符
-            safe_group_name = re.sub(r'[\\/:*?"<>|]', '_', str(group_name))
-            file_name = f"{safe_group_name}_match_and_split_{page + 1}" if num_pages > 1 else f"{safe_group_name}_match_and_split"
+        # 清理组名中的非法字符
+        safe_group_name = re.sub(r'[\\/:*?"<>|]', '_', str(group_name))
+        file_name = f"{safe_group_name}_match_and_split_{page + 1}" if num_pages > 1 else f"{safe_group_name}_match_and_split"
 
-            export_dataframe_to_file(page_df, output_dir, file_name, output_format)
+        exporter.submit(page_df, output_dir, file_name, output_format)
 
 
 def export_unmatched_file(df, output_dir, output_format):
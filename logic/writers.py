@@ -0,0 +1,215 @@
+import pandas as pd
+import os
+import pickle
+import shutil
+import tempfile
+import logging
+from collections import OrderedDict
+from logic.utils import ParallelExporter
+
+
+class PagedWriter:
+    """
+    滚动分页写出器：逐批接收数据，每凑满一页立即导出为 {prefix}_N 文件。
+    不足一页的剩余数据会保留到下一批（可跨越文件边界），调用 close() 时输出最后一页。
+    内存占用上限约为一页数据加一个数据块，与数据总量无关。
+    export_workers > 1 时各页在工作进程中并行写出。
+    columns 不为空时每页都按该列顺序输出（缺少的列补为空值），使各输入文件列不同时所有页的列一致。
+    """
+
+    def __init__(self, output_dir, prefix, page_size, output_format, log=None, export_workers=1, columns=None):
+        if page_size <= 0:
+            raise ValueError("请填写有效的分页大小！")
+        self.output_dir = output_dir
+        self.prefix = prefix
+        self.page_size = page_size
+        self.output_format = output_format
+        self.columns = list(columns) if columns is not None else None
+        self.log = log or logging.getLogger(__name__)
+
+        self.pages_written = 0
+        self.rows_written = 0
+        self._buffer = []
+        self._buffered_rows = 0
+        self._exporter = ParallelExporter(export_workers)
+
+    def write(self, df):
+        """追加一批数据，凑满的页会立即导出。"""
+        if df.empty:
+            return
+        self._buffer.append(df)
+        self._buffered_rows += len(df)
+        while self._buffered_rows >= self.page_size:
+            self._flush_page(self.page_size)
+
+    def close(self):
+        """导出缓冲区中剩余的数据（最后一页），并等待所有页写出完成。"""
+        if self._buffered_rows:
+            self._flush_page(self._buffered_rows)
+        self._exporter.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._exporter.shutdown()
+
+    def _flush_page(self, rows):
+        """从缓冲区头部取出 rows 行组成一页并导出。"""
+        pieces = []
+        needed = rows
+        while needed:
+            head = self._buffer[0]
+            if len(head) <= needed:
+                pieces.append(head)
+                self._buffer.pop(0)
+                needed -= len(head)
+            else:
+                pieces.append(head.iloc[:needed])
+                self._buffer[0] = head.iloc[needed:]
+                needed = 0
+        self._buffered_rows -= rows
+
+        page = pieces[0] if len(pieces) == 1 else pd.concat(pieces, ignore_index=True)
+        if self.columns is not None and list(page.columns) != self.columns:
+            page = page.reindex(columns=self.columns)
+        self.pages_written += 1
+        self.rows_written += len(page)
+        page_number = self.pages_written
+        page_rows = len(page)
+        self._exporter.submit(
+            page, self.output_dir, f"{self.prefix}_{page_number}", self.output_format,
+            on_done=lambda: self.log.info(f"  - 【输出文件】已输出第 {page_number} 个分页文件，记录数：{page_rows}"))
+
+
+# 分组写出器同时保持打开的临时文件句柄数上限
+DEFAULT_MAX_OPEN_FILES = 64
+
+
+class _GroupState:
+    """单个分组的写出状态：当前页号、当前页已写入的行数及临时文件路径。"""
+
+    def __init__(self, spill_prefix):
+        self.spill_prefix = spill_prefix
+        self.page = 1
+        self.rows = 0
+
+    @property
+    def spill_path(self):
+        return f"{self.spill_prefix}_{self.page}.pkl"
+
+
+class GroupedPagedWriter:
+    """
+    按分组滚动分页的写出器：逐批接收各分组的数据，每个分组按 page_size 分页输出为独立文件。
+    各分组当前页的数据以 pickle 片段追加到临时文件，不驻留内存；同时打开的临时文件句柄数
+    不超过 max_open_files，超出时关闭最久未使用的句柄。
+    某个分组只有一页时输出为 {name}，有多页时输出为 {name}_1、{name}_2……，与一次性分组导出的命名一致；
+    因此写满的页要等到该分组出现下一页的数据（或调用 close()）时才导出。
+    page_size 为 None 时不分页，每个分组输出为一个文件。
+    """
+
+    def __init__(self, output_dir, page_size, output_format, log=None, export_workers=1,
+                 max_open_files=DEFAULT_MAX_OPEN_FILES, spill_dir=None):
+        if page_size is not None and page_size <= 0:
+            raise ValueError("请填写有效的分页大小！")
+        self.output_dir = output_dir
+        self.page_size = page_size
+        self.output_format = output_format
+        self.max_open_files = max(max_open_files, 1)
+        self.log = log or logging.getLogger(__name__)
+
+        self.files_written = 0
+        self.rows_written = 0
+        self._groups = {}
+        self._handles = OrderedDict()
+        self._spill_dir = tempfile.mkdtemp(prefix='grouped_writer_', dir=spill_dir)
+        self._exporter = ParallelExporter(export_workers)
+
+    def write(self, name, df):
+        """
+        追加一批属于同一分组的数据。
+        :param name: 分组的输出文件名（不含页号和扩展名）
+        :param df: 该分组的数据
+        """
+        if df.empty:
+            return
+        state = self._groups.get(name)
+        if state is None:
+            state = _GroupState(os.path.join(self._spill_dir, str(len(self._groups))))
+            self._groups[name] = state
+
+        while not df.empty:
+            if self.page_size is not None and state.rows >= self.page_size:
+                # 当前页已写满且又有新数据，说明该分组有多页，导出当前页并开始下一页
+                self._export_page(state, f"{name}_{state.page}")
+                state.page += 1
+                state.rows = 0
+
+            take = len(df) if self.page_size is None else min(len(df), self.page_size - state.rows)
+            pickle.dump(df.iloc[:take], self._handle(state.spill_path), protocol=pickle.HIGHEST_PROTOCOL)
+            state.rows += take
+            df = df.iloc[take:]
+
+    def close(self):
+        """导出各分组剩余的页，等待所有文件写出完成并删除临时文件。"""
+        try:
+            for name, state in self._groups.items():
+                if state.rows:
+                    self._export_page(state, f"{name}_{state.page}" if state.page > 1 else name)
+            self._exporter.close()
+        finally:
+            self._cleanup()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._exporter.shutdown()
+            self._cleanup()
+
+    def _handle(self, path):
+        """返回临时文件的追加写句柄，按最近使用顺序维护并限制打开数量。"""
+        handle = self._handles.get(path)
+        if handle is not None:
+            self._handles.move_to_end(path)
+            return handle
+        handle = open(path, 'ab')
+        self._handles[path] = handle
+        while len(self._handles) > self.max_open_files:
+            _, oldest = self._handles.popitem(last=False)
+            oldest.close()
+        return handle
+
+    def _export_page(self, state, file_name):
+        """读回分组当前页的所有片段，合并后提交导出。"""
+        path = state.spill_path
+        handle = self._handles.pop(path, None)
+        if handle is not None:
+            handle.close()
+
+        pieces = []
+        with open(path, 'rb') as f:
+            while True:
+                try:
+                    pieces.append(pickle.load(f))
+                except EOFError:
+                    break
+        os.remove(path)
+
+        page = pieces[0] if len(pieces) == 1 else pd.concat(pieces, ignore_index=True)
+        self.files_written += 1
+        self.rows_written += len(page)
+        self._exporter.submit(page, self.output_dir, file_name, self.output_format)
+
+    def _cleanup(self):
+        for handle in self._handles.values():
+            handle.close()
+        self._handles.clear()
+        shutil.rmtree(self._spill_dir, ignore_errors=True)
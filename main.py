@@ -1,9 +1,62 @@
+import time
+
+# 启动计时起点，尽量早于其他导入（打包为单文件程序时不包含解压用时，可用 benchmarks/bench_startup.py 从外部测量）
+START_TIME = time.perf_counter()
+
+import os
 import sys
+import json
+import logging
+import multiprocessing
+from datetime import datetime
 from PyQt6.QtWidgets import QApplication
+from PyQt6.QtCore import QTimer
 from ui.main_windows import MainWindow
 
+# 设置后每次启动把启动用时以 JSON 行追加写入该文件，便于长期跟踪
+STARTUP_REPORT_ENV = 'DATA_CONVERT_STARTUP_REPORT'
+# 设置为 1 时记录启动用时后立即退出（供启动基准测试使用）
+EXIT_AFTER_STARTUP_ENV = 'DATA_CONVERT_EXIT_AFTER_STARTUP'
+
+
+class CurrentStderrHandler(logging.StreamHandler):
+    """始终写入当前的 sys.stderr：切换页面时标准错误被重定向到当前页面的日志框，日志随之显示在日志框和日志文件中。"""
+
+    @property
+    def stream(self):
+        return sys.stderr
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+
+def report_startup_time():
+    """窗口首次绘制后调用：在日志框中显示启动用时，并按环境变量写入启动报告。"""
+    elapsed = time.perf_counter() - START_TIME
+    print(f"程序启动用时: {elapsed:.2f} 秒")
+    report_path = os.environ.get(STARTUP_REPORT_ENV)
+    if report_path:
+        record = {'time': datetime.now().isoformat(timespec='seconds'), 'first_paint_seconds': round(elapsed, 3),
+                  'frozen': bool(getattr(sys, 'frozen', False))}
+        try:
+            with open(report_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record) + '\n')
+        except OSError:
+            pass
+    if os.environ.get(EXIT_AFTER_STARTUP_ENV) == '1':
+        QApplication.quit()
+
+
 if __name__ == '__main__':
+    # 打包为可执行文件后，多进程并行处理需要此调用
+    multiprocessing.freeze_support()
+    # 在创建页面之前统一配置日志，日志与 print 一样输出到当前页面的日志框
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s',
+                        handlers=[CurrentStderrHandler()])
     app = QApplication(sys.argv)
     window = MainWindow()
     window.show()
-    sys.exit(app.exec())
\ No newline at end of file
+    # 事件循环处理完窗口的首次绘制后再记录启动用时
+    QTimer.singleShot(0, report_startup_time)
+    sys.exit(app.exec())
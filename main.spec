@@ -6,11 +6,13 @@ a = Analysis(
     pathex=[],
     binaries=[],
     datas=[],
-    hiddenimports=['pandas','openpyxl','xlrd','re','chardet','rapidfuzz'],
+    # pandas 在运行时才按需导入 Excel 引擎，需显式声明；chardet 等直接导入的模块会被自动分析到
+    # （未使用的 rapidfuzz 不再打包，减少单文件程序启动时的解压量）
+    hiddenimports=['openpyxl','xlrd'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
+    excludes=['tkinter','matplotlib','IPython','pytest'],
     noarchive=False,
     optimize=0,
 )
@@ -26,7 +28,8 @@ exe = EXE(
     debug=False,
     bootloader_ignore_signals=False,
     strip=False,
-    upx=True,
+    # 不使用 UPX 压缩：单文件程序每次启动都要解压全部二进制，UPX 会额外增加解压耗时
+    upx=False,
     upx_exclude=[],
     runtime_tmpdir=None,
     console=False,
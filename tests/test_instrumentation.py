@@ -0,0 +1,38 @@
+import logging
+import time
+
+import numpy as np
+import pytest
+
+from logic.instrumentation import RSS_SAMPLE_INTERVAL, run, stage
+
+pytest.importorskip('psutil')
+
+
+def test_stage_peak_includes_memory_freed_before_stage_end(caplog):
+    with caplog.at_level(logging.INFO), run('peak') as report:
+        with stage('concat'):
+            # 分配约 200 MB，保留几个采样间隔后在阶段结束前释放，结束时的内存变化量接近 0，但峰值应包含它
+            block = np.ones(25 * 1024 ** 2)
+            time.sleep(RSS_SAMPLE_INTERVAL * 4)
+            del block
+        with stage('export'):
+            pass
+
+    totals = report.stage_totals()
+    assert totals['concat']['peak_rss_mb'] - totals['export']['peak_rss_mb'] > 150
+    assert abs(totals['concat']['rss_delta_mb']) < 50
+    # 运行总结通过 logging 输出
+    assert "--- 运行报告：peak ---" in caplog.text
+
+
+def test_nested_stages_record_their_own_peak():
+    with run('nested') as report:
+        with stage('parse'):
+            with stage('normalize'):
+                block = np.ones(25 * 1024 ** 2)
+                time.sleep(RSS_SAMPLE_INTERVAL * 4)
+                del block
+
+    totals = report.stage_totals()
+    assert totals['parse']['peak_rss_mb'] >= totals['normalize']['peak_rss_mb']
@@ -0,0 +1,145 @@
+import os
+
+import pandas as pd
+import pytest
+
+from logic import match_and_split
+from logic.incremental import INCREMENTAL_DIR
+from logic.match_and_split import MatchAndSplitProcessor
+
+SPLIT_ROWS = 3
+
+
+def read_outputs(directory):
+    """读回输出目录中所有 csv 输出文件，返回 {文件名: DataFrame}。"""
+    return {
+        name: pd.read_csv(os.path.join(directory, name), dtype=str, keep_default_na=False)
+        for name in sorted(os.listdir(directory)) if name.endswith('.csv')
+    }
+
+
+def assert_same_outputs(actual, expected):
+    assert list(actual) == list(expected)
+    for name in expected:
+        pd.testing.assert_frame_equal(actual[name], expected[name], obj=name)
+
+
+@pytest.fixture
+def sources(tmp_path):
+    """两个源文件：分组“甲”跨越文件边界并超过一页，“乙”恰好一页，无匹配记录多于一页。"""
+    source_dir = tmp_path / 'sources'
+    source_dir.mkdir()
+    pd.DataFrame({
+        '号码': ['a1', 'b1', 'x1', 'a2', 'x2', 'b2'],
+        '数量': range(6),
+    }).to_csv(source_dir / '1.csv', index=False)
+    pd.DataFrame({
+        '号码': ['A3', 'x3', 'b3', 'a4', '', 'x4'],
+        '数量': range(6, 12),
+    }).to_csv(source_dir / '2.csv', index=False)
+
+    mapping_path = tmp_path / 'mapping.csv'
+    pd.DataFrame([[f'{prefix}{i}', group] for prefix, group in (('a', '甲'), ('b', '乙/丙')) for i in range(1, 5)]
+                 ).to_csv(mapping_path, index=False, header=False)
+    return str(source_dir), str(mapping_path)
+
+
+def run_processor(sources, output_dir, output_mode='split_output', **kwargs):
+    source_dir, mapping_path = sources
+    processor = MatchAndSplitProcessor()
+    processor.set_output_dir(str(output_dir))
+    processor.load_source_files(source_dir, header_row=1)
+    processor.load_mapping_file(mapping_path)
+    processor.process_and_export('号码', output_mode, SPLIT_ROWS, 'csv', **kwargs)
+    return read_outputs(output_dir)
+
+
+@pytest.mark.parametrize('output_mode', ['split_output', 'single_file'])
+def test_streaming_output_matches_in_memory_export(tmp_path, sources, output_mode):
+    expected = run_processor(sources, tmp_path / 'memory', output_mode)
+    streamed = run_processor(sources, tmp_path / 'streamed', output_mode, streaming=True, chunk_size=2)
+
+    assert_same_outputs(streamed, expected)
+    # 无匹配记录无论是否分割都只输出一个文件
+    assert len(expected['无匹配_match_and_split.csv']) == SPLIT_ROWS + 2
+    if output_mode == 'split_output':
+        assert list(expected) == ['乙_丙_match_and_split.csv', '无匹配_match_and_split.csv',
+                                  '甲_match_and_split_1.csv', '甲_match_and_split_2.csv']
+
+
+@pytest.fixture
+def source_reads(monkeypatch):
+    """记录实际读取数据的源文件名（一次性读取或分块读取），不含映射文件。"""
+    reads = []
+
+    def spy(read):
+        def wrapper(file_path, *args, **kwargs):
+            if os.path.basename(file_path) != 'mapping.csv':
+                reads.append(os.path.basename(file_path))
+            return read(file_path, *args, **kwargs)
+        return wrapper
+
+    monkeypatch.setattr(match_and_split, 'read_file', spy(match_and_split.read_file))
+    monkeypatch.setattr(match_and_split, 'read_file_chunks', spy(match_and_split.read_file_chunks))
+    return reads
+
+
+def partial_files(output_dir):
+    """返回增量处理保存的各源文件中间结果：{文件名: (修改时间, 内容)}。"""
+    directory = os.path.join(output_dir, INCREMENTAL_DIR, 'match_and_split')
+    partials = {}
+    for name in os.listdir(directory):
+        if name.endswith('.pkl'):
+            path = os.path.join(directory, name)
+            with open(path, 'rb') as f:
+                partials[name] = (os.stat(path).st_mtime_ns, f.read())
+    return partials
+
+
+@pytest.mark.parametrize('streaming', [False, True])
+def test_incremental_reprocesses_only_changed_source(tmp_path, sources, source_reads, streaming):
+    output_dir = tmp_path / 'out'
+    options = dict(streaming=streaming, chunk_size=2, incremental=True)
+    first = run_processor(sources, output_dir, **options)
+    assert sorted(source_reads) == ['1.csv', '2.csv']
+    (output_dir / 'notes.txt').write_text('保留')
+
+    # 源文件均未变化：不读取任何源文件，输出与上次相同
+    source_reads.clear()
+    partials = partial_files(output_dir)
+    assert_same_outputs(run_processor(sources, output_dir, **options), first)
+    assert source_reads == []
+    assert partial_files(output_dir) == partials
+
+    # 修改 2.csv，“甲”分组由两页变为一页
+    source_dir = sources[0]
+    pd.DataFrame({'号码': ['b3', 'x5', 'x6', 'x7', 'x8', 'x9', 'x10'], '数量': range(7)}).to_csv(
+        os.path.join(source_dir, '2.csv'), index=False)
+    source_reads.clear()
+    second = run_processor(sources, output_dir, **options)
+    assert source_reads == ['2.csv']
+
+    # 只有 2.csv 的中间结果被重新生成，1.csv 的保持不变
+    changed = partial_files(output_dir)
+    assert len(changed) == 2
+    assert len(set(changed.items()) & set(partials.items())) == 1
+
+    # 输出与对修改后的源文件完整处理一次的结果相同，过期的分页文件被删除，其他文件保留
+    assert_same_outputs(second, run_processor(sources, tmp_path / 'full_2', streaming=streaming))
+    assert '甲_match_and_split_2.csv' in first and '甲_match_and_split_2.csv' not in second
+    assert (output_dir / 'notes.txt').read_text() == '保留'
+
+
+def test_remove_previous_outputs_keeps_other_files(tmp_path):
+    previous = ['match_and_split.xlsx', '甲_match_and_split.csv', '甲_match_and_split_12.xlsx',
+                '无匹配_match_and_split.csv']
+    kept = ['notes.txt', 'other.csv', 'match_and_split_backup.csv', 'match_and_split.csv.bak']
+    for name in previous + kept:
+        (tmp_path / name).write_text('')
+    (tmp_path / 'x_match_and_split.csv').mkdir()
+
+    processor = MatchAndSplitProcessor()
+    processor.set_output_dir(str(tmp_path))
+    processor._remove_previous_outputs()
+
+    assert sorted(os.listdir(tmp_path)) == sorted(kept + ['x_match_and_split.csv'])
@@ -0,0 +1,135 @@
+import os
+import random
+
+import pandas as pd
+import pytest
+
+from logic import data_match
+from logic.data_match import MatchCache, fuzzy_match_and_fill
+from logic.matchers import LongestPrefixMatcher
+
+VALUES = ['abc', 'abd', 'ab', 'a', 'b12', 'B1', 'x', '', ' AbC ', 'ac9']
+
+
+def expected_keys(values, mapping_dict):
+    matcher = LongestPrefixMatcher(mapping_dict.keys())
+    return {value: matcher.find(str(value).strip().lower()) for value in values}
+
+
+@pytest.fixture
+def recompute_count(monkeypatch):
+    """统计实际重新匹配（未命中缓存）的值数量。"""
+    calls = []
+    original = data_match._longest_prefix_key
+
+    def counting(text, key_winners):
+        calls.append(text)
+        return original(text, key_winners)
+
+    monkeypatch.setattr(data_match, '_longest_prefix_key', counting)
+    return calls
+
+
+def test_lookup_matches_longest_prefix_matcher():
+    rng = random.Random(0)
+    alphabet = 'aAbB1'
+    for _ in range(200):
+        keys = [''.join(rng.choice(alphabet) for _ in range(rng.randint(1, 4))) for _ in range(rng.randint(1, 8))]
+        mapping_dict = {key: f'组{i}' for i, key in enumerate(keys)}
+        values = {''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 6))) for _ in range(20)}
+        assert MatchCache().lookup(values, mapping_dict, 'sig') == expected_keys(values, mapping_dict)
+
+
+@pytest.mark.parametrize('change', ['add', 'remove', 'replace_case'])
+def test_changed_key_invalidates_only_prefixed_values(recompute_count, change):
+    mapping_dict = {'a': '甲', 'ab': '乙', 'b1': '丙'}
+    cache = MatchCache()
+    cache.lookup(VALUES, mapping_dict, 'v1')
+
+    changed = dict(mapping_dict)
+    if change == 'add':
+        changed['abc'] = '丁'
+    elif change == 'remove':
+        del changed['ab']
+    else:
+        # 小写键相同但生效的原始键变化（'ab' 改写为 'AB'），同样需要重新匹配
+        del changed['ab']
+        changed['AB'] = '戊'
+    recompute_count.clear()
+    assert cache.lookup(VALUES, changed, 'v2') == expected_keys(VALUES, changed)
+
+    affected = {'abc', 'abd', 'ab'} if change != 'add' else {'abc'}
+    assert set(recompute_count) == affected
+
+
+def test_unchanged_signature_reuses_all_results(recompute_count):
+    mapping_dict = {'a': '甲', 'b1': '丙'}
+    cache = MatchCache()
+    cache.lookup(VALUES, mapping_dict, 'v1')
+    recompute_count.clear()
+
+    assert cache.lookup(VALUES, mapping_dict, 'v1') == expected_keys(VALUES, mapping_dict)
+    # 签名相同时只匹配新出现的值
+    cache.lookup(VALUES + ['b19'], mapping_dict, 'v1')
+    assert recompute_count == ['b19']
+
+
+def test_persisted_cache_saves_only_on_change(tmp_path, monkeypatch, recompute_count):
+    cache_path = str(tmp_path / 'match_cache.pkl')
+    mapping_dict = {'a': '甲', 'b1': '丙'}
+    MatchCache(cache_path).lookup(VALUES, mapping_dict, 'v1')
+    assert os.path.exists(cache_path)
+
+    saves = []
+    monkeypatch.setattr(MatchCache, '_save', lambda self: saves.append(True))
+    recompute_count.clear()
+    cache = MatchCache(cache_path)
+    assert cache.lookup(VALUES, mapping_dict, 'v1') == expected_keys(VALUES, mapping_dict)
+    assert recompute_count == []
+    assert saves == []
+
+    del mapping_dict['b1']
+    assert cache.lookup(VALUES, mapping_dict, 'v2') == expected_keys(VALUES, mapping_dict)
+    assert set(recompute_count) == {'b12', 'b1'}
+    assert saves == [True]
+
+
+def test_prune_keeps_current_values():
+    cache = MatchCache(max_entries=3)
+    mapping_dict = {'a': '甲'}
+    cache.lookup(['a1', 'a2', 'a3'], mapping_dict, 'v1')
+    assert cache.lookup(['a4', 'b'], mapping_dict, 'v1') == {'a4': 'a', 'b': None}
+    assert set(cache._results) == {'a4', 'b'}
+
+
+def write_mapping(path, rows):
+    pd.DataFrame(rows).to_csv(path, index=False, header=False)
+
+
+def test_fuzzy_match_with_cache_follows_mapping_edits(tmp_path):
+    mapping_path = str(tmp_path / 'mapping.csv')
+    source_values = {'abc', 'abd', 'b12', 'x9'}
+    cache = MatchCache(str(tmp_path / 'match_cache.pkl'))
+
+    write_mapping(mapping_path, [['a', '甲'], ['b1', '丙']])
+    assert fuzzy_match_and_fill(source_values, mapping_path, match_cache=cache) == \
+        fuzzy_match_and_fill(source_values, mapping_path)
+
+    # 新增、删除映射键后文件B的修改时间或大小变化，缓存结果随之更新
+    write_mapping(mapping_path, [['a', '甲'], ['abd', '丁'], ['x', '戊']])
+    stat = os.stat(mapping_path)
+    os.utime(mapping_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    matched, unmatched = fuzzy_match_and_fill(source_values, mapping_path, match_cache=cache)
+    assert matched == {'abc': '甲', 'abd': '丁', 'x9': '戊'}
+    assert unmatched == {'b12'}
+
+
+def test_mapping_signature_tracks_file_and_separators(tmp_path):
+    mapping_path = str(tmp_path / 'mapping.csv')
+    write_mapping(mapping_path, [['a', '甲']])
+    signature = data_match._mapping_signature(mapping_path, None, None)
+    assert data_match._mapping_signature(mapping_path, None, None) == signature
+    assert data_match._mapping_signature(mapping_path, '/', '-') != signature
+
+    write_mapping(mapping_path, [['a', '甲'], ['b', '乙']])
+    assert data_match._mapping_signature(mapping_path, None, None) != signature
@@ -0,0 +1,128 @@
+import random
+
+import pandas as pd
+import pytest
+
+from logic.matchers import ContainsMatcher, LongestPrefixMatcher, build_matcher
+
+
+def _random_strings(count, max_len, seed, alphabet='abc'):
+    """生成由少量字符组成的随机字符串，使关键字之间、关键字与值之间大量重叠。"""
+    rng = random.Random(seed)
+    return [''.join(rng.choice(alphabet) for _ in range(rng.randint(0, max_len))) for _ in range(count)]
+
+
+def _assert_same_mask(match_mode, keywords, values, naive):
+    matcher = build_matcher(match_mode, set(keywords))
+    series = pd.Series(values)
+    expected = [naive(value, keywords) for value in values]
+    assert matcher.match(series).tolist() == expected
+
+
+def _naive_contains(value, keywords):
+    return any(keyword in value for keyword in keywords)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_contains_matches_naive_on_overlapping_keywords(seed):
+    keywords = [k for k in _random_strings(30, 4, seed) if k]
+    values = _random_strings(200, 8, seed + 100)
+    _assert_same_mask('包含匹配', keywords, values, _naive_contains)
+
+
+def test_contains_overlapping_and_nested_keywords():
+    keywords = ['he', 'she', 'his', 'hers', 'ers']
+    values = ['ushers', 'h', 'hi', 'sh', 'hxs', 'rs', 'hers', '', 'abcers']
+    _assert_same_mask('包含匹配', keywords, values, _naive_contains)
+
+
+def test_contains_empty_keyword_matches_everything():
+    values = ['abc', '', 'x']
+    _assert_same_mask('包含匹配', ['', 'zz'], values, _naive_contains)
+
+
+def test_contains_without_keywords_matches_nothing():
+    _assert_same_mask('包含匹配', [], ['abc', ''], _naive_contains)
+
+
+def test_contains_pure_python_automaton_matches_naive(monkeypatch):
+    # 未安装 pyahocorasick 时使用的纯 Python 自动机
+    monkeypatch.setattr('logic.matchers.ahocorasick', None)
+    keywords = [k for k in _random_strings(40, 5, 7) if k]
+    values = _random_strings(300, 10, 8)
+    matcher = ContainsMatcher(keywords)
+    assert [matcher.search(value) for value in values] == [_naive_contains(v, keywords) for v in values]
+
+
+def _naive_prefix(value, keywords):
+    return any(value.startswith(keyword) for keyword in keywords)
+
+
+def _naive_suffix(value, keywords):
+    return any(value.endswith(keyword) for keyword in keywords)
+
+
+@pytest.mark.parametrize('match_mode, naive', [('前缀匹配', _naive_prefix), ('后缀匹配', _naive_suffix)])
+@pytest.mark.parametrize('seed', range(5))
+def test_prefix_suffix_match_naive_on_overlapping_keywords(match_mode, naive, seed):
+    keywords = [k for k in _random_strings(30, 4, seed) if k]
+    values = _random_strings(200, 8, seed + 100)
+    _assert_same_mask(match_mode, keywords, values, naive)
+
+
+@pytest.mark.parametrize('match_mode, naive', [('前缀匹配', _naive_prefix), ('后缀匹配', _naive_suffix)])
+def test_prefix_suffix_nested_keywords(match_mode, naive):
+    # 关键字互为前缀/后缀，值与关键字等长、比关键字短或为空
+    keywords = ['a', 'ab', 'abc', 'bc', 'c']
+    values = ['abcd', 'ab', 'a', '', 'xbc', 'b', 'dcba', 'cc']
+    _assert_same_mask(match_mode, keywords, values, naive)
+
+
+@pytest.mark.parametrize('match_mode, naive', [('前缀匹配', _naive_prefix), ('后缀匹配', _naive_suffix)])
+def test_prefix_suffix_empty_keyword_matches_everything(match_mode, naive):
+    _assert_same_mask(match_mode, ['', 'zz'], ['abc', '', 'x'], naive)
+
+
+@pytest.mark.parametrize('match_mode, naive', [('前缀匹配', _naive_prefix), ('后缀匹配', _naive_suffix)])
+def test_prefix_suffix_without_keywords_matches_nothing(match_mode, naive):
+    _assert_same_mask(match_mode, [], ['abc', ''], naive)
+
+
+def _naive_longest_prefix(value_str, keys):
+    """原来的右模糊匹配：按原始键长度降序（长度相同时保持出现顺序）逐个尝试，取第一个命中的键。"""
+    for key in sorted((key for key in keys if isinstance(key, str) and key), key=len, reverse=True):
+        if value_str.startswith(key.lower()):
+            return key
+    return None
+
+
+def _assert_same_winner(keys, values):
+    matcher = LongestPrefixMatcher(keys)
+    for value in values:
+        value_str = str(value).strip().lower()
+        assert matcher.find(value_str) == _naive_longest_prefix(value_str, keys), value
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_longest_prefix_matches_naive_on_overlapping_keys(seed):
+    # 键包含大小写两种形式，转为小写后会重复，覆盖同长度的并列情况
+    keys = list(dict.fromkeys(_random_strings(40, 4, seed, alphabet='abAB')))
+    values = _random_strings(300, 8, seed + 100, alphabet='abAB ')
+    _assert_same_winner(keys, values)
+
+
+def test_longest_prefix_prefers_longer_key():
+    _assert_same_winner(['a', 'abc', 'ab'], ['abcd', 'abd', 'ax', 'b', ''])
+
+
+def test_longest_prefix_tie_goes_to_first_key():
+    # 'AB' 与 'ab' 转为小写后相同、长度相同，先出现的键优先
+    _assert_same_winner(['AB', 'ab', 'Ab'], ['abc', 'ab'])
+    _assert_same_winner(['ab', 'AB'], ['abc'])
+    assert LongestPrefixMatcher(['AB', 'ab']).find('abc') == 'AB'
+
+
+def test_longest_prefix_ignores_empty_and_non_string_keys():
+    keys = ['', None, 12, 'x']
+    _assert_same_winner(keys, ['xy', 'y', ''])
+    assert LongestPrefixMatcher(['', None]).find('abc') is None
@@ -0,0 +1,67 @@
+import openpyxl
+import pytest
+from openpyxl.styles import Font
+
+from logic.utils import EXCEL_READER_ENV, read_columns, read_file
+
+
+def _write_sheet(path, rows, formatted_cell=None):
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    for row in rows:
+        sheet.append(row)
+    if formatted_cell:
+        # 只设置格式、没有值的单元格会扩大工作表记录的数据范围
+        sheet[formatted_cell].font = Font(bold=True)
+    workbook.save(path)
+    return str(path)
+
+
+SHEETS = {
+    'numeric_header': ([[2.5, 0, 1.0], [0, 0, None], [2, None, None]], None),
+    'int_and_text_header': ([[1, 'a', 2], [1, 2, 3]], None),
+    'empty_sheet': ([], None),
+    'formatted_empty_sheet': ([], 'C5'),
+    'formatted_cells_beyond_data': ([['a', 'b'], [1, 2]], 'E3'),
+    'empty_string_cells': ([['a', '', 2.5, None], ['', 'b', 'c', None]], None),
+    'data_wider_than_header': ([['a'], [1, 2, 3]], None),
+    'duplicate_and_blank_names': ([['a', 'a', None, 'b', ' '], [1, 2, 3, 4, 5]], None),
+}
+
+
+@pytest.fixture(params=['openpyxl', 'calamine'])
+def excel_reader(request, monkeypatch):
+    if request.param == 'calamine':
+        pytest.importorskip('python_calamine')
+    monkeypatch.setenv(EXCEL_READER_ENV, request.param)
+    return request.param
+
+
+@pytest.mark.parametrize('header_row', [0, 1])
+@pytest.mark.parametrize('name', SHEETS)
+def test_read_columns_matches_read_file(tmp_path, excel_reader, name, header_row):
+    rows, formatted_cell = SHEETS[name]
+    path = _write_sheet(tmp_path / f'{name}.xlsx', rows, formatted_cell)
+    try:
+        expected = list(read_file(path, header_row=header_row, compact=False).columns)
+    except ValueError:
+        # 标题行超出数据范围时 read_file 报错，read_columns 同样报错
+        with pytest.raises(ValueError):
+            read_columns(path, header_row=header_row)
+        return
+    columns = read_columns(path, header_row=header_row)
+    assert columns == expected
+    assert [type(col) for col in columns] == [type(col) for col in expected]
+
+
+def test_numeric_header_selected_from_read_columns_is_found_in_read_file(tmp_path, excel_reader):
+    path = _write_sheet(tmp_path / 'numeric.xlsx', SHEETS['numeric_header'][0])
+    df = read_file(path, compact=False)
+    for col in read_columns(path):
+        assert col in df.columns
+
+
+def test_read_columns_matches_read_file_for_csv(tmp_path):
+    path = tmp_path / 'source.csv'
+    path.write_text('号码,,号码\n1,2,3\n', encoding='utf-8')
+    assert read_columns(str(path)) == list(read_file(str(path), compact=False).columns)
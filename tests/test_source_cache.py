@@ -0,0 +1,44 @@
+import pandas as pd
+import pytest
+
+from logic import utils
+from logic.source_cache import CACHE_DIR_ENV, get_source_cache
+
+pytest.importorskip('pyarrow')
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setenv(CACHE_DIR_ENV, str(tmp_path / 'cache'))
+    return get_source_cache()
+
+
+@pytest.fixture
+def xlsx_file(tmp_path):
+    path = tmp_path / 'source.xlsx'
+    pd.DataFrame({'号码': ['a1', 'b2'], '数量': [1, 2]}).to_excel(path, index=False)
+    return str(path)
+
+
+def test_read_file_is_served_from_cache_with_same_options(cache, xlsx_file):
+    df = utils.read_file(xlsx_file, compact=False)
+    key = utils._source_cache_key(cache, xlsx_file, 0, None)
+    pd.testing.assert_frame_equal(cache.get(key), df)
+
+
+def test_changed_excel_engine_misses_cache(cache, xlsx_file, monkeypatch):
+    utils.read_file(xlsx_file, compact=False)
+    key = utils._source_cache_key(cache, xlsx_file, 0, None)
+
+    # 切换为 calamine 引擎后不能使用 openpyxl 解析的缓存
+    monkeypatch.setattr(utils, '_excel_parse_engine', lambda: 'calamine')
+    calamine_key = utils._source_cache_key(cache, xlsx_file, 0, None)
+    assert calamine_key != key
+    assert cache.get(calamine_key) is None
+    assert cache.get_chunks(calamine_key, 10) is None
+
+
+@pytest.mark.parametrize('header_row, usecols', [(1, None), (0, ['号码'])])
+def test_changed_read_options_miss_cache(cache, xlsx_file, header_row, usecols):
+    utils.read_file(xlsx_file, compact=False)
+    assert cache.get(utils._source_cache_key(cache, xlsx_file, header_row, usecols)) is None
@@ -0,0 +1,154 @@
+import os
+
+import pandas as pd
+import pytest
+
+from logic.utils import export_split_files
+from logic.writers import GroupedPagedWriter, PagedWriter
+
+PAGE_SIZE = 5
+
+
+def read_outputs(directory):
+    """读回目录中所有 csv 输出文件，返回 {文件名: DataFrame}。"""
+    return {
+        name: pd.read_csv(os.path.join(directory, name), dtype=str, keep_default_na=False)
+        for name in sorted(os.listdir(directory)) if name.endswith('.csv')
+    }
+
+
+def assert_same_outputs(actual_dir, expected_dir):
+    actual = read_outputs(actual_dir)
+    expected = read_outputs(expected_dir)
+    assert list(actual) == list(expected)
+    for name in expected:
+        pd.testing.assert_frame_equal(actual[name], expected[name], obj=name)
+
+
+def make_frame(rows, groups=('甲', '乙')):
+    return pd.DataFrame({
+        '号码': [f'n{i}' for i in range(rows)],
+        '数量': range(rows),
+        '所属': [groups[i % len(groups)] for i in range(rows)],
+    })
+
+
+def batches(df, size):
+    return [df.iloc[start:start + size] for start in range(0, len(df), size)]
+
+
+@pytest.mark.parametrize('rows', [2 * PAGE_SIZE - 1, 2 * PAGE_SIZE, 2 * PAGE_SIZE + 1])
+@pytest.mark.parametrize('batch_size', [1, 3, PAGE_SIZE, 7])
+def test_paged_writer_page_boundaries(tmp_path, rows, batch_size):
+    df = make_frame(rows)
+    with PagedWriter(str(tmp_path), 'part', PAGE_SIZE, 'csv') as writer:
+        for batch in batches(df, batch_size):
+            writer.write(batch)
+
+    num_pages = -(-rows // PAGE_SIZE)
+    assert writer.pages_written == num_pages
+    assert writer.rows_written == rows
+    outputs = read_outputs(tmp_path)
+    assert list(outputs) == [f'part_{page}.csv' for page in range(1, num_pages + 1)]
+    for page in range(num_pages):
+        expected = df.iloc[page * PAGE_SIZE:(page + 1) * PAGE_SIZE].reset_index(drop=True).astype(str)
+        pd.testing.assert_frame_equal(outputs[f'part_{page + 1}.csv'], expected)
+
+
+def test_paged_writer_exports_full_page_before_close(tmp_path):
+    writer = PagedWriter(str(tmp_path), 'part', PAGE_SIZE, 'csv')
+    writer.write(make_frame(PAGE_SIZE))
+    # 恰好凑满一页时立即导出，缓冲区中不保留数据，close() 不再输出空页
+    assert os.listdir(tmp_path) == ['part_1.csv']
+    writer.close()
+    assert writer.pages_written == 1
+    assert os.listdir(tmp_path) == ['part_1.csv']
+
+
+def test_paged_writer_aligns_columns(tmp_path):
+    columns = ['号码', '数量', '备注']
+    with PagedWriter(str(tmp_path), 'part', 2, 'csv', columns=columns) as writer:
+        writer.write(pd.DataFrame({'号码': ['a'], '数量': ['1']}))
+        writer.write(pd.DataFrame({'备注': ['x', 'y'], '号码': ['b', 'c']}))
+
+    outputs = read_outputs(tmp_path)
+    assert all(list(page.columns) == columns for page in outputs.values())
+    assert outputs['part_1.csv'].to_dict('list') == {'号码': ['a', 'b'], '数量': ['1', ''], '备注': ['', 'x']}
+
+
+def write_grouped(writer, df, batch_size):
+    """按流式处理的方式把各数据块拆分为分组推送给写出器。"""
+    for batch in batches(df, batch_size):
+        for group_name, group_df in batch.groupby('所属', sort=False, observed=True):
+            writer.write(f"{group_name}_match_and_split", group_df)
+            assert len(writer._handles) <= writer.max_open_files
+
+
+@pytest.mark.parametrize('group_rows', [PAGE_SIZE - 1, PAGE_SIZE, PAGE_SIZE + 1,
+                                        2 * PAGE_SIZE - 1, 2 * PAGE_SIZE, 2 * PAGE_SIZE + 1])
+def test_grouped_writer_matches_split_export(tmp_path, group_rows):
+    groups = ['甲', '乙', '丙', 'a/b', '戊']
+    df = make_frame(group_rows * len(groups), groups)
+    df['所属'] = df['所属'].astype(pd.CategoricalDtype(groups + ['未出现']))
+
+    streamed_dir = tmp_path / 'streamed'
+    expected_dir = tmp_path / 'expected'
+    streamed_dir.mkdir()
+    expected_dir.mkdir()
+    # 句柄上限小于分组数，各分组的临时文件需要反复关闭、重新打开追加
+    with GroupedPagedWriter(str(streamed_dir), PAGE_SIZE, 'csv', max_open_files=2,
+                            spill_dir=str(tmp_path)) as writer:
+        write_grouped(writer, df, 3)
+    export_split_files(df, str(expected_dir), PAGE_SIZE, 'csv')
+
+    assert writer.rows_written == len(df)
+    assert_same_outputs(streamed_dir, expected_dir)
+
+
+def test_grouped_writer_single_page_keeps_plain_name(tmp_path):
+    with GroupedPagedWriter(str(tmp_path), PAGE_SIZE, 'csv') as writer:
+        writer.write('甲', make_frame(PAGE_SIZE))
+        writer.write('乙', make_frame(PAGE_SIZE + 1))
+        writer.write('丙', make_frame(0))
+
+    # 恰好一页的分组不带页号，多一行即拆成两页，空分组不输出文件
+    assert sorted(os.listdir(tmp_path)) == ['乙_1.csv', '乙_2.csv', '甲.csv']
+    assert writer.files_written == 3
+
+
+def test_grouped_writer_without_page_size(tmp_path):
+    df = make_frame(3 * PAGE_SIZE + 1)
+    with GroupedPagedWriter(str(tmp_path), None, 'csv') as writer:
+        for batch in batches(df, 4):
+            writer.write('全部', batch)
+
+    outputs = read_outputs(tmp_path)
+    assert list(outputs) == ['全部.csv']
+    pd.testing.assert_frame_equal(outputs['全部.csv'], df.astype(str))
+
+
+def test_grouped_writer_removes_spill_files(tmp_path):
+    spill_root = tmp_path / 'spill'
+    spill_root.mkdir()
+    out_dir = tmp_path / 'out'
+    out_dir.mkdir()
+
+    with GroupedPagedWriter(str(out_dir), PAGE_SIZE, 'csv', spill_dir=str(spill_root)) as writer:
+        write_grouped(writer, make_frame(2 * PAGE_SIZE + 1, ['甲', '乙', '丙']), 2)
+        assert os.listdir(spill_root)
+    assert os.listdir(spill_root) == []
+
+    # 出错退出时同样删除临时文件，不导出剩余的页
+    with pytest.raises(RuntimeError):
+        with GroupedPagedWriter(str(out_dir), PAGE_SIZE, 'csv', spill_dir=str(spill_root)) as writer:
+            writer.write('失败', make_frame(3))
+            raise RuntimeError
+    assert os.listdir(spill_root) == []
+    assert '失败.csv' not in os.listdir(out_dir)
+
+
+def test_grouped_writer_rejects_invalid_page_size(tmp_path):
+    with pytest.raises(ValueError):
+        GroupedPagedWriter(str(tmp_path), 0, 'csv')
+    with pytest.raises(ValueError):
+        PagedWriter(str(tmp_path), 'part', 0, 'csv')
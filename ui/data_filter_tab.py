@@ -1,32 +1,11 @@
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
-                             QComboBox, QFileDialog, QLineEdit, QMessageBox, QTextEdit, QApplication)
+                             QComboBox, QFileDialog, QLineEdit, QMessageBox, QPlainTextEdit,
+                             QCheckBox, QSpinBox)
 from PyQt6.QtGui import QIntValidator
-from PyQt6.QtCore import QObject, pyqtSignal
-from logic.data_filter import DataFilterLogic
+from ui.workers import TaskWorker, ProgressPanel
+from ui.log_stream import LogStream, default_log_path
 import os
 import sys
-import pandas as pd
-
-
-# 自定义一个流类，用于将stdout重定向到QTextEdit
-class Stream(QObject):
-    new_text_signal = pyqtSignal(str)
-
-    def __init__(self, new_text_edit):
-        super().__init__()
-        self.text_edit = new_text_edit
-        self.new_text_signal.connect(self.text_edit.append)
-        self.current_line = ""
-
-    def write(self, text):
-        self.current_line += text
-        if '\n' in self.current_line:
-            lines = self.current_line.split('\n')
-            self.new_text_signal.emit(lines[0])
-            self.current_line = '\n'.join(lines[1:])
-
-    def flush(self):
-        pass
 
 
 class DataFilterTab(QWidget):
@@ -36,14 +15,23 @@ class DataFilterTab(QWidget):
         self.is_dir_mode = False
         self.file_b_path = ""
 
-        # 初始化业务逻辑层
-        self.logic = DataFilterLogic()
+        # 业务逻辑层在第一次使用时创建
+        self._logic = None
+        self.worker = None
 
         self.setup_ui()
 
-        self.log_stream = Stream(self.log_output)
+        self.log_stream = LogStream(self.log_output, default_log_path('data_filter'))
         sys.stdout = self.log_stream
 
+    @property
+    def logic(self):
+        """业务逻辑层，第一次使用时才导入（依赖的 pandas 导入较慢，不影响程序启动）"""
+        if self._logic is None:
+            from logic.data_filter import DataFilterLogic
+            self._logic = DataFilterLogic()
+        return self._logic
+
     def setup_ui(self):
         main_layout = QVBoxLayout(self)
 
@@ -129,8 +117,20 @@ class DataFilterTab(QWidget):
         self.page_size_label = QLabel("分页大小（条）：")
         self.page_size_input = QLineEdit("1000000")
         self.page_size_input.setValidator(QIntValidator())
+        self.streaming_checkbox = QCheckBox("流式处理（低内存）")
+        self.streaming_checkbox.setToolTip("分块读取并边处理边输出分页文件，内存占用与数据总量无关")
         page_layout.addWidget(self.page_size_label)
         page_layout.addWidget(self.page_size_input)
+        page_layout.addWidget(self.streaming_checkbox)
+        self.incremental_checkbox = QCheckBox("增量处理")
+        self.incremental_checkbox.setToolTip("保存各文件的筛选结果，再次处理同一目录时只筛选新增或有变化的文件")
+        page_layout.addWidget(self.incremental_checkbox)
+        self.workers_label = QLabel("并行进程数：")
+        self.workers_spinbox = QSpinBox()
+        self.workers_spinbox.setRange(1, os.cpu_count() or 1)
+        self.workers_spinbox.setToolTip("目录模式下按文件并行处理，并行写出分页文件，1 表示不启用多进程")
+        page_layout.addWidget(self.workers_label)
+        page_layout.addWidget(self.workers_spinbox)
         main_layout.addLayout(page_layout)
 
         # 10. 输出目录和格式配置
@@ -164,8 +164,12 @@ class DataFilterTab(QWidget):
         g_layout.addWidget(self.filter_button)
         main_layout.addLayout(g_layout)
 
+        # 进度和取消
+        self.progress_panel = ProgressPanel()
+        main_layout.addWidget(self.progress_panel)
+
         # 12. 日志输出文本框
-        self.log_output = QTextEdit()
+        self.log_output = QPlainTextEdit()
         self.log_output.setReadOnly(True)
         main_layout.addWidget(self.log_output)
 
@@ -183,6 +187,7 @@ class DataFilterTab(QWidget):
         self.match_mode_label.setVisible(is_filter_mode)
         self.match_mode_combo.setVisible(is_filter_mode)
         self.file_b_label.setVisible(is_filter_mode)
+        self.incremental_checkbox.setVisible(is_filter_mode)
         self.filter_button.setText("开始筛选" if is_filter_mode else "开始分页")
 
     def on_mode_changed(self, index):
@@ -247,15 +252,29 @@ class DataFilterTab(QWidget):
             "match_mode": self.match_mode_combo.currentText(),
             "header_row": int(self.header_row_combo.currentText()),
             "page_size": int(self.page_size_input.text()),
+            "streaming": self.streaming_checkbox.isChecked(),
+            "incremental": self.incremental_checkbox.isChecked(),
+            "workers": self.workers_spinbox.value(),
             "output_dir": self.output_dir_path.text(),
             "output_format": self.output_format_combo.currentText()
         }
 
-        try:
-            self.logic.process_data(params)
-            QMessageBox.information(self, "完成", "处理已全部完成！")
-        except Exception as e:
-            QMessageBox.critical(self, "错误", f"处理失败：{e}")
-            print(f"\n错误：{e}")
-        finally:
-            self.filter_button.setEnabled(True)
\ No newline at end of file
+        # 在后台线程中处理，界面保持响应，可随时取消
+        self.worker = TaskWorker(lambda progress: self.logic.process_data({**params, "progress": progress}))
+        self.worker.task_finished.connect(self.processing_finished)
+        self.worker.task_error.connect(self.processing_error)
+        self.worker.task_cancelled.connect(self.processing_cancelled)
+        self.worker.finished.connect(lambda: self.filter_button.setEnabled(True))
+        self.progress_panel.attach(self.worker)
+        self.worker.start()
+
+    def processing_finished(self, _):
+        QMessageBox.information(self, "完成", "处理已全部完成！")
+
+    def processing_error(self, message):
+        QMessageBox.critical(self, "错误", f"处理失败：{message}")
+        print(f"\n错误：{message}")
+
+    def processing_cancelled(self):
+        print("\n处理已取消，输出目录中可能留有部分结果文件。")
+        QMessageBox.information(self, "已取消", "处理已取消。")
\ No newline at end of file
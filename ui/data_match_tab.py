@@ -1,34 +1,9 @@
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
-                             QComboBox, QFileDialog, QLineEdit, QTextEdit, QMessageBox, QGroupBox)
-from PyQt6.QtCore import QObject, pyqtSignal
-# 从 logic.data_match 导入更新后的函数
-from logic.data_match import get_unique_values, fuzzy_match_and_fill, export_match_results
+                             QComboBox, QFileDialog, QLineEdit, QPlainTextEdit, QMessageBox, QSpinBox)
+from ui.workers import TaskWorker, ProgressPanel
+from ui.log_stream import LogStream, default_log_path
 import os
 import sys
-import pandas as pd
-from PyQt6.QtWidgets import QApplication
-from logic.utils import read_file
-
-
-# 自定义一个流类，用于将stdout重定向到QTextEdit
-class Stream(QObject):
-    new_text_signal = pyqtSignal(str)
-
-    def __init__(self, new_text_edit):
-        super().__init__()
-        self.text_edit = new_text_edit
-        self.new_text_signal.connect(self.text_edit.append)
-        self.current_line = ""
-
-    def write(self, text):
-        self.current_line += text
-        if '\n' in self.current_line:
-            lines = self.current_line.split('\n')
-            self.new_text_signal.emit(lines[0])
-            self.current_line = '\n'.join(lines[1:])
-
-    def flush(self):
-        pass
 
 
 class DataMatchTab(QWidget):
@@ -41,12 +16,21 @@ class DataMatchTab(QWidget):
         self.file_b_path = ""
         self.matched_results = {}
         self.unmatched_values = set()
+        self.worker = None
 
         self.setup_ui()
 
-        # 在这里只实例化 Stream 对象，不进行全局重定向
+        # 在这里只实例化 LogStream 对象，不进行全局重定向
         # 日志重定向将在主窗口中动态完成
-        self.log_stream = Stream(self.log_output)
+        self.log_stream = LogStream(self.log_output, default_log_path('data_match'))
+
+    @property
+    def match_cache(self):
+        """匹配结果缓存，第一次匹配时才加载"""
+        if self._match_cache is None:
+            from logic.data_match import MatchCache
+            self._match_cache = MatchCache(self.match_cache_path)
+        return self._match_cache
 
     def setup_ui(self):
         main_layout = QVBoxLayout(self)
@@ -101,7 +85,13 @@ class DataMatchTab(QWidget):
         e_layout = QHBoxLayout()
         self.load_unique_button = QPushButton("加载去重数据")
         self.load_unique_button.clicked.connect(self.load_unique_data)
+        self.workers_label = QLabel("并行进程数：")
+        self.workers_spinbox = QSpinBox()
+        self.workers_spinbox.setRange(1, os.cpu_count() or 1)
+        self.workers_spinbox.setToolTip("目录模式下按文件并行读取，1 表示不启用多进程")
         e_layout.addWidget(self.load_unique_button)
+        e_layout.addWidget(self.workers_label)
+        e_layout.addWidget(self.workers_spinbox)
         main_layout.addLayout(e_layout)
 
         # f. 模糊匹配文件b选择
@@ -149,6 +139,12 @@ class DataMatchTab(QWidget):
         else:
             base_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
         default_output_dir = os.path.join(base_path, 'output')
+
+        # 匹配结果缓存：修改文件B后重新匹配时只重新计算受影响的值
+        cache_dir = os.path.join(base_path, 'cache')
+        os.makedirs(cache_dir, exist_ok=True)
+        self.match_cache_path = os.path.join(cache_dir, 'match_cache.pkl')
+        self._match_cache = None
         self.output_dir_path = QLineEdit(default_output_dir)
         self.output_dir_path.setReadOnly(True)
         self.select_output_dir_button = QPushButton("选择目录")
@@ -173,8 +169,12 @@ class DataMatchTab(QWidget):
         output_button_layout.addWidget(self.export_button)
         main_layout.addLayout(output_button_layout)
 
+        # 进度和取消
+        self.progress_panel = ProgressPanel()
+        main_layout.addWidget(self.progress_panel)
+
         # 日志输出文本框
-        self.log_output = QTextEdit()
+        self.log_output = QPlainTextEdit()
         self.log_output.setReadOnly(True)
         main_layout.addWidget(self.log_output)
 
@@ -226,20 +226,11 @@ class DataMatchTab(QWidget):
 
         self.log_output.clear()
         print("正在读取文件a的列标题...")
-        file_to_read = self.file_a_path
-        if self.is_dir_mode:
-            files = [f for f in os.listdir(self.file_a_path) if f.endswith(('.csv', '.xlsx', '.xls'))]
-            if not files:
-                QMessageBox.warning(self, "警告", "所选目录中没有找到可用的CSV或Excel文件！")
-                print("未找到有效文件，操作终止。")
-                return
-            file_to_read = os.path.join(self.file_a_path, files[0])
-
         try:
             header_row = int(self.header_row_combo.currentText()) - 1
-            df = read_file(file_to_read, header_row=header_row)
-
-            self.file_a_cols = [str(col) for col in list(df.columns)]
+            # 逻辑层在第一次使用时才导入（依赖的 pandas 导入较慢，不影响程序启动）
+            from logic.data_match import get_source_columns
+            self.file_a_cols = get_source_columns(self.file_a_path, self.is_dir_mode, header_row)
             self.col_a_combo.clear()
             self.col_a_combo.addItems(self.file_a_cols)
             print("列标题读取成功！")
@@ -261,13 +252,17 @@ class DataMatchTab(QWidget):
             return
 
         header_row = int(self.header_row_combo.currentText()) - 1
+        file_a_path, is_dir_mode, workers = self.file_a_path, self.is_dir_mode, self.workers_spinbox.value()
+        from logic.data_match import get_unique_values
 
-        try:
-            self.unique_values = get_unique_values(self.file_a_path, self.is_dir_mode, header_row, col_a)
-            print(f"\n成功加载去重数据。总计 {len(self.unique_values)} 条唯一值。")
-        except Exception as e:
-            QMessageBox.critical(self, "错误", f"加载去重数据失败：{e}")
-            print(f"加载去重数据失败：{e}")
+        self._start_worker(
+            lambda progress: get_unique_values(file_a_path, is_dir_mode, header_row, col_a, workers=workers,
+                                               progress=progress),
+            self.unique_data_loaded, "加载去重数据失败")
+
+    def unique_data_loaded(self, unique_values):
+        self.unique_values = unique_values
+        print(f"\n成功加载去重数据。总计 {len(self.unique_values)} 条唯一值。")
 
     def start_match(self):
         self.log_output.clear()
@@ -289,20 +284,21 @@ class DataMatchTab(QWidget):
         if new_sep == '(无)':
             new_sep = None
 
-        try:
-            print("--- 开始进行数据匹配 ---")
-            self.matched_results, self.unmatched_values = fuzzy_match_and_fill(
-                self.unique_values, self.file_b_path, old_separator=old_sep, new_separator=new_sep
-            )
-
-            if self.matched_results or self.unmatched_values:
-                self.export_button.setEnabled(True)
+        print("--- 开始进行数据匹配 ---")
+        unique_values, file_b_path = self.unique_values, self.file_b_path
+        from logic.data_match import fuzzy_match_and_fill
+        self._start_worker(
+            lambda progress: fuzzy_match_and_fill(unique_values, file_b_path, old_separator=old_sep,
+                                                  new_separator=new_sep, match_cache=self.match_cache,
+                                                  progress=progress),
+            self.match_finished, "匹配失败")
 
-            QMessageBox.information(self, "完成", "数据匹配已完成！请检查日志，或点击导出按钮。")
+    def match_finished(self, results):
+        self.matched_results, self.unmatched_values = results
+        if self.matched_results or self.unmatched_values:
+            self.export_button.setEnabled(True)
 
-        except Exception as e:
-            QMessageBox.critical(self, "错误", f"匹配失败：{e}")
-            print(f"匹配失败：{e}")
+        QMessageBox.information(self, "完成", "数据匹配已完成！请检查日志，或点击导出按钮。")
 
     def export_results(self):
         if not self.matched_results and not self.unmatched_values:
@@ -314,8 +310,42 @@ class DataMatchTab(QWidget):
         if not os.path.exists(output_dir):
             os.makedirs(output_dir)
 
-        try:
-            export_match_results(self.matched_results, self.unmatched_values, output_dir, output_format)
-            QMessageBox.information(self, "成功", f"结果已成功导出到：\n{output_dir}")
-        except Exception as e:
-            QMessageBox.critical(self, "错误", f"导出失败：{e}")
\ No newline at end of file
+        matched_results, unmatched_values = self.matched_results, self.unmatched_values
+        from logic.data_match import export_match_results
+        self._start_worker(
+            lambda progress: export_match_results(matched_results, unmatched_values, output_dir, output_format),
+            lambda _: QMessageBox.information(self, "成功", f"结果已成功导出到：\n{output_dir}"), "导出失败")
+
+    def _start_worker(self, func, on_finished, error_title):
+        """
+        在后台线程中执行 func(progress)，期间禁用各操作按钮。
+        :param on_finished: 成功时以 func 的返回值调用
+        :param error_title: 失败时错误提示的前缀
+        """
+        buttons = [self.read_cols_button, self.load_unique_button, self.match_button, self.export_button]
+        export_enabled = self.export_button.isEnabled()
+        for button in buttons:
+            button.setEnabled(False)
+
+        def restore_buttons(*_):
+            for button in buttons[:-1]:
+                button.setEnabled(True)
+            self.export_button.setEnabled(export_enabled)
+
+        def on_error(message):
+            QMessageBox.critical(self, "错误", f"{error_title}：{message}")
+            print(f"{error_title}：{message}")
+
+        def on_cancelled():
+            print("\n操作已取消。")
+            QMessageBox.information(self, "已取消", "操作已取消。")
+
+        self.worker = TaskWorker(func)
+        # 先恢复按钮，再执行各结果的回调（匹配完成后会启用导出按钮）
+        for signal in (self.worker.task_finished, self.worker.task_error, self.worker.task_cancelled):
+            signal.connect(restore_buttons)
+        self.worker.task_finished.connect(on_finished)
+        self.worker.task_error.connect(on_error)
+        self.worker.task_cancelled.connect(on_cancelled)
+        self.progress_panel.attach(self.worker)
+        self.worker.start()
\ No newline at end of file
@@ -0,0 +1,85 @@
+import os
+import sys
+import threading
+from datetime import datetime
+from PyQt6.QtCore import QObject, QTimer
+
+# 日志框最多保留的行数，超出后自动丢弃最早的行（完整日志保存在日志文件中）
+DEFAULT_MAX_LINES = 5000
+# 日志框刷新间隔（毫秒）
+DEFAULT_FLUSH_INTERVAL_MS = 100
+
+
+def default_log_path(name):
+    """返回程序目录下 logs 子目录中按日期命名的日志文件路径，如 logs/data_filter_20240101.log。"""
+    if getattr(sys, 'frozen', False):
+        base_path = os.path.dirname(sys.executable)
+    else:
+        base_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(base_path, 'logs', f"{name}_{datetime.now().strftime('%Y%m%d')}.log")
+
+
+# 自定义一个流类，用于将stdout重定向到日志框
+class LogStream(QObject):
+    """
+    批量写入日志框的输出流：write() 只把完整的行放入缓冲区（可在任意线程调用），
+    由界面线程的定时器每隔 flush_interval_ms 毫秒合并写入一次日志框，避免每行一次信号和重绘。
+    日志框（QPlainTextEdit）最多保留 max_lines 行；指定 log_file 时所有行同时追加写入该文件。
+    """
+
+    def __init__(self, text_edit, log_file=None, max_lines=DEFAULT_MAX_LINES,
+                 flush_interval_ms=DEFAULT_FLUSH_INTERVAL_MS):
+        super().__init__()
+        self.text_edit = text_edit
+        self.text_edit.setMaximumBlockCount(max_lines)
+        self.max_lines = max_lines
+        self.log_file = log_file
+        self.current_line = ""
+        self._pending = []
+        self._lock = threading.Lock()
+        self._file = None
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(flush_interval_ms)
+        self._timer.timeout.connect(self.flush_to_widget)
+        self._timer.start()
+
+    def write(self, text):
+        with self._lock:
+            self.current_line += text
+            if '\n' in self.current_line:
+                lines = self.current_line.split('\n')
+                self.current_line = lines.pop()
+                self._pending.extend(lines)
+
+    def flush(self):
+        pass
+
+    def flush_to_widget(self):
+        """将缓冲区中的行一次性写入日志框和日志文件（由定时器在界面线程中调用）。"""
+        with self._lock:
+            if not self._pending:
+                return
+            lines = self._pending
+            self._pending = []
+
+        self._write_log_file(lines)
+        # 超出日志框容量的行写入后也会立即被丢弃，直接跳过
+        if len(lines) > self.max_lines:
+            skipped = len(lines) - self.max_lines + 1
+            note = f"...（省略 {skipped} 行" + (f"，完整日志见 {self.log_file}）" if self._file else "）")
+            lines = [note] + lines[skipped:]
+        self.text_edit.appendPlainText('\n'.join(lines))
+
+    def _write_log_file(self, lines):
+        if not self.log_file:
+            return
+        try:
+            if self._file is None:
+                os.makedirs(os.path.dirname(self.log_file), exist_ok=True)
+                self._file = open(self.log_file, 'a', encoding='utf-8')
+            self._file.write('\n'.join(lines) + '\n')
+            self._file.flush()
+        except OSError:
+            # 日志文件不可写时只保留日志框输出
+            self.log_file = None
@@ -1,8 +1,14 @@
 import sys
+import importlib
 from PyQt6.QtWidgets import QMainWindow, QTabWidget, QVBoxLayout, QWidget
-from ui.data_filter_tab import DataFilterTab
-from ui.data_match_tab import DataMatchTab
-from ui.match_and_split_tab import MatchAndSplitTab
+
+# 功能页面：(属性名, 标题, 模块, 类名)。页面在第一次切换到时才导入并创建，
+# 加快程序启动（各页面依赖的 pandas 等模块在第一次使用时才导入）
+TABS = [
+    ('data_filter_tab', "数据筛选", 'ui.data_filter_tab', 'DataFilterTab'),
+    ('match_tab', "去重匹配", 'ui.data_match_tab', 'DataMatchTab'),
+    ('match_and_split_tab', "匹配分割", 'ui.match_and_split_tab', 'MatchAndSplitTab'),
+]
 
 
 class MainWindow(QMainWindow):
@@ -25,17 +31,10 @@ class MainWindow(QMainWindow):
         self.original_stdout = sys.stdout
         self.original_stderr = sys.stderr
 
-        # 添加数据筛选标签页
-        self.data_filter_tab = DataFilterTab()
-        self.tab_widget.addTab(self.data_filter_tab, "数据筛选")
-
-        # 创建第二个选项卡：数据匹配
-        self.match_tab = DataMatchTab()
-        self.tab_widget.addTab(self.match_tab, "去重匹配")
-
-        # 添加新的匹配分割标签页
-        self.match_and_split_tab = MatchAndSplitTab()
-        self.tab_widget.addTab(self.match_and_split_tab, "匹配分割")
+        # 先添加空白占位页，页面内容在第一次切换到该页时创建
+        for attr, title, _, _ in TABS:
+            setattr(self, attr, None)
+            self.tab_widget.addTab(QWidget(), title)
 
         # 关键修改 2: 连接信号到槽函数
         self.tab_widget.currentChanged.connect(self.on_tab_changed)
@@ -43,12 +42,31 @@ class MainWindow(QMainWindow):
         # 将 QTabWidget 添加到主布局中
         main_layout.addWidget(self.tab_widget)
 
-        # 初始时，手动调用一次，将日志重定向到默认显示的选项卡
+        # 初始时，手动调用一次，创建默认显示的选项卡并将日志重定向到它的日志框
         self.on_tab_changed(self.tab_widget.currentIndex())
 
+    def ensure_tab(self, index):
+        """返回第 index 个功能页面，尚未创建时导入对应模块并替换占位页"""
+        attr, title, module_name, class_name = TABS[index]
+        tab = getattr(self, attr)
+        if tab is None:
+            tab_class = getattr(importlib.import_module(module_name), class_name)
+            tab = tab_class()
+            setattr(self, attr, tab)
+            placeholder = self.tab_widget.widget(index)
+            current_index = self.tab_widget.currentIndex()
+            # 替换占位页时不触发 currentChanged
+            self.tab_widget.blockSignals(True)
+            self.tab_widget.removeTab(index)
+            self.tab_widget.insertTab(index, tab, title)
+            self.tab_widget.setCurrentIndex(current_index)
+            self.tab_widget.blockSignals(False)
+            placeholder.deleteLater()
+        return tab
+
     def on_tab_changed(self, index):
         """当Tab切换时，将日志重定向到当前激活Tab的日志框"""
-        current_tab = self.tab_widget.widget(index)
+        current_tab = self.ensure_tab(index)
 
         # 恢复原始的stdout和stderr
         sys.stdout = self.original_stdout
@@ -59,4 +77,16 @@ class MainWindow(QMainWindow):
             sys.stdout = current_tab.log_stream
             sys.stderr = current_tab.log_stream
 
-        print(f"当前页面已切换至：{self.tab_widget.tabText(index)}")
\ No newline at end of file
+        print(f"当前页面已切换至：{self.tab_widget.tabText(index)}")
+
+    def closeEvent(self, event):
+        """关闭窗口时取消各页面正在后台执行的任务，等待线程结束，并写出尚未刷新的日志"""
+        for attr, _, _, _ in TABS:
+            tab = getattr(self, attr)
+            worker = getattr(tab, 'worker', None)
+            if worker is not None and worker.isRunning():
+                worker.cancel()
+                worker.wait()
+            if hasattr(tab, 'log_stream'):
+                tab.log_stream.flush_to_widget()
+        super().closeEvent(event)
@@ -1,64 +1,32 @@
 import os
-import sys
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QGroupBox, QRadioButton, QFileDialog,
     QPushButton, QComboBox, QLabel, QLineEdit, QHBoxLayout, QMessageBox,
-    QProgressBar, QTextEdit
+    QPlainTextEdit, QSpinBox, QCheckBox
 )
-from PyQt6.QtCore import QThread, pyqtSignal, QObject
 
-# 从逻辑层导入业务逻辑
-from logic.match_and_split import MatchAndSplitProcessor
-
-
-# 自定义一个流类，用于将stdout重定向到QTextEdit
-class Stream(QObject):
-    new_text_signal = pyqtSignal(str)
-
-    def __init__(self, new_text_edit):
-        super().__init__()
-        self.text_edit = new_text_edit
-        self.new_text_signal.connect(self.text_edit.append)
-        self.current_line = ""
-
-    def write(self, text):
-        self.current_line += text
-        if '\n' in self.current_line:
-            lines = self.current_line.split('\n')
-            self.new_text_signal.emit(lines[0])
-            self.current_line = '\n'.join(lines[1:])
-
-    def flush(self):
-        pass
-
-
-# 后台工作线程，用于执行耗时操作
-class WorkerThread(QThread):
-    task_finished = pyqtSignal()
-    task_error = pyqtSignal(str)
-
-    def __init__(self, processor, params):
-        super().__init__()
-        self.processor = processor
-        self.params = params
-
-    def run(self):
-        try:
-            self.processor.process_and_export(**self.params)
-            self.task_finished.emit()
-        except Exception as e:
-            self.task_error.emit(str(e))
+from ui.workers import TaskWorker, ProgressPanel
+from ui.log_stream import LogStream, default_log_path
 
 
 class MatchAndSplitTab(QWidget):
     def __init__(self):
         super().__init__()
-        self.processor = MatchAndSplitProcessor()
-        self.worker_thread = None
+        # 业务逻辑层在第一次使用时创建
+        self._processor = None
+        self.worker = None
         self.setup_ui()
 
-        # 实例化 Stream 类，但不再在这里执行重定向
-        self.log_stream = Stream(self.log_textedit)
+        # 实例化 LogStream 类，但不再在这里执行重定向
+        self.log_stream = LogStream(self.log_textedit, default_log_path('match_and_split'))
+
+    @property
+    def processor(self):
+        """匹配分流处理器，第一次读取标题列或执行时才创建"""
+        if self._processor is None:
+            from logic.match_and_split import MatchAndSplitProcessor
+            self._processor = MatchAndSplitProcessor()
+        return self._processor
 
     def setup_ui(self):
         main_layout = QVBoxLayout(self)
@@ -134,6 +102,17 @@ class MatchAndSplitTab(QWidget):
         output_mode_layout.addStretch()
         output_mode_layout.addWidget(self.split_row_count_label)
         output_mode_layout.addWidget(self.split_row_count_lineedit)
+        self.streaming_checkbox = QCheckBox("流式处理（低内存）")
+        self.streaming_checkbox.setToolTip("分块读取并按分组边处理边输出文件，内存占用与数据总量无关")
+        output_mode_layout.addWidget(self.streaming_checkbox)
+        self.incremental_checkbox = QCheckBox("增量处理")
+        self.incremental_checkbox.setToolTip("保存各文件的处理结果，再次处理同一目录时只处理新增或有变化的文件")
+        output_mode_layout.addWidget(self.incremental_checkbox)
+        output_mode_layout.addWidget(QLabel("并行进程数:"))
+        self.workers_spinbox = QSpinBox()
+        self.workers_spinbox.setRange(1, os.cpu_count() or 1)
+        self.workers_spinbox.setToolTip("目录模式下按文件并行处理，并行写出分组文件，1 表示不启用多进程")
+        output_mode_layout.addWidget(self.workers_spinbox)
         config_layout.addLayout(output_mode_layout)
 
         # h. 输出文件格式和目录
@@ -166,7 +145,11 @@ class MatchAndSplitTab(QWidget):
         self.execute_button.clicked.connect(self.start_process)
         main_layout.addWidget(self.execute_button)
 
-        self.log_textedit = QTextEdit()
+        # 进度和取消
+        self.progress_panel = ProgressPanel()
+        main_layout.addWidget(self.progress_panel)
+
+        self.log_textedit = QPlainTextEdit()
         self.log_textedit.setReadOnly(True)
         main_layout.addWidget(self.log_textedit)
 
@@ -245,19 +228,25 @@ class MatchAndSplitTab(QWidget):
             'col_a': col_a,
             'output_mode': output_mode,
             'split_row_count': split_row_count,
-            'output_format': output_format
+            'output_format': output_format,
+            'workers': self.workers_spinbox.value(),
+            'streaming': self.streaming_checkbox.isChecked(),
+            'incremental': self.incremental_checkbox.isChecked()
         }
 
         self.execute_button.setEnabled(False)
         self.log_textedit.clear()
         print("开始执行...")
 
-        self.worker_thread = WorkerThread(self.processor, params)
-        self.worker_thread.task_finished.connect(self.process_finished)
-        self.worker_thread.task_error.connect(self.process_error)
-        self.worker_thread.start()
+        self.worker = TaskWorker(lambda progress: self.processor.process_and_export(**params,
+                                                                                          progress=progress))
+        self.worker.task_finished.connect(self.process_finished)
+        self.worker.task_error.connect(self.process_error)
+        self.worker.task_cancelled.connect(self.process_cancelled)
+        self.progress_panel.attach(self.worker)
+        self.worker.start()
 
-    def process_finished(self):
+    def process_finished(self, _):
         self.execute_button.setEnabled(True)
         print("所有任务已完成！")
         QMessageBox.information(self, "完成", "数据匹配和导出已完成！")
@@ -265,4 +254,9 @@ class MatchAndSplitTab(QWidget):
     def process_error(self, message):
         self.execute_button.setEnabled(True)
         print(f"执行失败: {message}")
-        QMessageBox.critical(self, "执行错误", message)
\ No newline at end of file
+        QMessageBox.critical(self, "执行错误", message)
+
+    def process_cancelled(self):
+        self.execute_button.setEnabled(True)
+        print("已取消，输出目录中可能留有部分结果文件。")
+        QMessageBox.information(self, "已取消", "数据匹配和导出已取消。")
\ No newline at end of file
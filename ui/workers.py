@@ -0,0 +1,93 @@
+from PyQt6.QtWidgets import QWidget, QHBoxLayout, QProgressBar, QLabel, QPushButton
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from logic.progress import CancelToken, ProgressTracker, OperationCancelled
+
+
+# 通用后台工作线程，用于执行耗时操作，避免界面卡死
+class TaskWorker(QThread):
+    """
+    在后台线程中执行 func(progress)，progress 为绑定了本线程取消令牌的 ProgressTracker。
+    调用 cancel() 后，处理逻辑在下一个文件或数据块之前抛出 OperationCancelled，线程发出 task_cancelled。
+    """
+    # 已完成文件数, 文件总数, 已处理记录数, 每秒记录数
+    progress_changed = pyqtSignal(int, int, int, float)
+    task_finished = pyqtSignal(object)
+    task_error = pyqtSignal(str)
+    task_cancelled = pyqtSignal()
+
+    def __init__(self, func):
+        super().__init__()
+        self.func = func
+        self.cancel_token = CancelToken()
+        self.progress = ProgressTracker(self.progress_changed.emit, self.cancel_token)
+
+    def cancel(self):
+        self.cancel_token.cancel()
+
+    def run(self):
+        try:
+            result = self.func(self.progress)
+        except OperationCancelled:
+            self.task_cancelled.emit()
+        except Exception as e:
+            self.task_error.emit(str(e))
+        else:
+            self.task_finished.emit(result)
+
+
+class ProgressPanel(QWidget):
+    """进度条、进度说明（文件数、记录数、吞吐量）和取消按钮，绑定到正在运行的 TaskWorker。"""
+
+    def __init__(self):
+        super().__init__()
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setTextVisible(False)
+        self.status_label = QLabel("")
+        self.cancel_button = QPushButton("取消")
+        self.cancel_button.setEnabled(False)
+        layout.addWidget(self.progress_bar)
+        layout.addWidget(self.status_label)
+        layout.addWidget(self.cancel_button)
+        self.worker = None
+
+    def attach(self, worker):
+        """开始显示 worker 的进度，取消按钮在任务结束前可用。"""
+        self.worker = worker
+        self.progress_bar.setRange(0, 0)
+        self.status_label.setText("正在处理...")
+        self.cancel_button.setEnabled(True)
+        self.cancel_button.clicked.connect(self.cancel)
+        worker.progress_changed.connect(self.update_progress)
+        worker.finished.connect(self.detach)
+
+    def cancel(self):
+        if self.worker is not None:
+            self.worker.cancel()
+            self.cancel_button.setEnabled(False)
+            self.status_label.setText("正在取消，当前文件或数据块处理完后停止...")
+
+    def update_progress(self, files_done, total_files, rows_done, rows_per_sec):
+        # 文件总数未知（如模糊匹配）时显示为忙碌状态
+        if total_files:
+            self.progress_bar.setRange(0, total_files)
+            self.progress_bar.setValue(files_done)
+            text = f"文件 {files_done}/{total_files}，"
+        else:
+            self.progress_bar.setRange(0, 0)
+            text = ""
+        self.status_label.setText(f"{text}已处理 {rows_done} 条，{rows_per_sec:.0f} 条/秒")
+
+    def detach(self):
+        self.cancel_button.setEnabled(False)
+        self.cancel_button.clicked.disconnect(self.cancel)
+        cancelled = self.worker.cancel_token.is_cancelled()
+        # 结束忙碌状态
+        if self.progress_bar.maximum() == 0:
+            self.progress_bar.setRange(0, 1)
+            self.progress_bar.setValue(0 if cancelled else 1)
+        if cancelled:
+            self.status_label.setText(f"{self.status_label.text()}（已取消）")
+        self.worker = None